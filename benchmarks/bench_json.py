@@ -0,0 +1,68 @@
+"""
+Compares the load and dump throughput of the installed JSON backends.
+Run from the repository root with: ``python -m benchmarks.bench_json``.
+"""
+
+import random
+
+from benchmarks.common import bench
+from wmutils import json as wmjson
+
+REPEATS = 5
+
+
+def build_flat_document(record_count: int) -> list:
+    return [
+        {
+            "id": index,
+            "name": f"user-{index}",
+            "score": random.random(),
+            "active": index % 3 == 0,
+        }
+        for index in range(record_count)
+    ]
+
+
+def build_nested_document(record_count: int) -> list:
+    return [
+        {
+            "id": index,
+            "author": {"name": f"user-{index}", "roles": ["dev", "reviewer"]},
+            "files": [
+                {"path": f"src/file_{file}.py", "changes": {"+": file, "-": index}}
+                for file in range(5)
+            ],
+            "labels": None,
+        }
+        for index in range(record_count)
+    ]
+
+
+def main():
+    random.seed(42)
+    documents = [
+        ("flat", build_flat_document(100_000)),
+        ("nested", build_nested_document(20_000)),
+    ]
+    print(f"Best of {REPEATS}.")
+    for name in wmjson.get_available_json_backends():
+        backend = wmjson.set_json_backend(name)
+        for document_name, document in documents:
+            text = backend.dumps(document)
+            data = text.encode("utf-8")
+            bench(
+                f"{name}: loads {document_name}",
+                lambda: backend.loads(data),
+                REPEATS,
+                len(data),
+            )
+            bench(
+                f"{name}: dumps {document_name}",
+                lambda: backend.dumps(document),
+                REPEATS,
+                len(data),
+            )
+
+
+if __name__ == "__main__":
+    main()
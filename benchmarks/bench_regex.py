@@ -0,0 +1,53 @@
+"""
+Compares single-threaded and threaded regex filtering for increasing thread counts.
+Run from the repository root with: ``python -m benchmarks.bench_regex``.
+
+Threads only scale when matching dominates the per-entry overhead,
+so the entries are long and the pattern backtracks.
+"""
+
+import os
+import random
+import string
+
+from benchmarks.common import bench
+from wmutils.regex import get_matching
+
+ENTRY_COUNT = 5_000
+ENTRY_LENGTH = 1_000
+PATTERN = r".*(\w+)\s+\1.*z$"
+REPEATS = 3
+
+
+def main():
+    random.seed(42)
+    alphabet = string.ascii_lowercase + " "
+    entries = [
+        "".join(random.choices(alphabet, k=ENTRY_LENGTH)) for _ in range(ENTRY_COUNT)
+    ]
+
+    cpu_count = os.cpu_count() or 1
+    print(f"{ENTRY_COUNT} entries of {ENTRY_LENGTH} characters on {cpu_count} CPUs.")
+    baseline = bench(
+        "single-threaded",
+        lambda: sum(1 for _ in get_matching(entries, PATTERN)),
+        REPEATS,
+    )
+    thread_count = 2
+    while thread_count <= max(2 * cpu_count, 4):
+        bench(
+            f"{thread_count} threads",
+            lambda: sum(
+                1
+                for _ in get_matching(
+                    entries, PATTERN, thread_count=thread_count, batch_size=256
+                )
+            ),
+            REPEATS,
+            baseline=baseline,
+        )
+        thread_count *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compares the performance of ``SafeDict`` with ``collections.defaultdict``.
+Run from the repository root with: ``python -m benchmarks.bench_safe_dict``.
+"""
+
+from collections import defaultdict
+import random
+
+from benchmarks.common import bench
+from wmutils.collections.safe_dict import SafeDict
+
+
+KEY_COUNT = 100_000
+OPERATION_COUNT = 1_000_000
+REPEATS = 5
+
+
+def count(collection, keys):
+    for key in keys:
+        collection[key] += 1
+
+
+def append(collection, keys):
+    for key in keys:
+        collection[key].append(key)
+
+
+def main():
+    random.seed(42)
+    keys = [random.randrange(KEY_COUNT) for _ in range(OPERATION_COUNT)]
+
+    print(f"{OPERATION_COUNT} operations on {KEY_COUNT} keys (best of {REPEATS}).")
+    cases = [
+        ("counter: defaultdict(int)", lambda: defaultdict(int), count),
+        ("counter: SafeDict(0)", lambda: SafeDict(0), count),
+        (
+            "counter: SafeDict(0, delete_when_default)",
+            lambda: SafeDict(0, delete_when_default=True),
+            count,
+        ),
+        ("counter: SafeDict(int)", lambda: SafeDict(int), count),
+        ("lists: defaultdict(list)", lambda: defaultdict(list), append),
+        ("lists: SafeDict(list)", lambda: SafeDict(list), append),
+    ]
+    for name, factory, operation in cases:
+        bench(name, lambda: operation(factory(), keys), REPEATS, width=44)
+
+
+if __name__ == "__main__":
+    main()
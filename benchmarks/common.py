@@ -0,0 +1,28 @@
+"""
+Contains the timing helper shared by the benchmarks.
+"""
+
+import timeit
+from typing import Callable
+
+
+def bench(
+    name: str,
+    operation: Callable[[], object],
+    repeats: int,
+    size: "int | None" = None,
+    baseline: "float | None" = None,
+    width: int = 32,
+) -> float:
+    """
+    Prints and returns the best time in seconds of ``repeats`` calls of the operation.
+    :param size: The number of processed bytes, to also print the throughput.
+    :param baseline: The best time of a baseline, to also print the speedup.
+    :param width: The width of the name column.
+    """
+    timer = timeit.Timer(operation)
+    best = min(timer.repeat(repeat=repeats, number=1))
+    throughput = "" if size is None else f"{size / best / 1e6:>10.1f} MB/s"
+    speedup = "" if baseline is None else f"{baseline / best:>8.2f}x"
+    print(f"{name:<{width}}{best * 1000:>10.1f} ms{throughput}{speedup}")
+    return best
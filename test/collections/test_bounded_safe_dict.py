@@ -0,0 +1,130 @@
+import unittest
+
+from wmutils.collections.bounded_safe_dict import BoundedSafeDict, TTLSafeDict
+from wmutils.collections.safe_dict import SafeDict
+
+
+class FakeTimer:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestBoundedSafeDict(unittest.TestCase):
+    def test_lru_eviction(self):
+        evicted = []
+        sd = BoundedSafeDict(
+            0, max_size=3, on_evict=lambda key, value: evicted.append((key, value))
+        )
+        self.assertIsInstance(sd, SafeDict)
+
+        sd["key_1"] = 1
+        sd["key_2"] = 2
+        sd["key_3"] = 3
+
+        # Using key_1 makes key_2 the least recently used.
+        self.assertEqual(sd["key_1"], 1)
+        sd["key_4"] = 4
+        self.assertNotIn("key_2", sd)
+        self.assertEqual(evicted, [("key_2", 2)])
+
+        # Defaults count as new entries.
+        self.assertEqual(sd["key_5"], 0)
+        self.assertEqual(len(sd), 3)
+        self.assertEqual(set(sd.keys()), {"key_1", "key_4", "key_5"})
+
+        self.assertEqual(sd.hits, 1)
+        self.assertEqual(sd.misses, 1)
+        self.assertEqual(sd.evictions, 2)
+
+    def test_lfu_eviction(self):
+        sd = BoundedSafeDict(list, max_size=2, eviction_policy="lfu")
+
+        sd["key_1"].append(1)
+        sd["key_1"].append(2)
+        sd["key_2"].append(3)
+
+        # key_2 is used least.
+        sd["key_3"].append(4)
+        self.assertEqual(sd, {"key_1": [1, 2], "key_3": [4]})
+
+        # Removal keeps bookkeeping consistent.
+        del sd["key_1"]
+        sd["key_4"]
+        sd["key_5"]
+        self.assertEqual(len(sd), 2)
+        self.assertEqual(sd.evictions, 2)
+
+    def test_bounded_initial_mapping(self):
+        sd = BoundedSafeDict(
+            0, max_size=2, initial_mapping={"key_1": 1, "key_2": 2, "key_3": 3}
+        )
+        self.assertEqual(sd, {"key_2": 2, "key_3": 3})
+
+        self.assertRaises(ValueError, BoundedSafeDict, 0, max_size=0)
+        self.assertRaises(ValueError, BoundedSafeDict, 0, 1, "fifo")
+
+    def test_bounded_delete_when_default(self):
+        sd = BoundedSafeDict(0, max_size=2, delete_when_default=True)
+        sd["key_1"] += 1
+        sd["key_1"] -= 1
+        self.assertNotIn("key_1", sd)
+
+
+class TestTTLSafeDict(unittest.TestCase):
+    def test_expiry(self):
+        timer = FakeTimer()
+        evicted = []
+        sd = TTLSafeDict(
+            0,
+            ttl=10,
+            timer=timer,
+            on_evict=lambda key, value: evicted.append(key),
+        )
+
+        sd["key_1"] = 1
+        timer.now = 5
+        sd["key_2"] = 2
+        self.assertEqual(sd["key_1"], 1)
+
+        # key_1 expires, key_2 doesn't.
+        timer.now = 12
+        self.assertNotIn("key_1", sd)
+        self.assertIn("key_2", sd)
+        self.assertEqual(sd["key_1"], 0)
+        self.assertEqual(evicted, ["key_1"])
+
+        # Updating resets the time to live.
+        timer.now = 14
+        sd["key_2"] = 3
+        timer.now = 23
+        self.assertEqual(sd.expire(), 1)
+        self.assertEqual(dict(sd.items()), {"key_2": 3})
+
+        self.assertEqual(sd.hits, 1)
+        self.assertEqual(sd.misses, 1)
+        self.assertEqual(sd.evictions, 2)
+
+        self.assertRaises(ValueError, TTLSafeDict, 0, ttl=0)
+
+    def test_views_skip_expired_entries(self):
+        timer = FakeTimer()
+        sd = TTLSafeDict(0, ttl=10, timer=timer)
+        sd["a"] = 1
+        timer.now = 5
+        sd["b"] = 2
+        timer.now = 12
+
+        self.assertEqual(dict(sd), {"b": 2})
+        sd["a"] = 1
+        timer.now = 16
+        self.assertEqual(list(sd.keys()), ["a"])
+        self.assertEqual(list(sd.values()), [1])
+        self.assertEqual(list(sd.items()), [("a", 1)])
+        self.assertEqual(sd.copy(), {"a": 1})
+        timer.now = 30
+        self.assertEqual(sd.pop("a", "dflt"), "dflt")
+        self.assertRaises(KeyError, sd.popitem)
+        self.assertEqual(sd.evictions, 3)
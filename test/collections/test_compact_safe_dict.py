@@ -0,0 +1,111 @@
+import unittest
+
+import numpy
+
+from wmutils.collections.compact_safe_dict import CompactSafeDict
+
+
+class TestCompactSafeDict(unittest.TestCase):
+    def test_mapping_interface(self):
+        sd = CompactSafeDict(0, flush_threshold=4)
+
+        for key in range(10):
+            sd[key * 3] += key
+        self.assertEqual(len(sd), 10)
+        self.assertEqual(sd[9], 3)
+        self.assertEqual(sd[10], 0)
+        self.assertEqual(len(sd), 11)
+        self.assertIn(10, sd)
+        self.assertNotIn(11, sd)
+        self.assertIsNone(sd.get(11))
+
+        del sd[10]
+        del sd[27]
+        self.assertNotIn(27, sd)
+        self.assertRaises(KeyError, sd.__delitem__, 27)
+
+        expected = {key * 3: key for key in range(9)}
+        self.assertEqual(dict(sd.items()), expected)
+        self.assertEqual(sd.to_dict(), expected)
+
+        # Deleted entries can be set again.
+        sd[27] = 5
+        self.assertEqual(sd[27], 5)
+
+    def test_default_validation(self):
+        self.assertRaises(ValueError, CompactSafeDict, "a")
+        self.assertRaises(ValueError, CompactSafeDict, list)
+        self.assertRaises(ValueError, CompactSafeDict, True)
+
+        sd = CompactSafeDict(1.5, initial_mapping={3: 1.0, 1: 2.0})
+        self.assertEqual(sd.to_dict(), {1: 2.0, 3: 1.0})
+        self.assertEqual(sd[2], 1.5)
+
+    def test_delete_when_default(self):
+        sd = CompactSafeDict(0, delete_when_default=True, flush_threshold=2)
+
+        sd[1] += 1
+        sd[2] += 1
+        sd[3] += 1
+        sd[1] -= 1
+        self.assertNotIn(1, sd)
+
+        # Reading doesn't store defaults.
+        self.assertEqual(sd[4], 0)
+        self.assertNotIn(4, sd)
+        self.assertEqual(len(sd), 2)
+
+        sd.add_many([2, 3], [-1, 4])
+        self.assertEqual(sd.to_dict(), {3: 5})
+
+    def test_add_many(self):
+        sd = CompactSafeDict(0, initial_mapping={1: 10, 5: 50})
+        sd[3] = 30
+
+        sd.add_many(numpy.array([5, 1, 7, 7, 3]), numpy.array([1, 2, 3, 4, 5]))
+        self.assertEqual(sd.to_dict(), {1: 12, 3: 35, 5: 51, 7: 7})
+
+        sd.add_many([9, 1], 1)
+        keys, values = sd.to_numpy()
+        self.assertEqual(keys.tolist(), [1, 3, 5, 7, 9])
+        self.assertEqual(values.tolist(), [13, 35, 51, 7, 1])
+        self.assertEqual(sd.nbytes, 5 * 17)
+
+    def test_casts_keys_and_values(self):
+        sd = CompactSafeDict(0, flush_threshold=2)
+        for key, value in (("abc", 1), (1.5, 1), (1, 2.7), (2**70, 1), (1, "2")):
+            with self.assertRaises(ValueError):
+                sd[key] = value
+        self.assertEqual(len(sd), 0)
+
+        sd[2.0] = 3
+        sd[numpy.int32(4)] = numpy.int64(5)
+        sd[4] = 6.0
+        self.assertEqual(sd.to_dict(), {2: 3, 4: 6})
+        self.assertTrue(all(type(key) is int for key in sd))
+
+        # Bulk inputs are checked like single ones.
+        for keys, values in (
+            ([1, 2], [1, 1.7]),
+            ([1.5], [1]),
+            (["a"], [1]),
+            ([1], "2"),
+            ([2**70], [1]),
+            ([1], [numpy.inf]),
+        ):
+            with self.assertRaises(ValueError):
+                CompactSafeDict(0, initial_mapping=dict(zip(keys, values)))
+            with self.assertRaises(ValueError):
+                sd.add_many(keys, values)
+        self.assertEqual(sd.to_dict(), {2: 3, 4: 6})
+        with self.assertRaises(ValueError):
+            CompactSafeDict(0, key_dtype=numpy.int8).add_many(numpy.array([300]), 1)
+        sd.add_many(numpy.array([2.0, 8.0]), numpy.array([1.0, 2.0]))
+        self.assertEqual(sd.to_dict(), {2: 4, 4: 6, 8: 2})
+        sd = CompactSafeDict(0, initial_mapping={3.0: 1.0, 1: numpy.int8(2)})
+        self.assertEqual(sd.to_dict(), {1: 2, 3: 1})
+
+        sd = CompactSafeDict(0.0, value_dtype=numpy.float32)
+        sd[1] = 2
+        sd[2] = 0.1
+        self.assertEqual(sd.to_dict(), {1: 2.0, 2: numpy.float32(0.1).item()})
@@ -0,0 +1,79 @@
+import unittest
+
+from wmutils.collections.concurrent_safe_dict import ConcurrentSafeDict
+from wmutils.collections.safe_dict import SafeDict
+from wmutils.multithreading import ExecutorService
+
+THREAD_COUNT = 8
+WORK_LOAD = 2000
+KEY_COUNT = 10
+
+
+def count_keys(counter: ConcurrentSafeDict, task_id: int, worker_id: int):
+    counter.increment(task_id % KEY_COUNT)
+    counter.update_with("all", lambda value: value + 1)
+
+
+class TestConcurrentSafeDict(unittest.TestCase):
+    def test_mapping_interface(self):
+        sd = ConcurrentSafeDict(0, shard_count=4, initial_mapping={"key_1": 5})
+
+        self.assertEqual(sd["key_1"], 5)
+        self.assertEqual(sd["key_2"], 0)
+        self.assertIn("key_2", sd)
+        self.assertIsNone(sd.get("key_3"))
+        self.assertNotIn("key_3", sd)
+
+        sd["key_3"] = 3
+        del sd["key_2"]
+        self.assertEqual(len(sd), 2)
+        self.assertEqual(set(sd), {"key_1", "key_3"})
+
+        self.assertEqual(sd.increment("key_1", 2), 7)
+        self.assertEqual(sd.update_with("key_4", lambda value: value - 1), -1)
+
+        snapshot = sd.snapshot()
+        self.assertIsInstance(snapshot, SafeDict)
+        self.assertEqual(snapshot, {"key_1": 7, "key_3": 3, "key_4": -1})
+        self.assertEqual(snapshot["key_5"], 0)
+
+        self.assertRaises(ValueError, ConcurrentSafeDict, 0, shard_count=0)
+
+    def test_pop_setdefault_popitem(self):
+        sd = ConcurrentSafeDict(0, shard_count=4, initial_mapping={"a": 1, "b": 2})
+
+        self.assertEqual(sd.setdefault("a", 5), 1)
+        self.assertEqual(sd.setdefault("c", 5), 5)
+        self.assertEqual(sd["c"], 5)
+
+        self.assertEqual(sd.pop("a"), 1)
+        self.assertNotIn("a", sd)
+        self.assertEqual(sd.pop("zz", "dflt"), "dflt")
+        self.assertNotIn("zz", sd)
+        with self.assertRaises(KeyError):
+            sd.pop("zz")
+        self.assertNotIn("zz", sd)
+
+        items = {sd.popitem(), sd.popitem()}
+        self.assertEqual(items, {("b", 2), ("c", 5)})
+        self.assertEqual(len(sd), 0)
+        with self.assertRaises(KeyError):
+            sd.popitem()
+
+        sd = ConcurrentSafeDict(0, delete_when_default=True)
+        self.assertEqual(sd.setdefault("a", 0), 0)
+        self.assertNotIn("a", sd)
+
+    def test_concurrent_updates(self):
+        counter = ConcurrentSafeDict(0, shard_count=4)
+
+        executor = ExecutorService(THREAD_COUNT, use_threads=True)
+        executor.start()
+        for task_id in range(WORK_LOAD):
+            executor.submit(count_keys, counter=counter, task_id=task_id)
+        executor.stop()
+
+        snapshot = counter.snapshot()
+        self.assertEqual(snapshot["all"], WORK_LOAD)
+        for key in range(KEY_COUNT):
+            self.assertEqual(snapshot[key], WORK_LOAD // KEY_COUNT)
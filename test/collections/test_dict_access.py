@@ -140,3 +140,64 @@ class TestDictAccess(unittest.TestCase):
         # print(res)
         # self.assertTrue(all([ele in res for ele in range(10)]))
         pass
+
+    def test_group_by(self):
+        elements = [("a", 1), ("b", 2), ("a", 3), ("c", 4), ("a", 1)]
+
+        # List groups preserve order.
+        res = d.group_by(elements, key=lambda e: e[0], value=lambda e: e[1])
+        self.assertEqual(res, {"a": [1, 3, 1], "b": [2], "c": [4]})
+
+        # Set groups.
+        res = d.group_by(elements, lambda e: e[0], lambda e: e[1], container=set)
+        self.assertEqual(res, {"a": {1, 3}, "b": {2}, "c": {4}})
+
+        # Counts.
+        res = d.group_by(elements, lambda e: e[0], container="count")
+        self.assertEqual(res, {"a": 3, "b": 1, "c": 1})
+
+        # Default value is the element.
+        res = d.group_by(range(6), key=lambda e: e % 2)
+        self.assertEqual(res, {0: [0, 2, 4], 1: [1, 3, 5]})
+
+        self.assertRaises(ValueError, d.group_by, elements, len, container=dict)
+
+    def test_group_by_incremental(self):
+        res = d.group_by(range(4), key=lambda e: e % 2)
+        res[2].append(10)
+        d.group_by(range(4, 6), key=lambda e: e % 2, into=res)
+        self.assertEqual(res, {0: [0, 2, 4], 1: [1, 3, 5], 2: [10]})
+
+        res = d.group_by("abca", key=lambda e: e, container="count")
+        d.group_by("ad", key=lambda e: e, container="count", into=res)
+        self.assertEqual(res, {"a": 3, "b": 1, "c": 1, "d": 1})
+
+    def test_group_by_numpy(self):
+        elements = [5, 3, 8, 13, 2, 5]
+        for container in [list, set, "count"]:
+            expected = d.group_by(elements, key=lambda e: e % 3, container=container)
+            res = d.group_by(
+                elements, key=lambda e: e % 3, container=container, use_numpy=True
+            )
+            self.assertEqual(res, expected)
+
+        for keys in ([1, 2.5], ["1", "2"], [True, False], [1, 2**70]):
+            for container in [list, "count"]:
+                with self.assertRaises(ValueError):
+                    d.group_by(
+                        range(len(keys)),
+                        key=keys.__getitem__,
+                        container=container,
+                        use_numpy=True,
+                    )
+        self.assertEqual(d.group_by([], key=len, use_numpy=True), {})
+
+    def test_invert_multi(self):
+        my_dict = {"key_a": 1, "key_b": 2, "key_c": 1}
+
+        res = d.invert_multi(my_dict)
+        self.assertEqual(res, {1: ["key_a", "key_c"], 2: ["key_b"]})
+        self.assertEqual(d.invert_dict(my_dict)[1], "key_c", "Data loss is expected.")
+
+        res = d.invert_multi(my_dict, container=set)
+        self.assertEqual(res, {1: {"key_a", "key_c"}, 2: {"key_b"}})
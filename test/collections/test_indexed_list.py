@@ -0,0 +1,78 @@
+import copy
+import pickle
+import unittest
+
+from wmutils.collections.indexed_list import IndexedList
+
+
+class TestIndexedList(unittest.TestCase):
+    def assert_consistent(self, my_list: IndexedList):
+        plain = list(my_list)
+        for value in set(plain) | {"missing"}:
+            expected = [pos for pos, element in enumerate(plain) if element == value]
+            self.assertEqual(my_list.positions_of(value), expected)
+            self.assertEqual(my_list.safe_index(value), expected[0] if expected else -1)
+            self.assertEqual(my_list.contains(value), len(expected) > 0)
+            self.assertEqual(value in my_list, len(expected) > 0)
+            self.assertEqual(my_list.count(value), len(expected))
+
+    def test_lookups(self):
+        my_list = IndexedList(["a", "b", "a", "c"])
+        self.assertIsInstance(my_list, list)
+        self.assert_consistent(my_list)
+        self.assertEqual(my_list.index("a", 1), 2)
+        self.assertEqual(my_list.index("a", -2), 2)
+        self.assertRaises(ValueError, my_list.index, "a", 3)
+        self.assertRaises(ValueError, my_list.index, "d")
+
+    def test_mutations(self):
+        my_list = IndexedList(["a", "b"])
+
+        mutations = [
+            lambda: my_list.append("c"),
+            lambda: my_list.extend(["a", "d"]),
+            lambda: my_list.__iadd__(["b"]),
+            lambda: my_list.insert(0, "d"),
+            lambda: my_list.remove("a"),
+            lambda: my_list.__setitem__(1, "z"),
+            lambda: my_list.__setitem__(-1, "a"),
+            lambda: my_list.__setitem__(slice(0, 2), ["x", "y", "a"]),
+            lambda: my_list.__delitem__(0),
+            lambda: my_list.pop(),
+            lambda: my_list.pop(0),
+            lambda: my_list.sort(),
+            lambda: my_list.reverse(),
+            lambda: my_list.__imul__(2),
+            lambda: my_list.append("q"),
+            lambda: my_list.clear(),
+            lambda: my_list.append("a"),
+        ]
+        for mutation in mutations:
+            mutation()
+            self.assert_consistent(my_list)
+
+    def test_unhashable(self):
+        my_list = IndexedList([[1], "a", [2]])
+        self.assertEqual(my_list.safe_index([2]), 2)
+        self.assertEqual(my_list.safe_index([3]), -1)
+        self.assertEqual(my_list.positions_of([1]), [0])
+        self.assertEqual(my_list.safe_index("a"), 1)
+        my_list[0] = "b"
+        my_list.append([4])
+        self.assertEqual(my_list.safe_index("b"), 0)
+        self.assertEqual(my_list.index([4]), 3)
+
+    def test_pickle_and_copy(self):
+        my_list = IndexedList(["a", "b", "a", [1]])
+        my_list.safe_index("a")
+        for restored in (
+            pickle.loads(pickle.dumps(my_list)),
+            copy.copy(my_list),
+            copy.deepcopy(my_list),
+        ):
+            self.assertIsInstance(restored, IndexedList)
+            self.assertEqual(restored, my_list)
+            self.assertEqual(restored.positions_of("a"), [0, 2])
+            restored.append("b")
+            self.assertEqual(restored.positions_of("b"), [1, 4])
+        self.assertEqual(my_list.positions_of("b"), [1])
@@ -0,0 +1,97 @@
+import unittest
+
+from wmutils.collections.keyed_vector import KeyIndex, KeyedVector, reduce_vectors
+from wmutils.collections.safe_dict import SafeDict
+from wmutils.collections import dict_access as d
+
+
+class TestKeyedVector(unittest.TestCase):
+    def test_dict_conversion(self):
+        my_dict = {"key_a": 1, "key_b": 2, "key_c": 3}
+        vector = KeyedVector.from_dict(my_dict)
+
+        self.assertEqual(len(vector), 3)
+        self.assertEqual(vector["key_b"], 2)
+        self.assertIn("key_c", vector)
+        self.assertEqual(vector.to_dict(), my_dict)
+
+        # Check SafeDict conversion.
+        sd = vector.to_safe_dict(0)
+        self.assertIsInstance(sd, SafeDict)
+        self.assertEqual(sd["key_a"], 1)
+        self.assertEqual(sd["key_d"], 0)
+        self.assertEqual(KeyedVector.from_dict(sd).to_dict(), sd)
+
+    def test_add_and_subtract_match_dict_access(self):
+        dict_a = {"key_a": 1, "key_b": 2, "key_c": 3}
+        dict_b = {"key_c": 30, "key_a": 10, "key_b": 20}
+        vector_a = KeyedVector.from_dict(dict_a)
+
+        # Different key orders are aligned.
+        vector_b = KeyedVector.from_dict(dict_b)
+        self.assertEqual((vector_a + vector_b).to_dict(), d.add_dict(dict_a, dict_b))
+        self.assertEqual(
+            (vector_a - vector_b).to_dict(), d.subtract_dict(dict_a, dict_b)
+        )
+
+        # Shared index.
+        vector_b = KeyedVector.from_dict(dict_b, index=vector_a.index)
+        self.assertIs(vector_b.index, vector_a.index)
+        self.assertEqual((vector_a + vector_b).to_dict(), d.add_dict(dict_a, dict_b))
+
+    def test_key_mismatch(self):
+        dict_a = {"key_a": 1, "key_b": 2}
+        dict_b = {"key_a": 1, "key_c": 2}
+        vector_a = KeyedVector.from_dict(dict_a)
+        vector_b = KeyedVector.from_dict(dict_b)
+
+        self.assertRaises(ValueError, d.add_dict, dict_a, dict_b)
+        self.assertRaises(ValueError, vector_a.__add__, vector_b)
+        self.assertRaises(ValueError, vector_a.__sub__, vector_b)
+        self.assertRaises(
+            ValueError, KeyedVector.from_dict, dict_b, index=vector_a.index
+        )
+        self.assertRaises(ValueError, KeyIndex, ["key_a", "key_a"])
+
+    def test_scale_and_in_place(self):
+        vector = KeyedVector.from_dict({"key_a": 1.0, "key_b": 2.0})
+
+        self.assertEqual((vector * 2).to_dict(), {"key_a": 2.0, "key_b": 4.0})
+        self.assertEqual((0.5 * vector).to_dict(), {"key_a": 0.5, "key_b": 1.0})
+        self.assertEqual((-vector)["key_b"], -2.0)
+
+        other = vector.copy()
+        other += vector
+        other["key_a"] = 10.0
+        self.assertEqual(other.to_dict(), {"key_a": 10.0, "key_b": 4.0})
+        self.assertEqual(vector.to_dict(), {"key_a": 1.0, "key_b": 2.0})
+
+    def test_reduce_vectors(self):
+        index = KeyIndex(range(100))
+        vectors = [
+            KeyedVector.from_dict({key: key * factor for key in range(100)}, index)
+            for factor in range(10)
+        ]
+        result = reduce_vectors(vectors)
+        self.assertEqual(result.to_dict(), {key: key * 45 for key in range(100)})
+
+        # Source vectors are untouched.
+        self.assertEqual(vectors[0][99], 0)
+
+        self.assertRaises(ValueError, reduce_vectors, [])
+
+    def test_mixed_dtypes(self):
+        index = KeyIndex(["key_a", "key_b"])
+        ints = KeyedVector.from_dict({"key_a": 1, "key_b": 2}, index)
+        floats = KeyedVector.from_dict({"key_a": 0.5, "key_b": 0.25}, index)
+
+        result = reduce_vectors([ints, floats, ints])
+        self.assertEqual(result.to_dict(), {"key_a": 2.5, "key_b": 4.25})
+        self.assertEqual(ints.values.dtype.kind, "i")
+
+        vector = ints.copy()
+        vector += floats
+        self.assertEqual(vector.to_dict(), {"key_a": 1.5, "key_b": 2.25})
+        vector -= ints
+        self.assertEqual(vector.to_dict(), {"key_a": 0.5, "key_b": 0.25})
+        self.assertEqual(ints.to_dict(), {"key_a": 1, "key_b": 2})
@@ -0,0 +1,135 @@
+import itertools
+import sys
+import time
+import unittest
+
+import numpy
+
+from wmutils.collections import list_access as l
+from wmutils.collections.indexed_list import IndexedList
+
+
+def to_lists(element):
+    """Converts the numpy arrays in nested lists to lists."""
+    if isinstance(element, numpy.ndarray):
+        return element.tolist()
+    if isinstance(element, list):
+        return [to_lists(value) for value in element]
+    return element
+
+
+class TestListAccess(unittest.TestCase):
+    def test_flatten(self):
+        nested = [1, [2, (3, 4)], "five", iter([6, [7]]), {"key": 8}]
+        self.assertEqual(
+            list(l.flatten(nested)), [1, 2, 3, 4, "five", 6, 7, {"key": 8}]
+        )
+        self.assertEqual(list(l.flatten([])), [])
+        self.assertEqual(list(l.flatten([[], [[]], 1])), [1])
+
+    def test_flatten_max_depth(self):
+        nested = [1, [2, [3, [4]]]]
+        self.assertEqual(list(l.flatten(nested, max_depth=0)), nested)
+        self.assertEqual(list(l.flatten(nested, max_depth=1)), [1, 2, [3, [4]]])
+        self.assertEqual(list(l.flatten(nested, max_depth=2)), [1, 2, 3, [4]])
+        self.assertEqual(list(l.flatten(nested, max_depth=5)), [1, 2, 3, 4])
+
+    def test_flatten_deep(self):
+        nested = [0]
+        for value in range(1, sys.getrecursionlimit() * 2):
+            nested = [nested, value]
+        res = list(l.flatten(nested))
+        self.assertEqual(res, list(range(sys.getrecursionlimit() * 2)))
+
+    def test_flatten_numpy(self):
+        nested = [numpy.arange(4).reshape(2, 2), [4, numpy.array([5, 6])]]
+        self.assertEqual(list(l.flatten(nested)), list(range(7)))
+
+        res = l.flatten_to_array(nested)
+        self.assertIsInstance(res, numpy.ndarray)
+        self.assertEqual(res.tolist(), list(range(7)))
+
+        res = l.flatten_to_array([numpy.ones((2, 2)), numpy.zeros(3)], dtype=int)
+        self.assertEqual(res.tolist(), [1, 1, 1, 1, 0, 0, 0])
+        self.assertEqual(
+            l.flatten_to_array(iter([[1.5], 2]), dtype=float).tolist(), [1.5, 2.0]
+        )
+
+    def test_flatten_flat_lists(self):
+        nested = [[1, "two", None], (3.5, {"key": 4}), []]
+        res = l.flatten(nested)
+        self.assertIsInstance(res, itertools.chain)
+        self.assertEqual(list(res), [1, "two", None, 3.5, {"key": 4}])
+        self.assertEqual(list(l.flatten(nested, max_depth=0)), nested)
+
+        # Deeper lists are only chained if they aren't flattened.
+        nested = [[1, [2, 3]], (4,)]
+        self.assertIsInstance(l.flatten(nested, max_depth=1), itertools.chain)
+        self.assertEqual(list(l.flatten(nested, max_depth=1)), [1, [2, 3], 4])
+        self.assertEqual(list(l.flatten(nested)), [1, 2, 3, 4])
+        self.assertEqual(list(l.flatten([[1], 2, (3,)])), [1, 2, 3])
+
+    def test_flatten_numpy_max_depth(self):
+        # Arrays are flattened like the equivalent nested lists.
+        for shape in ((4,), (2, 2), (2, 1, 3), (1, 2, 2, 2)):
+            array = numpy.arange(numpy.prod(shape)).reshape(shape)
+            for nested in ([array], [0, [array, array]], [[[array]]]):
+                for max_depth in (None, 0, 1, 2, 3, 4, 5):
+                    self.assertEqual(
+                        [to_lists(element) for element in l.flatten(nested, max_depth)],
+                        list(l.flatten(to_lists(nested), max_depth)),
+                    )
+
+    def test_safe_index(self):
+        my_list = ["a", "b", "c", "b"]
+        self.assertEqual(l.safe_index(my_list, "b"), 1)
+        self.assertEqual(l.safe_index(my_list, "d"), -1)
+
+        my_list = IndexedList(my_list)
+        self.assertEqual(l.safe_index(my_list, "b"), 1)
+        self.assertEqual(l.safe_index(my_list, "d"), -1)
+
+    def test_resolve_callables_in_list(self):
+        def make_fetch(value):
+            def fetch(offset):
+                return value + offset
+
+            return fetch
+
+        coll = [make_fetch(value) if value % 2 else value for value in range(20)]
+        expected = [value + 5 if value % 2 else value for value in range(20)]
+        for thread_count in [1, 4]:
+            res = list(l.resolve_callables_in_list(coll, 5, thread_count=thread_count))
+            self.assertEqual(res, expected)
+
+        self.assertRaises(
+            ValueError, list, l.resolve_callables_in_list(coll, thread_count=0)
+        )
+
+    def test_resolve_callables_in_list_concurrently(self):
+        def slow_fetch(value=1):
+            time.sleep(0.05)
+            return value
+
+        start = time.monotonic()
+        res = list(l.resolve_callables_in_list([slow_fetch] * 8, thread_count=8))
+        self.assertEqual(res, [1] * 8)
+        self.assertLess(time.monotonic() - start, 0.3)
+
+    def test_resolve_callables_in_list_memoized(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return "value"
+
+        for thread_count in [1, 4]:
+            calls.clear()
+            coll = [fetch, "a", fetch, fetch]
+            res = list(
+                l.resolve_callables_in_list(
+                    coll, thread_count=thread_count, memoize=True
+                )
+            )
+            self.assertEqual(res, ["value", "a", "value", "value"])
+            self.assertEqual(len(calls), 1)
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+from wmutils.collections.persistent_safe_dict import PersistentSafeDict
+
+
+class TestPersistentSafeDict(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.__tmp_dir.name, "safe_dict.sqlite")
+
+    def tearDown(self) -> None:
+        self.__tmp_dir.cleanup()
+
+    def test_default_and_reopen(self):
+        with PersistentSafeDict(self.file_path, 0, cache_size=2, batch_size=3) as sd:
+            for key in range(10):
+                sd[key % 5] += key
+            self.assertEqual(sd[7], 0)
+            self.assertIn(7, sd)
+            self.assertIsNone(sd.get(8))
+            self.assertEqual(len(sd), 6)
+
+        with PersistentSafeDict(self.file_path, 0) as sd:
+            self.assertEqual(dict(sd.items()), {0: 5, 1: 7, 2: 9, 3: 11, 4: 13, 7: 0})
+            del sd[7]
+            self.assertRaises(KeyError, sd.__delitem__, 7)
+
+        with PersistentSafeDict(self.file_path, 0) as sd:
+            self.assertNotIn(7, sd)
+            self.assertEqual(len(sd), 5)
+
+    def test_mutable_default(self):
+        with PersistentSafeDict(self.file_path, list, cache_size=1) as sd:
+            sd["key_1"].append(1)
+            sd["key_2"].append(2)
+            sd["key_1"].append(3)
+
+        with PersistentSafeDict(self.file_path, list) as sd:
+            self.assertEqual(sd["key_1"], [1, 3])
+            self.assertEqual(sd["key_2"], [2])
+
+        self.assertRaises(ValueError, PersistentSafeDict, self.file_path, len)
+
+    def test_in_place_changes_survive_eviction_flushes(self):
+        expected = {}
+        with PersistentSafeDict(self.file_path, list, cache_size=2, batch_size=2) as sd:
+            for index in range(100):
+                sd[index % 7].append(index)
+                expected.setdefault(index % 7, []).append(index)
+
+        with PersistentSafeDict(self.file_path, list) as sd:
+            self.assertEqual(dict(sd.items()), expected)
+
+    def test_delete_when_default(self):
+        with PersistentSafeDict(self.file_path, 0, delete_when_default=True) as sd:
+            sd["key_1"] += 1
+            sd.flush()
+            sd["key_1"] -= 1
+            self.assertNotIn("key_1", sd)
+
+        with PersistentSafeDict(self.file_path, 0) as sd:
+            self.assertEqual(len(sd), 0)
+
+    def test_iteration_is_read_only(self):
+        with PersistentSafeDict(self.file_path, list, batch_size=2) as sd:
+            for key in range(5):
+                sd[key].append(key)
+
+        with PersistentSafeDict(self.file_path, list) as sd:
+            sd[0].append("cached")
+            self.assertEqual(
+                dict(sd.items()), {0: [0, "cached"], 1: [1], 2: [2], 3: [3], 4: [4]}
+            )
+            self.assertEqual(
+                sorted(len(value) for value in sd.values()), [1, 1, 1, 1, 2]
+            )
+            self.assertIn((1, [1]), sd.items())
+            self.assertNotIn((9, []), sd.items())
+            self.assertIn([2], sd.values())
+            self.assertNotIn(9, sd)
+            # Reading the entries doesn't mark them for write-back.
+            self.assertEqual(sd._PersistentSafeDict__dirty, set())
+
+            keys = iter(sd)
+            self.assertEqual(next(keys), 0)
+            keys.close()
+            self.assertEqual(sorted(sd), [0, 1, 2, 3, 4])
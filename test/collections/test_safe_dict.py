@@ -1,8 +1,17 @@
+import pickle
 import unittest
 
+from wmutils.collections.bounded_safe_dict import BoundedSafeDict
 from wmutils.collections.safe_dict import SafeDict
 
 
+class _CountingSafeDict(SafeDict):
+    """Subclass without its own ``__setitem__``."""
+
+    def total(self):
+        return sum(self.values())
+
+
 class TestSafeDict(unittest.TestCase):
     def test_default_is_primitive(self):
         my_value = 132
@@ -224,3 +233,118 @@ class TestSafeDict(unittest.TestCase):
         # Check data dependency
         my_value = 654
         self.assertNotEqual(sd["key_1"].get_param_a(), my_value)
+
+    def test_missing_key_access(self):
+        sd = SafeDict(0)
+
+        # Lookups that don't use indexing don't add defaults.
+        self.assertNotIn("key_1", sd)
+        self.assertIsNone(sd.get("key_1"))
+        self.assertEqual(len(sd), 0)
+
+        # Indexing adds the default.
+        sd["key_1"] += 5
+        sd["key_2"]
+        self.assertEqual(sd, {"key_1": 5, "key_2": 0})
+
+    def test_default_is_new_instance(self):
+        sd = SafeDict(list)
+        sd["key_1"].append(1)
+        sd["key_2"].append(2)
+        self.assertEqual(sd, {"key_1": [1], "key_2": [2]})
+
+        sd = SafeDict(dict, default_value_constructor_kwargs={"key_a": 1})
+        sd["key_1"]["key_b"] = 2
+        self.assertEqual(sd["key_2"], {"key_a": 1})
+
+    def test_delete_when_default_semantics(self):
+        sd = SafeDict(0, delete_when_default=True)
+        self.assertIsInstance(sd, SafeDict)
+        self.assertTrue(sd.delete_when_default)
+
+        # Counting back to the default removes the entry.
+        sd["key_1"] += 1
+        self.assertIn("key_1", sd)
+        sd["key_1"] -= 1
+        self.assertNotIn("key_1", sd)
+
+        # Types never delete defaults.
+        sd = SafeDict(int, delete_when_default=True)
+        self.assertFalse(sd.delete_when_default)
+        sd["key_1"] = 0
+        self.assertIn("key_1", sd)
+
+    def test_delete_when_default_in_subclasses(self):
+        sd = _CountingSafeDict(0, delete_when_default=True)
+        self.assertIs(type(sd), _CountingSafeDict)
+        sd["a"] += 1
+        sd["a"] -= 1
+        self.assertEqual(sd, {})
+        sd.merge({"b": 1, "c": 0})
+        self.assertEqual(sd, {"b": 1})
+
+        restored = pickle.loads(pickle.dumps(sd))
+        self.assertIs(type(restored), _CountingSafeDict)
+        restored["b"] = 0
+        self.assertEqual(restored, {})
+
+        sd = _CountingSafeDict(0)
+        sd["a"] = 0
+        self.assertEqual(sd, {"a": 0})
+
+    def test_pickle(self):
+        sd = SafeDict(
+            _make_list, default_value_constructor_args=[3], initial_mapping={"a": [1]}
+        )
+        sd["b"].append(2)
+
+        restored = pickle.loads(pickle.dumps(sd))
+        self.assertIsInstance(restored, SafeDict)
+        self.assertEqual(restored, {"a": [1], "b": [0, 0, 0, 2]})
+        self.assertEqual(restored["c"], [0, 0, 0])
+
+        # Delete when default survives.
+        sd = SafeDict(0, delete_when_default=True, initial_mapping={"a": 1})
+        restored = pickle.loads(pickle.dumps(sd))
+        self.assertTrue(restored.delete_when_default)
+        restored["a"] = 0
+        self.assertNotIn("a", restored)
+
+        # Subclasses keep their state.
+        sd = BoundedSafeDict(0, max_size=2, eviction_policy="lfu")
+        sd["a"] += 1
+        sd["b"] += 1
+        restored = pickle.loads(pickle.dumps(sd))
+        self.assertEqual(restored.max_size, 2)
+        restored["a"] += 1
+        restored["c"] += 1
+        self.assertEqual(dict(restored.items()), {"a": 2, "c": 1})
+
+    def test_merge(self):
+        sd = SafeDict(0, initial_mapping={"a": 1, "b": 2})
+
+        res = sd.merge({"b": 3, "c": 4})
+        self.assertIs(res, sd)
+        self.assertEqual(sd, {"a": 1, "b": 5, "c": 4})
+
+        sd.merge_many([{"a": 1}, {"a": 2, "d": 5}], operator=max)
+        self.assertEqual(sd, {"a": 2, "b": 5, "c": 4, "d": 5})
+
+        # Lists concatenate.
+        sd = SafeDict(list, initial_mapping={"a": [1]})
+        sd.merge({"a": [2], "b": [3]})
+        self.assertEqual(sd, {"a": [1, 2], "b": [3]})
+
+        # Entries that become default are deleted.
+        sd = SafeDict(0, delete_when_default=True, initial_mapping={"a": 1, "b": 1})
+        sd.merge({"a": -1, "c": 0, "d": 2})
+        self.assertEqual(sd, {"b": 1, "d": 2})
+
+        # Subclasses track merged entries.
+        sd = BoundedSafeDict(0, max_size=2)
+        sd.merge({"a": 1, "b": 2, "c": 3})
+        self.assertEqual(dict(sd.items()), {"b": 2, "c": 3})
+
+
+def _make_list(length: int) -> list:
+    return [0] * length
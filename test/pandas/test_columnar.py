@@ -0,0 +1,84 @@
+import unittest
+
+import numpy
+import pandas as pd
+
+from wmutils.pandas.columnar import extract_columns, iterate_column_chunks
+
+RECORDS = [
+    {"id": 1, "user": {"name": "a", "score": 1.5, "admin": True}, "tags": ["x"]},
+    {"id": 2, "user": {"name": "bb", "admin": False}, "tags": []},
+    {"id": 3, "user": None, "tags": ["z", "w"]},
+]
+
+
+class TestColumnar(unittest.TestCase):
+    def test_extract_columns_as_arrays(self):
+        columns = extract_columns(
+            RECORDS,
+            [["id"], ["user", "name"], ["user", "score"], ["tags", 0]],
+            as_dataframe=False,
+        )
+        self.assertEqual(
+            list(columns.keys()), ["id", "user.name", "user.score", "tags.0"]
+        )
+        self.assertEqual(columns["id"].dtype, numpy.int64)
+        self.assertEqual(columns["id"].tolist(), [1, 2, 3])
+        self.assertEqual(columns["user.name"].tolist(), ["a", "bb", None])
+        self.assertEqual(columns["user.score"].dtype, numpy.float64)
+        self.assertEqual(columns["user.score"].mask.tolist(), [False, True, True])
+        self.assertEqual(columns["tags.0"].tolist(), ["x", None, "z"])
+
+    def test_extract_columns_as_dataframe(self):
+        df = extract_columns(
+            RECORDS,
+            {"id": ["id"], "admin": ["user", "admin"], "score": ["user", "score"]},
+        )
+        self.assertIsInstance(df, pd.DataFrame)
+        self.assertEqual(df["id"].tolist(), [1, 2, 3])
+        self.assertEqual(str(df["admin"].dtype), "boolean")
+        self.assertTrue(pd.isna(df["admin"][2]))
+        self.assertEqual(str(df["score"].dtype), "Float64")
+        self.assertEqual(df["score"][0], 1.5)
+
+    def test_dtypes(self):
+        columns = extract_columns(
+            RECORDS,
+            {"id": ["id"], "name": ["user", "name"]},
+            dtypes={"id": numpy.float32, "name": str},
+            as_dataframe=False,
+        )
+        self.assertEqual(columns["id"].dtype, numpy.float32)
+        # Strings aren't truncated to a fixed width.
+        self.assertEqual(columns["name"].tolist(), ["a", "bb", None])
+
+    def test_large_ints_are_objects(self):
+        columns = extract_columns([{"a": 1}, {"a": 2**70}], [["a"]], as_dataframe=False)
+        self.assertEqual(columns["a"].dtype, object)
+        self.assertEqual(columns["a"].tolist(), [1, 2**70])
+
+    def test_strings_are_not_indexed(self):
+        columns = extract_columns(
+            [{"a": "abc"}, {"a": ["d"]}], [["a", 0]], as_dataframe=False
+        )
+        self.assertEqual(columns["a.0"].tolist(), [None, "d"])
+
+    def test_iterate_column_chunks(self):
+        records = [{"a": index} for index in range(10)]
+        chunks = list(iterate_column_chunks(records, [["a"]], 4))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+        self.assertEqual(
+            [value for chunk in chunks for value in chunk["a"].tolist()],
+            list(range(10)),
+        )
+        self.assertEqual(
+            list(iterate_column_chunks(records[:4], [["a"]], 4))[0]["a"].tolist(),
+            [0, 1, 2, 3],
+        )
+        self.assertEqual(list(iterate_column_chunks([], [["a"]], 4)), [])
+        with self.assertRaises(ValueError):
+            list(iterate_column_chunks(records, [["a"]], 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,404 @@
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from wmutils.file import (
+    OpenMany,
+    PartitionedWriter,
+    detect_compression,
+    iterate_through_files_in_nested_folders,
+    iterate_through_nested_folders,
+    scan_nested_folders,
+    open_compressed,
+    iterate_line_range_results,
+    iterate_lines_in_range,
+    parallelize_line_ranges,
+    split_into_line_ranges,
+)
+
+THREAD_COUNT = 4
+
+
+def count_lines(file_path, start, end):
+    return sum(1 for _ in iterate_lines_in_range(file_path, start, end))
+
+
+def fail(file_path, start, end):
+    raise RuntimeError(f"Failed at {start}.")
+
+
+def read_lines(file_path, start, end, encoding):
+    return list(iterate_lines_in_range(file_path, start, end, encoding))
+
+
+def tag_range(tag, file_path, start, end, suffix):
+    return f"{tag}{start}{suffix}"
+
+
+def record_range(file_path, start, end, processed):
+    processed.append(start)
+    time.sleep(0.005)
+    return start
+
+
+class TestLineRanges(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.folder.name, "lines.txt")
+        self.lines = [f"line {index} " + "x" * (index % 13) for index in range(1000)]
+        with open(self.file_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(self.lines) + "\n")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_ranges_are_aligned_and_cover_file(self):
+        for chunk_size in (1, 7, 100, 4096, 1 << 20):
+            ranges = split_into_line_ranges(self.file_path, chunk_size)
+            self.assertEqual(ranges[0][1], 0)
+            self.assertEqual(ranges[-1][2], os.path.getsize(self.file_path))
+            lines = []
+            for (_, start, end), (_, next_start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(end, next_start)
+            for _, start, end in ranges:
+                lines.extend(
+                    iterate_lines_in_range(self.file_path, start, end, "utf-8")
+                )
+            self.assertEqual(lines, self.lines)
+
+    def test_missing_trailing_newline(self):
+        with open(self.file_path, "w", encoding="utf-8") as file:
+            file.write("a\nbb\nccc")
+        lines = []
+        for _, start, end in split_into_line_ranges(self.file_path, 2):
+            lines.extend(iterate_lines_in_range(self.file_path, start, end))
+        self.assertEqual(lines, [b"a", b"bb", b"ccc"])
+
+    def test_empty_file(self):
+        open(self.file_path, "w").close()
+        self.assertEqual(split_into_line_ranges(self.file_path), [])
+        self.assertEqual(parallelize_line_ranges(self.file_path, count_lines), [])
+
+    def test_parallelize_line_ranges(self):
+        counts = parallelize_line_ranges(self.file_path, count_lines, THREAD_COUNT, 512)
+        self.assertGreater(len(counts), THREAD_COUNT)
+        self.assertEqual(sum(counts), len(self.lines))
+
+    def test_parallelize_line_ranges_keeps_order(self):
+        chunks = parallelize_line_ranges(
+            self.file_path,
+            read_lines,
+            THREAD_COUNT,
+            512,
+            use_threads=True,
+            encoding="utf-8",
+        )
+        self.assertEqual([line for chunk in chunks for line in chunk], self.lines)
+
+    def test_positional_arguments(self):
+        starts = [start for _, start, _ in split_into_line_ranges(self.file_path, 512)]
+        for use_threads in (True, False):
+            tags = parallelize_line_ranges(
+                self.file_path,
+                tag_range,
+                2,
+                512,
+                "x",
+                use_threads=use_threads,
+                suffix="!",
+            )
+            self.assertEqual(tags, [f"x{start}!" for start in starts])
+
+    def test_parallelize_line_ranges_raises(self):
+        with self.assertRaises(RuntimeError):
+            parallelize_line_ranges(self.file_path, fail, THREAD_COUNT, 512)
+
+    def test_closing_early_skips_remaining_ranges(self):
+        range_count = len(split_into_line_ranges(self.file_path, 64))
+        for ordered in (True, False):
+            processed = []
+            results = iterate_line_range_results(
+                self.file_path,
+                record_range,
+                THREAD_COUNT,
+                64,
+                ordered=ordered,
+                use_threads=True,
+                processed=processed,
+            )
+            next(results)
+            results.close()
+            self.assertLess(len(processed), range_count // 2)
+
+        # Process workers don't wait for the remaining ranges either.
+        results = iterate_line_range_results(
+            self.file_path, count_lines, THREAD_COUNT, 64
+        )
+        self.assertGreater(next(results), 0)
+        results.close()
+
+
+class TestCompressedFiles(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.text = "".join(f"line {index}\n" for index in range(20000))
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def write(self, name, module):
+        file_path = os.path.join(self.folder.name, name)
+        with module.open(file_path, "wt", encoding="utf-8") as file:
+            file.write(self.text)
+        return file_path
+
+    def test_detects_and_reads_formats(self):
+        for name, module, compression in (
+            ("a.gz", gzip, "gzip"),
+            ("a.bz2", bz2, "bz2"),
+            ("a.xz", lzma, "xz"),
+        ):
+            file_path = self.write(name, module)
+            self.assertEqual(detect_compression(file_path), compression)
+            for background in (False, True):
+                with open_compressed(
+                    file_path, encoding="utf-8", background=background, buffer_size=4096
+                ) as file:
+                    self.assertEqual(file.read(), self.text)
+
+    def test_detects_magic_bytes(self):
+        file_path = self.write("a.data", gzip)
+        self.assertEqual(detect_compression(file_path), "gzip")
+        with open_compressed(file_path, "rb") as file:
+            self.assertEqual(file.read(), self.text.encode("utf-8"))
+
+    def test_uncompressed_file(self):
+        file_path = os.path.join(self.folder.name, "a.txt")
+        with open_compressed(file_path, "w", encoding="utf-8") as file:
+            file.write(self.text)
+        self.assertIsNone(detect_compression(file_path))
+        with open_compressed(file_path, encoding="utf-8", background=True) as file:
+            self.assertEqual(file.read(), self.text)
+
+    def test_writes_compressed(self):
+        file_path = os.path.join(self.folder.name, "a.xz")
+        with open_compressed(file_path, "w", encoding="utf-8") as file:
+            file.write(self.text)
+        with lzma.open(file_path, "rt", encoding="utf-8") as file:
+            self.assertEqual(file.read(), self.text)
+
+    def test_closing_before_end(self):
+        file_path = self.write("a.gz", gzip)
+        with open_compressed(
+            file_path, encoding="utf-8", background=True, buffer_size=64
+        ) as file:
+            self.assertEqual(file.readline(), "line 0\n")
+
+    def test_open_many(self):
+        file_paths = [self.write("a.gz", gzip), self.write("b.bz2", bz2)]
+        with OpenMany(
+            file_paths, transparent_compression=True, encoding="utf-8"
+        ) as files:
+            self.assertEqual(
+                [list(file) for file in files], [self.text.splitlines(True)] * 2
+            )
+
+
+def baseline_iterate_through_nested_folders(base_folder, max_depth):
+    """The recursive implementation that was replaced by ``scan_nested_folders``."""
+    yield base_folder
+    sub_folders = [
+        f"{base_folder}/{name}"
+        for name in os.listdir(base_folder)
+        if os.path.isdir(f"{base_folder}/{name}")
+    ]
+    if max_depth > 0:
+        for subfolder in sub_folders:
+            yield from baseline_iterate_through_nested_folders(subfolder, max_depth - 1)
+    else:
+        yield from sub_folders
+
+
+def baseline_iterate_through_files_in_nested_folders(base_folder, max_depth):
+    for folder in baseline_iterate_through_nested_folders(base_folder, max_depth):
+        for file in os.listdir(folder):
+            yield f"{folder}/{file}"
+
+
+class TestNestedFolders(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.base = self.folder.name
+        for path in ("a/b/c/d/e", "a/f", "g/h", "i"):
+            os.makedirs(os.path.join(self.base, path))
+        for path in ("x.json", "a/y.txt", "a/b/z.json", "a/b/c/d/w.json", "g/h/v.txt"):
+            open(os.path.join(self.base, path), "w").close()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_matches_baseline(self):
+        # Like ``os.path.isdir``, symbolic links to folders are followed.
+        outside = tempfile.TemporaryDirectory()
+        self.addCleanup(outside.cleanup)
+        linked = outside.name
+        os.makedirs(os.path.join(linked, "j"))
+        open(os.path.join(linked, "j", "u.txt"), "w").close()
+        os.symlink(linked, os.path.join(self.base, "a", "link"))
+        for max_depth in range(5):
+            for thread_count in (1, 4):
+                folders = list(
+                    iterate_through_nested_folders(self.base, max_depth, thread_count)
+                )
+                self.assertEqual(
+                    sorted(folders),
+                    sorted(
+                        baseline_iterate_through_nested_folders(self.base, max_depth)
+                    ),
+                )
+                files = list(
+                    iterate_through_files_in_nested_folders(
+                        self.base, max_depth, thread_count
+                    )
+                )
+                self.assertEqual(
+                    sorted(files),
+                    sorted(
+                        baseline_iterate_through_files_in_nested_folders(
+                            self.base, max_depth
+                        )
+                    ),
+                )
+
+    def test_order(self):
+        # Unlike the pre-order of the recursive implementation, the subfolders
+        # of a folder are yielded together, before any of their own subfolders.
+        folders = list(iterate_through_nested_folders(self.base, 3))
+        self.assertEqual(folders[0], self.base)
+        top_level = {f"{self.base}/{name}" for name in ("a", "g", "i")}
+        self.assertEqual(set(folders[1:4]), top_level)
+
+    def test_select_and_pattern(self):
+        self.assertEqual(
+            sorted(scan_nested_folders(self.base, pattern="*.json")),
+            [
+                f"{self.base}/{path}"
+                for path in ("a/b/c/d/w.json", "a/b/z.json", "x.json")
+            ],
+        )
+        self.assertEqual(
+            sorted(scan_nested_folders(self.base, max_depth=0, select="dirs")),
+            [f"{self.base}/{name}" for name in ("a", "g", "i")],
+        )
+        with self.assertRaises(ValueError):
+            list(scan_nested_folders(self.base, select="links"))
+
+    def test_missing_base_folder(self):
+        missing = os.path.join(self.base, "missing")
+        for thread_count in (1, 4):
+            with self.assertRaises(FileNotFoundError):
+                list(scan_nested_folders(missing, thread_count=thread_count))
+            with self.assertRaises(FileNotFoundError):
+                list(iterate_through_files_in_nested_folders(missing, 0, thread_count))
+            with self.assertRaises(FileNotFoundError):
+                list(iterate_through_nested_folders(missing, 0, thread_count))
+
+
+class TestOpenMany(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_paths = [os.path.join(self.folder.name, name) for name in "ab"]
+        for file_path in self.file_paths:
+            with open(file_path, "w", encoding="utf-8") as file:
+                file.write(file_path)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_open_many(self):
+        with OpenMany(self.file_paths, encoding="utf-8") as files:
+            self.assertEqual([file.read() for file in files], self.file_paths)
+        self.assertTrue(all(file is None for file in OpenMany(self.file_paths).files))
+
+    def test_failing_open_closes_opened_files(self):
+        opened = []
+
+        def tracked_open(*args, **kwargs):
+            file = open(*args, **kwargs)
+            opened.append(file)
+            return file
+
+        file_paths = self.file_paths + [os.path.join(self.folder.name, "missing")]
+        with mock.patch("wmutils.file.open", tracked_open, create=True):
+            open_many = OpenMany(file_paths, encoding="utf-8")
+        with self.assertRaises(FileNotFoundError):
+            with open_many:
+                self.fail("The body must not run.")
+        self.assertEqual(len(opened), 2)
+        self.assertTrue(all(file.closed for file in opened))
+        self.assertEqual(open_many.files, [None] * 3)
+
+
+class TestPartitionedWriter(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def get_path(self, key):
+        return os.path.join(self.folder.name, f"{key}.txt")
+
+    def read(self, key, mode="r"):
+        with open(self.get_path(key), mode) as file:
+            return file.read()
+
+    def test_evicts_and_appends(self):
+        records = [(index % 3, f"{index}\n") for index in range(30)]
+        with PartitionedWriter(self.get_path, max_open_files=1) as writer:
+            writer.write_many(records)
+            writer.write(0, "end\n")
+        for key in range(3):
+            expected = "".join(
+                data for record_key, data in records if record_key == key
+            )
+            self.assertEqual(self.read(key), expected + ("end\n" if key == 0 else ""))
+
+    def test_truncates_on_first_open(self):
+        with open(self.get_path("a"), "w") as file:
+            file.write("old\n")
+        with PartitionedWriter(self.get_path) as writer:
+            writer.write("a", "new\n")
+        self.assertEqual(self.read("a"), "new\n")
+
+    def test_append_mode(self):
+        with open(self.get_path("a"), "w") as file:
+            file.write("old\n")
+        with PartitionedWriter(self.get_path, max_open_files=1, mode="a") as writer:
+            writer.write_many([("a", "1\n"), ("b", "2\n"), ("a", "3\n")])
+        self.assertEqual(self.read("a"), "old\n1\n3\n")
+        self.assertEqual(self.read("b"), "2\n")
+
+    def test_binary_mode(self):
+        with PartitionedWriter(self.get_path, max_open_files=1, mode="wb") as writer:
+            writer.write_many([("a", b"\x00\xff"), ("b", b"b"), ("a", b"\n")])
+        self.assertEqual(self.read("a", "rb"), b"\x00\xff\n")
+        self.assertEqual(self.read("b", "rb"), b"b")
+        with self.assertRaises(TypeError):
+            with PartitionedWriter(self.get_path, mode="wb") as writer:
+                writer.write("c", "text")
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            PartitionedWriter(self.get_path, max_open_files=0)
+        with self.assertRaises(ValueError):
+            PartitionedWriter(self.get_path, mode="r")
+
+
+if __name__ == "__main__":
+    unittest.main()
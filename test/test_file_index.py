@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+import unittest
+
+from wmutils.file_index import FileIndex
+
+
+class TestFileIndex(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.base = os.path.join(self.folder.name, "tree")
+        self.index_path = os.path.join(self.folder.name, "index.json")
+        for path in ("a/b", "c"):
+            os.makedirs(os.path.join(self.base, path))
+        for path in ("x.txt", "a/y.txt", "a/b/z.txt"):
+            self.write(path, "data")
+        self.mtime_ns = 1_000_000_000
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def path(self, path):
+        return f"{self.base}/{path}"
+
+    def write(self, path, content):
+        with open(self.path(path), "w", encoding="utf-8") as file:
+            file.write(content)
+
+    def touch(self, path):
+        """Gives a file or folder a new modification time, as changes in quick
+        succession can have the same one on coarse file systems."""
+        self.mtime_ns += 1_000_000_000
+        os.utime(self.path(path), ns=(self.mtime_ns, self.mtime_ns))
+
+    def test_first_refresh_adds_everything(self):
+        index = FileIndex(self.base, self.index_path)
+        diff = index.refresh()
+        self.assertEqual(
+            sorted(diff.added),
+            [self.path(p) for p in ("a/b/z.txt", "a/y.txt", "x.txt")],
+        )
+        self.assertEqual(diff.removed, [])
+        self.assertEqual(diff.modified, [])
+        self.assertEqual(index.get_files()[self.path("a/y.txt")][0], 4)
+        self.assertTrue(os.path.exists(self.index_path))
+        self.assertEqual(index.refresh(), ([], [], []))
+
+    def test_diffs(self):
+        index = FileIndex(self.base, self.index_path)
+        index.refresh()
+
+        self.write("a/b/new.txt", "new")
+        self.write("a/b/z.txt", "changed")
+        self.touch("a/b/z.txt")
+        os.remove(self.path("x.txt"))
+        self.touch("a/b")
+        self.touch(".")
+        diff = index.refresh()
+        self.assertEqual(diff.added, [self.path("a/b/new.txt")])
+        self.assertEqual(diff.removed, [self.path("x.txt")])
+        self.assertEqual(diff.modified, [self.path("a/b/z.txt")])
+
+        os.rename(self.path("a/b/new.txt"), self.path("c/new.txt"))
+        self.touch("a/b")
+        self.touch("c")
+        diff = index.refresh()
+        self.assertEqual(diff.added, [self.path("c/new.txt")])
+        self.assertEqual(diff.removed, [self.path("a/b/new.txt")])
+
+    def test_removed_folders(self):
+        index = FileIndex(self.base, self.index_path)
+        index.refresh()
+        for path in ("a/b/z.txt", "a/y.txt"):
+            os.remove(self.path(path))
+        os.rmdir(self.path("a/b"))
+        os.rmdir(self.path("a"))
+        self.touch(".")
+        diff = index.refresh()
+        self.assertEqual(
+            sorted(diff.removed), [self.path("a/b/z.txt"), self.path("a/y.txt")]
+        )
+
+    def test_reopening(self):
+        index = FileIndex(self.base, self.index_path)
+        index.refresh()
+        reopened = FileIndex(self.base, self.index_path)
+        self.assertEqual(reopened.get_files(), index.get_files())
+        self.assertEqual(reopened.refresh(), ([], [], []))
+
+        self.write("c/new.txt", "new")
+        self.touch("c")
+        reopened = FileIndex(self.base, self.index_path)
+        self.assertEqual(reopened.refresh(save=False).added, [self.path("c/new.txt")])
+        # Without saving, the stored index is unchanged.
+        self.assertEqual(
+            FileIndex(self.base, self.index_path).refresh().added,
+            [self.path("c/new.txt")],
+        )
+
+    def test_base_folder_mismatch(self):
+        FileIndex(self.base, self.index_path).refresh()
+        other_base = self.path("a")
+        index = FileIndex(other_base, self.index_path)
+        self.assertEqual(index.get_files(), {})
+        self.assertEqual(
+            sorted(index.refresh().added),
+            [self.path("a/b/z.txt"), self.path("a/y.txt")],
+        )
+        with open(self.index_path, "r", encoding="utf-8") as index_file:
+            self.assertEqual(json.load(index_file)["base_folder"], other_base)
+
+    def test_verify_files(self):
+        index = FileIndex(self.base, self.index_path)
+        index.refresh()
+        # Changing a file's contents doesn't change its folder's modification time.
+        folder_stat = os.stat(self.path("a"))
+        self.write("a/y.txt", "changed")
+        self.touch("a/y.txt")
+        os.utime(self.path("a"), ns=(folder_stat.st_atime_ns, folder_stat.st_mtime_ns))
+
+        self.assertEqual(index.refresh(), ([], [], []))
+        diff = index.refresh(verify_files=True)
+        self.assertEqual(diff.modified, [self.path("a/y.txt")])
+        self.assertEqual(index.refresh(verify_files=True), ([], [], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
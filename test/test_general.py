@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta, timezone
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+
+import numpy
+
+from wmutils.general import (
+    Counter,
+    SharedCounter,
+    filter_timewindow,
+    get_timestamp_parser,
+    lies_outside_timewindow,
+    parse_timestamps,
+    timewindow_mask,
+)
+from wmutils.multithreading import ExecutorService, parallelize_tasks
+
+START = datetime(2024, 1, 10)
+END = datetime(2024, 1, 20)
+
+
+class TestTimeWindow(unittest.TestCase):
+    def test_lies_outside_timewindow(self):
+        for time_format, timestamps in (
+            ("%Y-%m-%d", ["2024-01-05", "2024-01-10", "2024-01-15", "2024-01-25"]),
+            ("%d/%m/%Y", ["05/01/2024", "10/01/2024", "15/01/2024", "25/01/2024"]),
+        ):
+            self.assertEqual(
+                [
+                    lies_outside_timewindow(timestamp, START, END, time_format)
+                    for timestamp in timestamps
+                ],
+                [True, False, False, True],
+            )
+        # Like ``strptime``, ISO-8601 formats reject other ISO-8601 variants.
+        for timestamp in ("2024-01-15T10:00:00+02:00", "2024-01-15", "2024-01"):
+            with self.assertRaises(ValueError):
+                lies_outside_timewindow(timestamp, START, END, "%Y-%m-%dT%H:%M:%S")
+
+    def test_parse_timestamps(self):
+        expected = numpy.array(
+            ["2024-01-02T03:04:05", "2024-01-02T03:04:05.5"], dtype="datetime64[us]"
+        )
+        for time_format, timestamps in (
+            (None, ["2024-01-02T03:04:05", "2024-01-02 03:04:05.500000"]),
+            (
+                "%Y-%m-%d %H:%M:%S.%f",
+                ["2024-01-02 03:04:05.0", "2024-01-02 03:04:05.5"],
+            ),
+            (
+                "%Y-%m-%dT%H:%M:%S.%f%z",
+                ["2024-01-02T05:04:05.000000+02:00", "2024-01-02T03:04:05.5+0000"],
+            ),
+            (
+                "%d/%m/%Y %H:%M:%S.%f",
+                ["02/01/2024 03:04:05.0", "02/01/2024 03:04:05.5"],
+            ),
+        ):
+            numpy.testing.assert_array_equal(
+                parse_timestamps(timestamps, time_format), expected
+            )
+        for timestamps, time_format in (
+            (["garbage"], None),
+            (["31/02/2024"], "%d/%m/%Y"),
+            (["01/01/2024", "2024-01-01"], "%d/%m/%Y"),
+            ([""], None),
+            (["NaT"], None),
+            (["2024-01-02", "NaT"], "%Y-%m-%d"),
+            (["2024-01"], "%Y-%m-%d"),
+            (["2024-01-02T03:04:05"], "%Y-%m-%d %H:%M:%S"),
+            (["2024-01-02T03:04:05+02:00"], "%Y-%m-%dT%H:%M:%S"),
+        ):
+            with self.assertRaises(ValueError):
+                parse_timestamps(timestamps, time_format)
+
+    def test_bulk_and_scalar_parsing_agree(self):
+        timestamps = [
+            "2024-01-02",
+            "2024-1-2",
+            "2024-01-02 03:04:05",
+            "2024-01-02T03:04",
+            "0000-01-02",
+            "0001-01-01",
+            "0000-12-31 23:59:59",
+        ]
+        for time_format in (None, "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M"):
+            for timestamp in timestamps:
+                try:
+                    expected = numpy.datetime64(
+                        get_timestamp_parser(time_format)(timestamp), "us"
+                    )
+                except ValueError:
+                    with self.assertRaises(ValueError):
+                        parse_timestamps([timestamp] * 3, time_format)
+                else:
+                    numpy.testing.assert_array_equal(
+                        parse_timestamps([timestamp] * 3, time_format), [expected] * 3
+                    )
+        with self.assertRaises(ValueError):
+            parse_timestamps(["02/01/0000"] * 3, "%d/%m/%Y")
+
+    def test_timewindow_mask(self):
+        timestamps = [
+            (START + timedelta(days=day)).isoformat() for day in range(-3, 15)
+        ]
+        mask = timewindow_mask(timestamps, START, END)
+        self.assertEqual(mask.tolist(), [False] * 3 + [True] * 11 + [False] * 4)
+        outside = timewindow_mask(timestamps, START, END, outside=True)
+        numpy.testing.assert_array_equal(outside, ~mask)
+
+        aware_start = START.replace(tzinfo=timezone(timedelta(hours=1)))
+        mask = timewindow_mask(["2024-01-09T23:00:00"], aware_start, END)
+        self.assertEqual(mask.tolist(), [True])
+
+    def test_filter_timewindow(self):
+        timestamps = [f"{day:02d}/01/2024" for day in range(1, 32)]
+        inside = list(
+            filter_timewindow(iter(timestamps), START, END, "%d/%m/%Y", batch_size=4)
+        )
+        self.assertEqual(inside, timestamps[9:20])
+        outside = list(
+            filter_timewindow(timestamps, START, END, "%d/%m/%Y", outside=True)
+        )
+        self.assertEqual(outside, timestamps[:9] + timestamps[20:])
+
+
+def take_ids(task, task_id, worker_id, total_tasks, counter):
+    return [counter.get_next() for _ in range(task)]
+
+
+def put_ids(counter, id_queue):
+    id_queue.put([counter.get_next() for _ in range(10)])
+
+
+class TestSharedCounter(unittest.TestCase):
+    def test_behaves_like_counter(self):
+        counter = Counter(10, 2)
+        shared_counter = SharedCounter(10, 2, block_size=3)
+        self.assertEqual(
+            [shared_counter.get_next() for _ in range(10)],
+            [counter.get_next() for _ in range(10)],
+        )
+
+    def test_unique_across_workers(self):
+        counter = SharedCounter(0, block_size=16)
+        results = parallelize_tasks(
+            [50] * 40, take_ids, 4, return_results=True, counter=counter
+        )
+        ids = [value for result in results for value in result]
+        self.assertEqual(len(ids), 2000)
+        self.assertEqual(len(set(ids)), 2000)
+
+    def test_submitted_to_workers(self):
+        # Thread workers can receive the counter with each task. Frequent thread
+        # switches expose numbers that are handed out twice.
+        counter = SharedCounter(0, block_size=16)
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            executor = ExecutorService(8, True, False, use_threads=True)
+            executor.start()
+            for task_id in range(80):
+                executor.submit(
+                    take_ids, task=500, task_id=task_id, total_tasks=80, counter=counter
+                )
+            ids = [value for result in executor.get_results_iter() for value in result]
+            executor.stop()
+        finally:
+            sys.setswitchinterval(switch_interval)
+        self.assertEqual(len(ids), 40000)
+        self.assertEqual(len(set(ids)), 40000)
+
+        # Tasks of process workers are pickled, which the counter doesn't support.
+        with self.assertRaisesRegex(RuntimeError, "through inheritance"):
+            pickle.dumps(counter)
+
+    def test_forked_processes_reserve_new_blocks(self):
+        counter = SharedCounter(0, block_size=100)
+        parent_ids = [counter.get_next()]
+        id_queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=put_ids, args=(counter, id_queue))
+        process.start()
+        child_ids = id_queue.get()
+        process.join()
+        parent_ids.extend(counter.get_next() for _ in range(10))
+        self.assertEqual(parent_ids, list(range(1, 12)))
+        self.assertTrue(set(child_ids).isdisjoint(parent_ids))
+
+    def test_persisted(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "counter")
+            counter = SharedCounter(0, block_size=10, file_path=file_path)
+            first_ids = [counter.get_next() for _ in range(15)]
+            counter = SharedCounter(0, block_size=10, file_path=file_path)
+            self.assertGreater(counter.get_next(), max(first_ids))
+            self.assertEqual(os.listdir(folder), ["counter"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,269 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from wmutils import json as wmjson
+from wmutils.json import (
+    JsonCache,
+    invalidate_json_cache,
+    iter_json_array,
+    iter_json_array_batches,
+    iter_jsonl,
+    iter_jsonl_batches,
+    load_json,
+    load_jsonl_parallel,
+)
+
+RECORDS = [
+    {"id": index, "name": f"record {index}", "values": [index, index / 2, None]}
+    for index in range(250)
+] + [12345, -1.5e10, "text ]with[ brackets", [], {}, True, None]
+
+
+class TestJson(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.folder.name, name)
+
+    def test_iter_jsonl(self):
+        file_path = self.path("records.jsonl")
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(json.dumps(record) for record in RECORDS) + "\n\n")
+        self.assertEqual(list(iter_jsonl(file_path, buffer_size=64)), RECORDS)
+        batches = list(iter_jsonl_batches(file_path, batch_size=100))
+        self.assertEqual([len(batch) for batch in batches], [100, 100, 57])
+        self.assertEqual([record for batch in batches for record in batch], RECORDS)
+
+    def test_iter_jsonl_compressed(self):
+        file_path = self.path("records.jsonl.gz")
+        with gzip.open(file_path, "wt", encoding="utf-8") as file:
+            file.write("\n".join(json.dumps(record) for record in RECORDS))
+        self.assertEqual(list(iter_jsonl(file_path)), RECORDS)
+
+    def test_iter_json_array(self):
+        file_path = self.path("records.json")
+        for indent in (None, 2):
+            with open(file_path, "w", encoding="utf-8") as file:
+                json.dump(RECORDS, file, indent=indent)
+            for buffer_size in (1, 7, 1 << 20):
+                self.assertEqual(
+                    list(iter_json_array(file_path, buffer_size=buffer_size)), RECORDS
+                )
+        self.assertEqual(load_json(file_path), RECORDS)
+        batches = list(iter_json_array_batches(file_path, batch_size=250))
+        self.assertEqual([len(batch) for batch in batches], [250, 7])
+
+    def test_iter_json_array_edge_cases(self):
+        file_path = self.path("records.json")
+        for text, expected in (("[]", []), (" [ 1 ,2 ] ", [1, 2]), ("[10]", [10])):
+            with open(file_path, "w", encoding="utf-8") as file:
+                file.write(text)
+            self.assertEqual(list(iter_json_array(file_path, buffer_size=1)), expected)
+        for text in ("{}", "[1, 2", "[1 2]", "[1,]"):
+            with open(file_path, "w", encoding="utf-8") as file:
+                file.write(text)
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_json_array(file_path, buffer_size=2))
+
+    def test_load_jsonl_parallel(self):
+        file_path = self.path("records.jsonl")
+        records = [record for record in RECORDS if isinstance(record, dict) and record]
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(json.dumps(record) for record in records) + "\n")
+
+        batches = list(load_jsonl_parallel(file_path, 4, chunk_size=1024))
+        self.assertGreater(len(batches), 4)
+        self.assertEqual([record for batch in batches for record in batch], records)
+
+        batches = load_jsonl_parallel(
+            file_path, 4, [["id"], ["name"]], ordered=False, chunk_size=1024
+        )
+        self.assertEqual(
+            sorted(record for batch in batches for record in batch),
+            [(record["id"], record["name"]) for record in records],
+        )
+
+        # Stopping early doesn't leave workers behind.
+        for batch in load_jsonl_parallel(file_path, 4, chunk_size=1024):
+            self.assertEqual(batch[0], records[0])
+            break
+
+
+class TestJsonCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.folder.name, "config.json")
+        self.write({"a": [1, 2], "b": {"c": None}})
+
+    def tearDown(self):
+        invalidate_json_cache()
+        self.folder.cleanup()
+
+    def write(self, document, mtime_ns=None):
+        with open(self.file_path, "w", encoding="utf-8") as file:
+            json.dump(document, file)
+        if not mtime_ns is None:
+            os.utime(self.file_path, ns=(mtime_ns, mtime_ns))
+
+    def test_copies_are_private(self):
+        first = load_json(self.file_path, cache=True)
+        first["a"].append(3)
+        self.assertEqual(load_json(self.file_path, cache=True)["a"], [1, 2])
+
+    def test_read_only_views(self):
+        view = load_json(self.file_path, cache=True, read_only=True)
+        self.assertIs(view, load_json(self.file_path, cache=True, read_only=True))
+        self.assertEqual(view["a"], (1, 2))
+        with self.assertRaises(TypeError):
+            view["d"] = 1
+        with self.assertRaises(TypeError):
+            view["b"]["c"] = 1
+
+    def test_reloads_changed_files(self):
+        cache = JsonCache()
+        self.write({"a": 1}, 1_000_000_000)
+        self.assertEqual(cache.load(self.file_path), {"a": 1})
+        # Same size and mtime is treated as unchanged.
+        self.write({"a": 2}, 1_000_000_000)
+        self.assertEqual(cache.load(self.file_path), {"a": 1})
+        self.write({"a": 2}, 2_000_000_000)
+        self.assertEqual(cache.load(self.file_path), {"a": 2})
+        self.write({"a": 3}, 2_000_000_000)
+        cache.invalidate(self.file_path)
+        self.assertEqual(cache.load(self.file_path), {"a": 3})
+
+    def test_bounded(self):
+        cache = JsonCache(max_entries=2)
+        for index in range(4):
+            file_path = os.path.join(self.folder.name, f"{index}.json")
+            with open(file_path, "w", encoding="utf-8") as file:
+                json.dump([index], file)
+            self.assertEqual(cache.load(file_path), [index])
+        self.assertEqual(len(cache), 2)
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+    def test_sidecar(self):
+        sidecar_folder = os.path.join(self.folder.name, "sidecars")
+        os.makedirs(sidecar_folder)
+        cache = JsonCache(use_sidecar=True, sidecar_folder=sidecar_folder)
+        self.write({"a": 1}, 1_000_000_000)
+        self.assertEqual(cache.load(self.file_path), {"a": 1})
+        self.assertEqual(len(os.listdir(sidecar_folder)), 1)
+
+        # A new cache reads the sidecar instead of the unchanged file.
+        self.write({"a": 2}, 1_000_000_000)
+        cache = JsonCache(use_sidecar=True, sidecar_folder=sidecar_folder)
+        self.assertEqual(cache.load(self.file_path), {"a": 1})
+
+        self.write({"a": 3}, 2_000_000_000)
+        cache = JsonCache(use_sidecar=True, sidecar_folder=sidecar_folder)
+        self.assertEqual(cache.load(self.file_path), {"a": 3})
+        cache.invalidate(remove_sidecar=True)
+        self.assertEqual(os.listdir(sidecar_folder), [])
+
+    def test_sidecars_of_similar_paths(self):
+        sidecar_folder = os.path.join(self.folder.name, "sidecars")
+        os.makedirs(sidecar_folder)
+        # Replacing separators in these paths gives the same name.
+        file_paths = [
+            os.path.join(self.folder.name, "a", "b_c.json"),
+            os.path.join(self.folder.name, "a_b", "c.json"),
+        ]
+        for index, file_path in enumerate(file_paths):
+            os.makedirs(os.path.dirname(file_path))
+            with open(file_path, "w", encoding="utf-8") as file:
+                json.dump([index], file)
+            os.utime(file_path, ns=(1_000_000_000, 1_000_000_000))
+            cache = JsonCache(use_sidecar=True, sidecar_folder=sidecar_folder)
+            self.assertEqual(cache.load(file_path), [index])
+        self.assertEqual(len(os.listdir(sidecar_folder)), 2)
+        for index, file_path in enumerate(file_paths):
+            cache = JsonCache(use_sidecar=True, sidecar_folder=sidecar_folder)
+            self.assertEqual(cache.load(file_path), [index])
+
+    def test_sidecar_of_moved_file(self):
+        cache = JsonCache(use_sidecar=True)
+        self.write({"a": 1}, 1_000_000_000)
+        self.assertEqual(cache.load(self.file_path), {"a": 1})
+        moved_path = os.path.join(self.folder.name, "moved.json")
+        os.replace(f"{self.file_path}.marshal", f"{moved_path}.marshal")
+        with open(moved_path, "w", encoding="utf-8") as file:
+            json.dump({"a": 2}, file)
+        os.utime(moved_path, ns=(1_000_000_000, 1_000_000_000))
+        self.assertEqual(JsonCache(use_sidecar=True).load(moved_path), {"a": 2})
+
+
+class TestJsonBackends(unittest.TestCase):
+    def tearDown(self):
+        wmjson.set_json_backend()
+
+    def test_default_backend(self):
+        available = wmjson.get_available_json_backends()
+        self.assertIn("json", available)
+        self.assertEqual(wmjson.get_json_backend().name, available[0])
+
+    def test_backends_are_interchangeable(self):
+        document = {"a": [1, 2.5, None, True], "b": {"c": "d\u00e9"}}
+        for name in wmjson.get_available_json_backends():
+            backend = wmjson.set_json_backend(name)
+            self.assertEqual(backend.name, name)
+            text = wmjson.dumps(document, fast=True)
+            self.assertIsInstance(text, str)
+            self.assertEqual(wmjson.loads(text, fast=True), document)
+            self.assertEqual(wmjson.loads(text.encode("utf-8"), fast=True), document)
+            self.assertEqual(json.loads(wmjson.dumps({1: 2}, fast=True)), {"1": 2})
+            for invalid in ("{", b"[1,", "nope"):
+                with self.assertRaises(json.JSONDecodeError):
+                    wmjson.loads(invalid, fast=True)
+
+    def test_edge_cases(self):
+        text = '{"nan": NaN, "inf": [Infinity, -Infinity], "big": %d}' % (2**70 + 1)
+        expected = repr(json.loads(text))
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "a.json")
+            with open(file_path, "w", encoding="utf-8") as json_file:
+                json_file.write(text)
+            for name in wmjson.get_available_json_backends():
+                wmjson.set_json_backend(name)
+                self.assertEqual(repr(load_json(file_path)), expected)
+                self.assertEqual(repr(load_json(file_path, JsonCache())), expected)
+                self.assertEqual(repr(wmjson.loads('[NaN, 1, "a"]')), "[nan, 1, 'a']")
+
+    def test_exact_by_default(self):
+        records = [{"big": 2**70 + 1}, {"nan": float("nan")}, [1.5, -float("inf")]]
+        expected = repr(records)
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "records.jsonl")
+            with open(file_path, "w", encoding="utf-8") as file:
+                file.write("\n".join(json.dumps(record) for record in records))
+            for name in wmjson.get_available_json_backends():
+                wmjson.set_json_backend(name)
+                self.assertEqual(repr(list(iter_jsonl(file_path))), expected)
+                batches = iter_jsonl_batches(file_path, batch_size=2)
+                self.assertEqual(
+                    repr([r for batch in batches for r in batch]), expected
+                )
+                batches = load_jsonl_parallel(file_path, 2, use_threads=True)
+                self.assertEqual(
+                    repr([r for batch in batches for r in batch]), expected
+                )
+                self.assertEqual(
+                    wmjson.dumps({1: 2, "nan": float("nan")}), '{"1": 2, "nan": NaN}'
+                )
+                self.assertEqual(repr(wmjson.loads(json.dumps(records))), expected)
+
+    def test_unsupported_backend(self):
+        with self.assertRaises(ValueError):
+            wmjson.set_json_backend("yaml")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
 from dataclasses import dataclass
+import threading
+import time
 import unittest
+from unittest import mock
 import multiprocessing
 
-from wmutils.multithreading import parallelize_tasks
-
+from wmutils.multithreading import ExecutorService, parallelize_tasks
 
 THREAD_COUNT = 8
 WORK_LOAD = 10000
@@ -35,6 +37,21 @@ def return_object(task, task_id, worker_id, total_tasks):
     return MyObject(task, task_id, worker_id, total_tasks)
 
 
+def prefix_task(prefix, task, task_id, worker_id, total_tasks, suffix):
+    return f"{prefix}{task}{suffix}"
+
+
+def fail_on_odd(task, task_id, worker_id):
+    if task % 2 == 1:
+        raise ValueError(f"{task} is odd.")
+    return task
+
+
+def wait_for(event, task, task_id, worker_id):
+    event.wait(timeout=5)
+    return task
+
+
 class TestMultithreading(unittest.TestCase):
     def test_paralellize_tasks_termination(self):
         tasks = range(WORK_LOAD)
@@ -140,3 +157,86 @@ class TestMultithreading(unittest.TestCase):
             self.assertNotIn(result.task_id, used_task_ids)
 
             used_task_ids.add(result.task_id)
+
+    def test_paralellize_tasks_with_threads(self):
+        tasks = list(range(WORK_LOAD))
+
+        results = parallelize_tasks(
+            tasks,
+            return_dict,
+            thread_count=THREAD_COUNT,
+            return_results=True,
+            use_threads=True,
+        )
+
+        results = sorted(results, key=lambda element: element["task"])
+        self.assertEqual(len(results), WORK_LOAD)
+        for result, task in zip(results, tasks):
+            self.assertEqual(result["task"], task)
+            self.assertEqual(result["total_tasks"], len(tasks))
+
+    def test_paralellize_tasks_with_positional_arguments(self):
+        tasks = list(range(100))
+        for use_threads in (True, False):
+            results = parallelize_tasks(
+                tasks,
+                prefix_task,
+                THREAD_COUNT,
+                True,
+                True,
+                "x",
+                use_threads=use_threads,
+                suffix="!",
+            )
+            self.assertEqual(sorted(results), sorted(f"x{task}!" for task in tasks))
+
+
+class TestExecutorService(unittest.TestCase):
+    def assert_joins(self, executor):
+        joiner = threading.Thread(target=executor._worklist.join, daemon=True)
+        joiner.start()
+        joiner.join(timeout=5)
+        self.assertFalse(joiner.is_alive(), "The work list wasn't joined.")
+
+    def test_counted_results(self):
+        for use_threads in (True, False):
+            executor = ExecutorService(2, True, False, use_threads=use_threads)
+            executor.start()
+            for task in range(10):
+                executor.submit(return_task, task=task, task_id=task, total_tasks=10)
+            first = list(executor.get_results_iter(4))
+            self.assertEqual(len(first), 4)
+            rest = list(executor.get_results_iter())
+            self.assertEqual(sorted(first + rest), list(range(10)))
+            self.assert_joins(executor)
+            executor.stop()
+
+    def test_failed_tasks_yield_no_result(self):
+        # Failed tasks terminate their worker, but still count as received.
+        executor = ExecutorService(2, True, False, use_threads=True)
+        with self.assertLogs(level="WARNING"), mock.patch("threading.excepthook"):
+            executor.start()
+            for task in (0, 2, 3, 4):
+                executor.submit(fail_on_odd, task=task, task_id=task)
+            results = list(executor.get_results_iter())
+        self.assertEqual(sorted(results), [0, 2, 4])
+        self.assertEqual(list(executor.get_results_iter()), [])
+        executor.stop()
+
+    def test_cancel_pending(self):
+        for use_threads in (True, False):
+            event = threading.Event() if use_threads else multiprocessing.Event()
+            # Events are passed to process workers on start, as they can't be pickled.
+            executor = ExecutorService(1, True, False, event, use_threads=use_threads)
+            executor.start()
+            for task in range(10):
+                executor.submit(wait_for, task=task, task_id=task)
+            # Waits until the worker blocks on the first task.
+            while executor._worklist.qsize() > 9:
+                time.sleep(0.01)
+            time.sleep(0.1)
+            self.assertEqual(executor.cancel_pending(), 9)
+            event.set()
+            self.assertEqual(list(executor.get_results_iter()), [0])
+            self.assert_joins(executor)
+            executor.stop()
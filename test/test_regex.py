@@ -0,0 +1,80 @@
+import unittest
+
+import regex
+
+from wmutils.regex import (
+    MultiPatternMatcher,
+    compile,
+    filter_concurrently,
+    get_matching,
+    get_non_matching,
+    partition,
+)
+
+ELEMENTS = ["apple", "banana", "avocado", "cherry", "blueberry", "apricot", ""]
+
+
+class TestRegex(unittest.TestCase):
+    def test_matching(self):
+        self.assertEqual(
+            list(get_matching(ELEMENTS, "a")), ["apple", "avocado", "apricot"]
+        )
+        self.assertEqual(
+            list(get_non_matching(ELEMENTS, compile("a"))),
+            ["banana", "cherry", "blueberry", ""],
+        )
+
+    def test_matching_with_threads(self):
+        elements = ELEMENTS * 1000
+        expected = [element for element in elements if element.startswith("a")]
+        self.assertEqual(
+            list(get_matching(iter(elements), "a", thread_count=4, batch_size=7)),
+            expected,
+        )
+        self.assertEqual(
+            list(get_non_matching(elements, "a", thread_count=4, batch_size=7)),
+            [element for element in elements if not element.startswith("a")],
+        )
+        unordered = filter_concurrently(
+            elements, "a", thread_count=4, batch_size=7, preserve_order=False
+        )
+        self.assertEqual(sorted(unordered), sorted(expected))
+        self.assertEqual(list(filter_concurrently([], "a")), [])
+
+    def test_compile_reuses_patterns(self):
+        pattern = regex.compile("a")
+        self.assertIs(compile(pattern), pattern)
+
+    def test_partition(self):
+        matching, non_matching = partition(iter(ELEMENTS), r"b\w+")
+        self.assertEqual(matching, ["banana", "blueberry"])
+        self.assertEqual(non_matching, ["apple", "avocado", "cherry", "apricot", ""])
+
+    def test_multi_pattern_matcher(self):
+        matcher = MultiPatternMatcher(["ap", "a", r"(?P<letter>b)\w*y$"])
+        self.assertEqual(matcher.match("apple"), 0)
+        self.assertEqual(matcher.match("avocado"), 1)
+        self.assertEqual(matcher.match("blueberry"), 2)
+        self.assertIsNone(matcher.match("banana"))
+        self.assertEqual(matcher.search("cherry apple"), 0)
+        self.assertEqual(
+            list(matcher.get_matching(ELEMENTS)),
+            [("apple", 0), ("avocado", 1), ("blueberry", 2), ("apricot", 0)],
+        )
+
+    def test_named_patterns(self):
+        matcher = MultiPatternMatcher({"fruit": "a|b", "c": "c"}, regex.IGNORECASE)
+        self.assertEqual(matcher.match("Cherry"), "c")
+        self.assertEqual(
+            matcher.group_by_pattern(ELEMENTS),
+            {
+                "fruit": ["apple", "banana", "avocado", "blueberry", "apricot"],
+                "c": ["cherry"],
+            },
+        )
+        with self.assertRaises(ValueError):
+            MultiPatternMatcher([])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,329 @@
+"""
+Implements variants of ``SafeDict`` that are bounded in size or age,
+s.t. they can be used as a cache in long-running processes.
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterator, TypeVar
+
+from wmutils.collections.safe_dict import SafeDict
+
+
+_KT = TypeVar("_KT")
+_VT = TypeVar("_VT")
+
+_MISSING = object()
+
+
+class BoundedSafeDict(SafeDict[_KT, _VT]):
+    """
+    ``SafeDict`` that holds at most ``max_size`` entries.
+    When a new entry does not fit, either the least recently used (``"lru"``)
+    or least frequently used (``"lfu"``) entry is evicted.
+
+    Tracks ``hits``, ``misses``, and ``evictions``. Reads through ``get``,
+    ``in``, or iteration don't count as a use of an entry.
+    """
+
+    def __init__(
+        self,
+        default_value,
+        max_size: int,
+        eviction_policy: str = "lru",
+        on_evict: "Callable[[_KT, _VT], None] | None" = None,
+        **kwargs,
+    ):
+        """
+        :param default_value: The default value for entries; see ``SafeDict``.
+        :param max_size: The maximum number of entries (min. 1).
+        :param eviction_policy: Either ``"lru"`` or ``"lfu"``.
+        :param on_evict: Optional callback that receives the key and value of evicted entries.
+        :param **kwargs: Any other parameter of ``SafeDict``.
+        """
+        if max_size < 1:
+            raise ValueError("You can't have a maximum size of less than one.")
+        if eviction_policy not in ("lru", "lfu"):
+            raise ValueError(f"Unsupported eviction policy {eviction_policy}.")
+
+        self.__max_size: int = max_size
+        self.__is_lfu: bool = eviction_policy == "lfu"
+        self.__on_evict = on_evict
+
+        # LFU bookkeeping: the use count of each key, and per use count,
+        # the keys with said count in order of their last use.
+        self.__frequencies: Dict[_KT, int] = {}
+        self.__frequency_buckets: Dict[int, Dict[_KT, None]] = {}
+        self.__min_frequency: int = 0
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+        super().__init__(default_value, **kwargs)
+
+        # Registers entries of the initial mapping.
+        if self.__is_lfu:
+            for key in dict.keys(self):
+                self.__track(key)
+        self.__evict_overflow(0)
+
+    @property
+    def max_size(self) -> int:
+        return self.__max_size
+
+    def __getitem__(self, __key: _KT) -> _VT:
+        value = dict.get(self, __key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return self.__missing__(__key)
+        self.hits += 1
+        self.__touch(__key, value)
+        return value
+
+    def __missing__(self, __key: _KT) -> _VT:
+        self.__evict_overflow(1)
+        value = super().__missing__(__key)
+        self.__track(__key)
+        return value
+
+    def __setitem__(self, __key: _KT, __value: _VT) -> None:
+        if self.delete_when_default and __value == self.default_value:
+            self.pop(__key, None)
+        elif dict.__contains__(self, __key):
+            dict.__setitem__(self, __key, __value)
+            self.__touch(__key, __value)
+        else:
+            self.__evict_overflow(1)
+            dict.__setitem__(self, __key, __value)
+            self.__track(__key)
+
+    def __delitem__(self, __key: _KT) -> None:
+        dict.__delitem__(self, __key)
+        self.__untrack(__key)
+
+    def pop(self, __key: _KT, *default: Any) -> Any:
+        if not dict.__contains__(self, __key):
+            return dict.pop(self, __key, *default)
+        value = dict.pop(self, __key)
+        self.__untrack(__key)
+        return value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self.__untrack(key)
+        return key, value
+
+    def setdefault(self, __key: _KT, __default: _VT = None) -> _VT:
+        if not dict.__contains__(self, __key):
+            self[__key] = __default
+        return dict.get(self, __key, __default)
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self.__frequencies.clear()
+        self.__frequency_buckets.clear()
+        self.__min_frequency = 0
+
+    def __touch(self, key: _KT, value: _VT) -> None:
+        """Registers a use of an existing entry."""
+        if not self.__is_lfu:
+            # Moves the key to the end of the insertion order.
+            dict.__delitem__(self, key)
+            dict.__setitem__(self, key, value)
+            return
+        frequency = self.__frequencies[key]
+        bucket = self.__frequency_buckets[frequency]
+        del bucket[key]
+        if len(bucket) == 0:
+            del self.__frequency_buckets[frequency]
+            if self.__min_frequency == frequency:
+                self.__min_frequency = frequency + 1
+        self.__frequencies[key] = frequency + 1
+        self.__frequency_buckets.setdefault(frequency + 1, {})[key] = None
+
+    def __track(self, key: _KT) -> None:
+        """Registers a new entry."""
+        if self.__is_lfu:
+            self.__frequencies[key] = 1
+            self.__frequency_buckets.setdefault(1, {})[key] = None
+            self.__min_frequency = 1
+
+    def __untrack(self, key: _KT) -> None:
+        """Unregisters a removed entry."""
+        if not self.__is_lfu:
+            return
+        frequency = self.__frequencies.pop(key)
+        bucket = self.__frequency_buckets[frequency]
+        del bucket[key]
+        if len(bucket) == 0:
+            del self.__frequency_buckets[frequency]
+            if self.__min_frequency == frequency and len(self.__frequencies) > 0:
+                self.__min_frequency = min(self.__frequency_buckets.keys())
+
+    def __evict_overflow(self, incoming: int) -> None:
+        """Evicts entries until ``incoming`` new entries fit."""
+        while len(self) > 0 and len(self) + incoming > self.__max_size:
+            if self.__is_lfu:
+                bucket = self.__frequency_buckets[self.__min_frequency]
+                key = next(iter(bucket))
+            else:
+                key = next(iter(dict.keys(self)))
+            value = dict.pop(self, key)
+            self.__untrack(key)
+            self.evictions += 1
+            if not self.__on_evict is None:
+                self.__on_evict(key, value)
+
+
+class TTLSafeDict(SafeDict[_KT, _VT]):
+    """
+    ``SafeDict`` of which entries expire ``ttl`` seconds after they were last set.
+    Expired entries are removed lazily whenever the dictionary is accessed,
+    or explicitly through ``expire()``.
+
+    Tracks ``hits``, ``misses``, and ``evictions`` (i.e., expired entries).
+    """
+
+    def __init__(
+        self,
+        default_value,
+        ttl: float,
+        on_evict: "Callable[[_KT, _VT], None] | None" = None,
+        timer: Callable[[], float] = time.monotonic,
+        **kwargs,
+    ):
+        """
+        :param default_value: The default value for entries; see ``SafeDict``.
+        :param ttl: The number of seconds after which an entry expires.
+        :param on_evict: Optional callback that receives the key and value of expired entries.
+        :param timer: Returns the current time in seconds.
+        :param **kwargs: Any other parameter of ``SafeDict``.
+        """
+        if ttl <= 0:
+            raise ValueError("The time to live must be positive.")
+
+        self.__ttl: float = ttl
+        self.__on_evict = on_evict
+        self.__timer = timer
+
+        # Maps keys to their expiry time. Because every write moves the key
+        # to the end, this is sorted by expiry time.
+        self.__expiries: Dict[_KT, float] = {}
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+        super().__init__(default_value, **kwargs)
+
+        expiry = self.__timer() + self.__ttl
+        for key in dict.keys(self):
+            self.__expiries[key] = expiry
+
+    @property
+    def ttl(self) -> float:
+        return self.__ttl
+
+    def expire(self) -> int:
+        """Removes all expired entries and returns how many were removed."""
+        now = self.__timer()
+        expiries = self.__expiries
+        expired = 0
+        while len(expiries) > 0:
+            key = next(iter(expiries))
+            if expiries[key] > now:
+                break
+            del expiries[key]
+            value = dict.pop(self, key)
+            expired += 1
+            if not self.__on_evict is None:
+                self.__on_evict(key, value)
+        self.evictions += expired
+        return expired
+
+    def __getitem__(self, __key: _KT) -> _VT:
+        self.expire()
+        value = dict.get(self, __key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return self.__missing__(__key)
+        self.hits += 1
+        return value
+
+    def __missing__(self, __key: _KT) -> _VT:
+        value = super().__missing__(__key)
+        self.__expiries[__key] = self.__timer() + self.__ttl
+        return value
+
+    def __setitem__(self, __key: _KT, __value: _VT) -> None:
+        self.expire()
+        if self.delete_when_default and __value == self.default_value:
+            self.pop(__key, None)
+            return
+        dict.__setitem__(self, __key, __value)
+        self.__expiries.pop(__key, None)
+        self.__expiries[__key] = self.__timer() + self.__ttl
+
+    def __delitem__(self, __key: _KT) -> None:
+        dict.__delitem__(self, __key)
+        del self.__expiries[__key]
+
+    def __contains__(self, __key: object) -> bool:
+        self.expire()
+        return dict.__contains__(self, __key)
+
+    def __len__(self) -> int:
+        self.expire()
+        return dict.__len__(self)
+
+    def __iter__(self) -> Iterator[_KT]:
+        self.expire()
+        return dict.__iter__(self)
+
+    def keys(self):
+        self.expire()
+        return dict.keys(self)
+
+    def values(self):
+        self.expire()
+        return dict.values(self)
+
+    def items(self):
+        self.expire()
+        return dict.items(self)
+
+    def copy(self) -> Dict[_KT, _VT]:
+        self.expire()
+        return dict.copy(self)
+
+    def get(self, __key: _KT, __default: Any = None) -> Any:
+        self.expire()
+        return dict.get(self, __key, __default)
+
+    def pop(self, __key: _KT, *default: Any) -> Any:
+        self.expire()
+        self.__expiries.pop(__key, None)
+        return dict.pop(self, __key, *default)
+
+    def popitem(self):
+        self.expire()
+        key, value = dict.popitem(self)
+        del self.__expiries[key]
+        return key, value
+
+    def setdefault(self, __key: _KT, __default: _VT = None) -> _VT:
+        if not __key in self:
+            self[__key] = __default
+        return dict.get(self, __key, __default)
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self.__expiries.clear()
@@ -0,0 +1,300 @@
+"""
+Implements a memory-efficient ``SafeDict`` for numeric values,
+which stores its keys and values in typed numpy arrays instead
+of boxed Python objects.
+"""
+
+from collections.abc import MutableMapping
+from numbers import Number
+from typing import Any, Dict, Generic, Iterator, Tuple, TypeVar
+
+import numpy
+
+
+_KT = TypeVar("_KT")
+
+
+def _cast(value: Any, dtype: numpy.dtype) -> Any:
+    """
+    Returns the value as a Python scalar of the dtype. Raises a ``ValueError``
+    for values that aren't numbers, or that would change when they're cast,
+    e.g., ``1.5`` for an integer dtype. Floats may lose precision when cast to
+    smaller float dtypes.
+    """
+    if isinstance(value, (str, bytes)):
+        raise ValueError(f"{value!r} isn't a number.")
+    try:
+        converted = dtype.type(value)
+    except OverflowError as error:
+        raise ValueError(f"{value!r} is out of range for {dtype}.") from error
+    if converted != value and not (
+        dtype.kind == "f" and (isinstance(value, float) or value != value)
+    ):
+        raise ValueError(f"{value!r} can't be stored as {dtype} without loss.")
+    return converted.item()
+
+
+def _cast_array(values: Any, dtype: numpy.dtype) -> numpy.ndarray:
+    """
+    Returns the array-like as an array of the dtype. Raises a ``ValueError``
+    under the same conditions as ``_cast``, checking all values at once.
+    """
+    original = numpy.asarray(values)
+    if not original.dtype.kind in "biufO":
+        raise ValueError(f"Values of {original.dtype} aren't numbers.")
+    try:
+        with numpy.errstate(invalid="ignore", over="ignore"):
+            converted = original.astype(dtype)
+            restored = converted.astype(original.dtype)
+    except (OverflowError, TypeError, ValueError) as error:
+        raise ValueError(f"The values can't be stored as {dtype}.") from error
+    if not (dtype.kind == "f" and original.dtype.kind == "f") and (
+        numpy.any(restored != original)
+    ):
+        raise ValueError(f"The values can't be stored as {dtype} without loss.")
+    return converted
+
+
+class CompactSafeDict(MutableMapping, Generic[_KT]):
+    """
+    ``SafeDict`` with a numeric default that stores its entries in
+    sorted numpy arrays, using roughly 17 bytes per entry instead of the ~100
+    bytes of a ``dict`` with boxed keys and values.
+
+    New keys are first collected in a small ``dict`` buffer, which is merged
+    into the arrays once it reaches ``flush_threshold`` entries. Deleted
+    entries are marked and removed during the next merge. With
+    ``delete_when_default``, entries that equal the default are never stored,
+    making it a sparse vector.
+    """
+
+    def __init__(
+        self,
+        default_value: Number = 0,
+        key_dtype: Any = numpy.int64,
+        value_dtype: Any = None,
+        initial_mapping: "Dict[_KT, Number] | None" = None,
+        delete_when_default: bool = False,
+        flush_threshold: int = 65536,
+    ):
+        """
+        :param default_value: The default value of entries; an ``int`` or ``float``.
+        :param key_dtype: The numpy dtype of the keys. Keys must be sortable.
+        :param value_dtype: The numpy dtype of the values. Defaults to ``int64``
+        for ``int`` defaults and ``float64`` for ``float`` defaults.
+        :param initial_mapping: Can be set to come with a pre-filled mapping.
+        :param delete_when_default: Deletes entries whenever they are equal to the default value.
+        :param flush_threshold: The number of new keys that are buffered before they
+        are merged into the arrays.
+        """
+        if isinstance(default_value, bool) or not isinstance(
+            default_value, (int, float)
+        ):
+            raise ValueError("The default value must be an int or float.")
+        if flush_threshold < 1:
+            raise ValueError("The flush threshold must be at least 1.")
+        if value_dtype is None:
+            value_dtype = (
+                numpy.int64 if isinstance(default_value, int) else numpy.float64
+            )
+
+        self.__default_value: Number = default_value
+        self.__delete_when_default: bool = delete_when_default
+        self.__key_dtype = numpy.dtype(key_dtype)
+        self.__value_dtype = numpy.dtype(value_dtype)
+        self.__flush_threshold: int = flush_threshold
+
+        self.__keys: numpy.ndarray = numpy.empty(0, dtype=self.__key_dtype)
+        self.__values: numpy.ndarray = numpy.empty(0, dtype=self.__value_dtype)
+        self.__alive: numpy.ndarray = numpy.empty(0, dtype=bool)
+        self.__pending: Dict[_KT, Number] = {}
+        self.__size: int = 0
+
+        if not initial_mapping is None:
+            keys = _cast_array(list(initial_mapping.keys()), self.__key_dtype)
+            values = _cast_array(list(initial_mapping.values()), self.__value_dtype)
+            order = numpy.argsort(keys, kind="stable")
+            self.__set_arrays(keys[order], values[order])
+
+    @property
+    def default_value(self) -> Number:
+        return self.__default_value
+
+    @property
+    def delete_when_default(self) -> bool:
+        return self.__delete_when_default
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes used by the arrays, excluding the buffer."""
+        return self.__keys.nbytes + self.__values.nbytes + self.__alive.nbytes
+
+    def __locate(self, key: _KT) -> int:
+        """Returns the array position of the key (including deleted ones), or -1."""
+        keys = self.__keys
+        position = int(keys.searchsorted(key))
+        if position < len(keys) and keys[position] == key:
+            return position
+        return -1
+
+    def __getitem__(self, __key: _KT) -> Number:
+        pending = self.__pending
+        if __key in pending:
+            return pending[__key]
+        position = self.__locate(__key)
+        if position >= 0 and self.__alive[position]:
+            return self.__values[position].item()
+        if not self.__delete_when_default:
+            self[__key] = self.__default_value
+        return self.__default_value
+
+    def __setitem__(self, __key: _KT, __value: Number) -> None:
+        __key = _cast(__key, self.__key_dtype)
+        __value = _cast(__value, self.__value_dtype)
+        if self.__delete_when_default and __value == self.__default_value:
+            if __key in self:
+                del self[__key]
+            return
+        pending = self.__pending
+        if __key in pending:
+            pending[__key] = __value
+            return
+        position = self.__locate(__key)
+        if position >= 0:
+            if not self.__alive[position]:
+                self.__alive[position] = True
+                self.__size += 1
+            self.__values[position] = __value
+            return
+        pending[__key] = __value
+        self.__size += 1
+        if len(pending) >= self.__flush_threshold:
+            self.flush()
+
+    def __delitem__(self, __key: _KT) -> None:
+        if self.__pending.pop(__key, None) is None:
+            position = self.__locate(__key)
+            if position < 0 or not self.__alive[position]:
+                raise KeyError(__key)
+            self.__alive[position] = False
+        self.__size -= 1
+
+    def __contains__(self, __key: object) -> bool:
+        if __key in self.__pending:
+            return True
+        try:
+            position = self.__locate(__key)
+        except (TypeError, ValueError, OverflowError):
+            return False
+        return position >= 0 and bool(self.__alive[position])
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __iter__(self) -> Iterator[_KT]:
+        keys = self.__keys[self.__alive].tolist()
+        keys.extend(self.__pending.keys())
+        return iter(keys)
+
+    def get(self, __key: _KT, __default: Any = None) -> Any:
+        if __key in self:
+            return self[__key]
+        return __default
+
+    def clear(self) -> None:
+        self.__keys = self.__keys[:0]
+        self.__values = self.__values[:0]
+        self.__alive = self.__alive[:0]
+        self.__pending.clear()
+        self.__size = 0
+
+    def flush(self) -> None:
+        """Merges buffered keys into the arrays and drops deleted entries."""
+        keys = self.__keys
+        values = self.__values
+        if not self.__alive.all():
+            keys = keys[self.__alive]
+            values = values[self.__alive]
+
+        pending = self.__pending
+        if len(pending) > 0:
+            keys = numpy.concatenate(
+                [
+                    keys,
+                    numpy.fromiter(
+                        pending.keys(), dtype=self.__key_dtype, count=len(pending)
+                    ),
+                ]
+            )
+            values = numpy.concatenate(
+                [
+                    values,
+                    numpy.fromiter(
+                        pending.values(), dtype=self.__value_dtype, count=len(pending)
+                    ),
+                ]
+            )
+            order = numpy.argsort(keys, kind="stable")
+            keys = keys[order]
+            values = values[order]
+            pending.clear()
+
+        self.__set_arrays(keys, values)
+
+    def __set_arrays(self, keys: numpy.ndarray, values: numpy.ndarray) -> None:
+        """Replaces the arrays with fully live, sorted arrays."""
+        if self.__delete_when_default:
+            is_not_default = values != self.__default_value
+            keys = keys[is_not_default]
+            values = values[is_not_default]
+        self.__keys = keys
+        self.__values = values
+        self.__alive = numpy.ones(len(keys), dtype=bool)
+        self.__size = len(keys)
+
+    def add_many(self, keys: Any, values: Any) -> None:
+        """
+        Adds the values to the entries of the keys in bulk, i.e.,
+        ``self[key] += value`` for all pairs. Repeated keys are summed.
+        :param keys: An array-like of keys.
+        :param values: An array-like of values, or a single value.
+        """
+        self.flush()
+        keys = _cast_array(keys, self.__key_dtype)
+        values = numpy.broadcast_to(_cast_array(values, self.__value_dtype), keys.shape)
+        unique_keys, inverse = numpy.unique(keys, return_inverse=True)
+        sums = numpy.zeros(len(unique_keys), dtype=self.__value_dtype)
+        numpy.add.at(sums, inverse.ravel(), values.ravel())
+
+        # Updates existing entries in place.
+        current_keys = self.__keys
+        positions = current_keys.searchsorted(unique_keys)
+        positions[positions == len(current_keys)] = 0
+        exists = (
+            current_keys[positions] == unique_keys
+            if len(current_keys) > 0
+            else numpy.zeros(len(unique_keys), dtype=bool)
+        )
+        current_values = self.__values
+        current_values[positions[exists]] += sums[exists]
+
+        # Merges new entries.
+        new_keys = unique_keys[~exists]
+        new_values = sums[~exists] + self.__default_value
+        merged_keys = numpy.concatenate([current_keys, new_keys])
+        merged_values = numpy.concatenate([current_values, new_values])
+        order = numpy.argsort(merged_keys, kind="stable")
+        self.__set_arrays(merged_keys[order], merged_values[order])
+
+    def to_numpy(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Returns copies of the sorted keys and their values."""
+        self.flush()
+        return self.__keys.copy(), self.__values.copy()
+
+    def to_dict(self) -> Dict[_KT, Number]:
+        """Returns the entries as a plain dictionary."""
+        self.flush()
+        return dict(zip(self.__keys.tolist(), self.__values.tolist()))
+
+    def __repr__(self) -> str:
+        return f"CompactSafeDict({self.to_dict()})"
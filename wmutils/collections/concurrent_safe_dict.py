@@ -0,0 +1,153 @@
+"""
+Implements a thread-safe ``SafeDict`` that splits its entries over
+multiple independently locked shards, s.t. threads that update
+different keys rarely wait on each other.
+"""
+
+from collections.abc import MutableMapping
+import threading
+from typing import Any, Callable, Dict, Generic, Iterator, List, Tuple, TypeVar
+
+from wmutils.collections.safe_dict import SafeDict
+
+
+_KT = TypeVar("_KT")
+_VT = TypeVar("_VT")
+
+
+class ConcurrentSafeDict(MutableMapping, Generic[_KT, _VT]):
+    """
+    Thread-safe ``SafeDict``. Every key belongs to one of ``shard_count`` shards,
+    which each have their own lock. Reading a missing key, ``increment``, and
+    ``update_with`` are atomic, so concurrent updates are never lost.
+    Use ``snapshot`` to get a consistent-per-shard plain ``SafeDict`` copy.
+    """
+
+    def __init__(
+        self,
+        default_value,
+        shard_count: int = 16,
+        initial_mapping: "Dict[_KT, _VT] | None" = None,
+        **kwargs,
+    ):
+        """
+        :param default_value: The default value for entries; see ``SafeDict``.
+        :param shard_count: The number of independently locked shards (min. 1).
+        :param initial_mapping: Can be set to come with a pre-filled mapping.
+        :param **kwargs: Any other parameter of ``SafeDict``.
+        """
+        if shard_count < 1:
+            raise ValueError("You can't have less than one shard.")
+
+        self.__default_value = default_value
+        self.__safe_dict_kwargs: Dict[str, Any] = kwargs
+        self.__shards: List[SafeDict[_KT, _VT]] = [
+            SafeDict(default_value, **kwargs) for _ in range(shard_count)
+        ]
+        self.__locks: List[threading.Lock] = [
+            threading.Lock() for _ in range(shard_count)
+        ]
+
+        if not initial_mapping is None:
+            for key, value in initial_mapping.items():
+                self.__shards[hash(key) % shard_count][key] = value
+
+    @property
+    def shard_count(self) -> int:
+        return len(self.__shards)
+
+    def __shard_index(self, key: _KT) -> int:
+        return hash(key) % len(self.__shards)
+
+    def __getitem__(self, __key: _KT) -> _VT:
+        index = self.__shard_index(__key)
+        with self.__locks[index]:
+            return self.__shards[index][__key]
+
+    def __setitem__(self, __key: _KT, __value: _VT) -> None:
+        index = self.__shard_index(__key)
+        with self.__locks[index]:
+            self.__shards[index][__key] = __value
+
+    def __delitem__(self, __key: _KT) -> None:
+        index = self.__shard_index(__key)
+        with self.__locks[index]:
+            del self.__shards[index][__key]
+
+    def __contains__(self, __key: object) -> bool:
+        return __key in self.__shards[self.__shard_index(__key)]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.__shards)
+
+    def __iter__(self) -> Iterator[_KT]:
+        return iter(self.snapshot())
+
+    def get(self, __key: _KT, __default: Any = None) -> Any:
+        return self.__shards[self.__shard_index(__key)].get(__key, __default)
+
+    def pop(self, __key: _KT, *default: Any) -> Any:
+        """Atomically removes the entry and returns it, like ``dict.pop``."""
+        index = self.__shard_index(__key)
+        with self.__locks[index]:
+            return self.__shards[index].pop(__key, *default)
+
+    def setdefault(self, __key: _KT, __default: Any = None) -> Any:
+        """Atomically returns the entry, storing ``__default`` first if it's missing."""
+        index = self.__shard_index(__key)
+        with self.__locks[index]:
+            shard = self.__shards[index]
+            if __key in shard:
+                return shard[__key]
+            shard[__key] = __default
+            return __default
+
+    def popitem(self) -> Tuple[_KT, _VT]:
+        """Removes and returns an entry of the first non-empty shard."""
+        for lock, shard in zip(self.__locks, self.__shards):
+            with lock:
+                if len(shard) > 0:
+                    return shard.popitem()
+        raise KeyError("popitem(): dictionary is empty")
+
+    def increment(self, __key: _KT, amount: Any = 1) -> _VT:
+        """Atomically adds ``amount`` to the entry and returns the new value."""
+        index = self.__shard_index(__key)
+        with self.__locks[index]:
+            shard = self.__shards[index]
+            value = shard[__key] + amount
+            shard[__key] = value
+            return value
+
+    def update_with(self, __key: _KT, update: Callable[[_VT], _VT]) -> _VT:
+        """
+        Atomically replaces the entry with ``update(entry)`` and returns the new value.
+        ``update`` is called while the shard is locked, so it should be cheap and
+        must not access this dictionary.
+        """
+        index = self.__shard_index(__key)
+        with self.__locks[index]:
+            shard = self.__shards[index]
+            value = update(shard[__key])
+            shard[__key] = value
+            return value
+
+    def snapshot(self) -> SafeDict[_KT, _VT]:
+        """
+        Returns a copy of all entries as a regular ``SafeDict``.
+        Shards are copied one at a time using native ``dict`` copies,
+        so writers are blocked only briefly.
+        """
+        snapshot = SafeDict(self.__default_value, **self.__safe_dict_kwargs)
+        for lock, shard in zip(self.__locks, self.__shards):
+            with lock:
+                dict.update(snapshot, shard)
+        return snapshot
+
+    def clear(self) -> None:
+        for lock, shard in zip(self.__locks, self.__shards):
+            with lock:
+                shard.clear()
+
+    def __repr__(self) -> str:
+        return f"ConcurrentSafeDict({dict(self.snapshot())})"
@@ -2,8 +2,14 @@
 Implements utility functions for interacting with dictionaries.
 """
 
-from typing import Dict, Any, List, TypeVar, Set
+from collections import Counter, defaultdict
+from typing import Dict, Any, List, TypeVar, Set, Iterator, Callable
 from numbers import Number
+from operator import itemgetter
+
+import numpy
+
+from wmutils.collections.safe_dict import SafeDict
 
 
 K = TypeVar("K")
@@ -149,3 +155,116 @@ def invert_dict(collection: Dict[K, V]) -> Dict[V, K]:
     its values and vice versa. Assumes all values are unique.
     """
     return {value: key for key, value in collection.items()}
+
+
+def group_by(
+    collection: Iterator[V],
+    key: Callable[[V], K],
+    value: "Callable[[V], Any] | None" = None,
+    container: "type | str" = list,
+    into: "SafeDict[K, Any] | None" = None,
+    use_numpy: bool = False,
+) -> SafeDict[K, Any]:
+    """
+    Groups all elements of the collection by their key in a single pass.
+    Replaces calling ``safe_add_list_element`` / ``safe_add_set_element`` per element.
+
+    :param collection: The grouped elements.
+    :param key: Method that returns the group key of an element.
+    :param value: Method that returns the value that is stored. Defaults to the element.
+    Ignored when counting.
+    :param container: How groups are stored: ``list``, ``set``, or ``"count"``.
+    :param into: An existing grouping that is updated instead of creating a new one.
+    :param use_numpy: Groups using numpy. Only valid if all keys are integers;
+    raises a ``ValueError`` otherwise.
+    :return: A ``SafeDict`` with the groups, to which new elements can be added
+    with ``group_by(..., into=grouping)`` or ``grouping[key].append(value)``.
+    """
+    if container not in (list, set, "count"):
+        raise ValueError(f"Unsupported container {container}.")
+
+    if container == "count":
+        if use_numpy:
+            keys = _to_integer_keys(list(map(key, collection)))
+            unique_keys, counts = numpy.unique(keys, return_counts=True)
+            groups = dict(zip(unique_keys.tolist(), counts.tolist()))
+        else:
+            groups = Counter(map(key, collection))
+        if into is None:
+            return SafeDict(0, initial_mapping=groups)
+        for group_key, count in groups.items():
+            into[group_key] += count
+        return into
+
+    if value is None:
+        value = _identity
+    if use_numpy:
+        groups = _group_by_integer_keys(collection, key, value)
+    else:
+        groups = defaultdict(list)
+        for element in collection:
+            groups[key(element)].append(value(element))
+
+    if container is set:
+        groups = {group_key: set(group) for group_key, group in groups.items()}
+    if into is None:
+        return SafeDict(container, initial_mapping=groups)
+    for group_key, group in groups.items():
+        if container is set:
+            into[group_key].update(group)
+        else:
+            into[group_key].extend(group)
+    return into
+
+
+def _identity(element: V) -> V:
+    return element
+
+
+def _to_integer_keys(keys: List[Any]) -> numpy.ndarray:
+    """Returns the keys as a numpy array, raising a ``ValueError`` unless they're all integers."""
+    if len(keys) == 0:
+        return numpy.empty(0, dtype=numpy.int64)
+    array = numpy.asarray(keys)
+    if array.ndim != 1 or not array.dtype.kind in "iu":
+        raise ValueError("Grouping with numpy requires integer keys.")
+    return array
+
+
+def _group_by_integer_keys(
+    collection: Iterator[V], key: Callable[[V], int], value: Callable[[V], Any]
+) -> Dict[int, List[Any]]:
+    """Groups elements by sorting their integer keys with numpy."""
+    keys = []
+    values = []
+    for element in collection:
+        keys.append(key(element))
+        values.append(value(element))
+    keys = _to_integer_keys(keys)
+
+    order = numpy.argsort(keys, kind="stable")
+    unique_keys, starts = numpy.unique(keys[order], return_index=True)
+    ends = numpy.append(starts[1:], len(keys))
+    sorted_values = [values[position] for position in order.tolist()]
+    return {
+        group_key: sorted_values[start:end]
+        for group_key, start, end in zip(
+            unique_keys.tolist(), starts.tolist(), ends.tolist()
+        )
+    }
+
+
+def invert_multi(
+    collection: Dict[K, V], container: type = list
+) -> SafeDict[V, "List[K] | Set[K]"]:
+    """
+    Inverts the dictionary such that the keys become its values and vice versa.
+    Unlike ``invert_dict``, repeated values map to all of their keys.
+    :param container: How keys are stored: ``list`` or ``set``.
+    """
+    return group_by(
+        collection.items(),
+        key=itemgetter(1),
+        value=itemgetter(0),
+        container=container,
+    )
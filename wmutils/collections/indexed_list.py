@@ -0,0 +1,177 @@
+"""
+Implements a list that keeps a hash index of its values,
+s.t. looking up the position of a value is O(1) instead of O(n).
+"""
+
+from bisect import bisect_left, insort
+from typing import Any, Dict, Generic, Iterator, List, TypeVar
+
+
+T = TypeVar("T")
+
+
+class IndexedList(list, Generic[T]):
+    """
+    List with a value -> positions index. Appending and extending update the
+    index incrementally; mutations that shift positions (e.g., ``insert``,
+    ``remove``, slice assignment, sorting) invalidate it, and it's rebuilt in
+    one pass on the next lookup. Unhashable values are supported, but their
+    lookups fall back to a linear scan.
+    """
+
+    def __init__(self, iterable: Iterator[T] = ()) -> None:
+        super().__init__(iterable)
+        self.__positions: "Dict[T, List[int]] | None" = None
+
+    def __reduce__(self):
+        """Serializes the list without its index, which is rebuilt when needed."""
+        return type(self), (list(self),)
+
+    def __get_positions(self) -> Dict[T, List[int]]:
+        """Returns the index, rebuilding it if it's invalid."""
+        if self.__positions is None:
+            positions = {}
+            for position, value in enumerate(self):
+                try:
+                    positions.setdefault(value, []).append(position)
+                except TypeError:
+                    pass
+            self.__positions = positions
+        return self.__positions
+
+    def __add_positions(self, start: int) -> None:
+        """Adds all elements from ``start`` onwards to a valid index."""
+        positions = self.__positions
+        if positions is None:
+            return
+        for position in range(start, len(self)):
+            try:
+                positions.setdefault(self[position], []).append(position)
+            except TypeError:
+                pass
+
+    def __invalidate(self) -> None:
+        self.__positions = None
+
+    def positions_of(self, value: T) -> List[int]:
+        """Returns all positions of the value in ascending order."""
+        try:
+            return list(self.__get_positions().get(value, ()))
+        except TypeError:
+            return [
+                position for position, element in enumerate(self) if element == value
+            ]
+
+    def safe_index(self, value: T) -> int:
+        """Returns the first position of the value, or -1 if it isn't present."""
+        try:
+            positions = self.__get_positions().get(value)
+        except TypeError:
+            try:
+                return super().index(value)
+            except ValueError:
+                return -1
+        return -1 if positions is None else positions[0]
+
+    def contains(self, value: T) -> bool:
+        """Returns true if the value is present."""
+        return self.safe_index(value) != -1
+
+    def index(self, value: T, start: int = 0, stop: "int | None" = None) -> int:
+        if stop is None:
+            stop = len(self)
+        try:
+            positions = self.__get_positions().get(value, ())
+        except TypeError:
+            return super().index(value, start, stop)
+        start, stop, _ = slice(start, stop).indices(len(self))
+        offset = bisect_left(positions, start)
+        if offset < len(positions) and positions[offset] < stop:
+            return positions[offset]
+        raise ValueError(f"{value!r} is not in list")
+
+    def count(self, value: T) -> int:
+        try:
+            return len(self.__get_positions().get(value, ()))
+        except TypeError:
+            return super().count(value)
+
+    def __contains__(self, value: object) -> bool:
+        return self.contains(value)
+
+    def append(self, value: T) -> None:
+        super().append(value)
+        self.__add_positions(len(self) - 1)
+
+    def extend(self, iterable: Iterator[T]) -> None:
+        start = len(self)
+        super().extend(iterable)
+        self.__add_positions(start)
+
+    def __iadd__(self, iterable: Iterator[T]) -> "IndexedList[T]":
+        self.extend(iterable)
+        return self
+
+    def __setitem__(self, key: "int | slice", value: Any) -> None:
+        if isinstance(key, slice) or self.__positions is None:
+            super().__setitem__(key, value)
+            self.__invalidate()
+            return
+        position = key + len(self) if key < 0 else key
+        old_value = self[position]
+        super().__setitem__(key, value)
+        try:
+            old_positions = self.__positions[old_value]
+            del old_positions[bisect_left(old_positions, position)]
+            if len(old_positions) == 0:
+                del self.__positions[old_value]
+        except TypeError:
+            pass
+        try:
+            insort(self.__positions.setdefault(value, []), position)
+        except TypeError:
+            pass
+
+    def pop(self, index: int = -1) -> T:
+        if index != -1 and index != len(self) - 1:
+            self.__invalidate()
+            return super().pop(index)
+        value = super().pop()
+        if self.__positions is not None:
+            try:
+                positions = self.__positions[value]
+                positions.pop()
+                if len(positions) == 0:
+                    del self.__positions[value]
+            except TypeError:
+                pass
+        return value
+
+    def insert(self, index: int, value: T) -> None:
+        super().insert(index, value)
+        self.__invalidate()
+
+    def remove(self, value: T) -> None:
+        super().remove(value)
+        self.__invalidate()
+
+    def __delitem__(self, key: "int | slice") -> None:
+        super().__delitem__(key)
+        self.__invalidate()
+
+    def __imul__(self, value: int) -> "IndexedList[T]":
+        result = super().__imul__(value)
+        self.__invalidate()
+        return result
+
+    def clear(self) -> None:
+        super().clear()
+        self.__invalidate()
+
+    def sort(self, *args, **kwargs) -> None:
+        super().sort(*args, **kwargs)
+        self.__invalidate()
+
+    def reverse(self) -> None:
+        super().reverse()
+        self.__invalidate()
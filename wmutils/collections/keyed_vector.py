@@ -0,0 +1,226 @@
+"""
+Implements array-backed numeric vectors with named keys, which are
+a fast alternative to ``add_dict`` and ``subtract_dict`` when
+many large dictionaries with the same keys are combined.
+"""
+
+from collections.abc import Mapping
+from numbers import Number
+from typing import Any, Callable, Dict, Generic, Iterator, List, TypeVar
+
+import numpy
+
+from wmutils.collections.safe_dict import SafeDict
+
+
+K = TypeVar("K")
+
+
+class KeyIndex(Generic[K]):
+    """
+    Immutable mapping from keys to array positions.
+    Vectors that share an index object are combined without any key lookups.
+    """
+
+    def __init__(self, keys: Iterator[K]) -> None:
+        self.__keys: List[K] = list(keys)
+        self.__positions: Dict[K, int] = {
+            key: position for position, key in enumerate(self.__keys)
+        }
+        if len(self.__positions) != len(self.__keys):
+            raise ValueError("Keys must be unique.")
+
+    @property
+    def keys(self) -> List[K]:
+        return self.__keys
+
+    def position(self, key: K) -> int:
+        """Returns the array position of the key."""
+        return self.__positions[key]
+
+    def positions(self, keys: Iterator[K]) -> numpy.ndarray:
+        """Returns the array positions of all of the keys."""
+        positions = self.__positions
+        return numpy.fromiter((positions[key] for key in keys), dtype=numpy.intp)
+
+    def has_same_keys(self, other: "KeyIndex[K]") -> bool:
+        """Returns true if both indices contain exactly the same keys."""
+        if other is self:
+            return True
+        return len(other) == len(self) and all(
+            key in self.__positions for key in other.keys
+        )
+
+    def __contains__(self, key: K) -> bool:
+        return key in self.__positions
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self.__keys)
+
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+
+class KeyedVector(Mapping, Generic[K]):
+    """
+    Numeric vector of which each entry is identified by a key.
+    It behaves like a read-only dictionary whose values can be
+    updated, added, subtracted, and scaled in bulk.
+    """
+
+    def __init__(self, index: KeyIndex[K], values: "numpy.ndarray | None" = None):
+        """
+        :param index: The key index of the vector.
+        :param values: The values of the vector, ordered by the index.
+        Defaults to zeros.
+        """
+        if values is None:
+            values = numpy.zeros(len(index))
+        values = numpy.asarray(values)
+        if values.shape != (len(index),):
+            raise ValueError("Values don't match the key index.")
+        self.__index: KeyIndex[K] = index
+        self.__values: numpy.ndarray = values
+
+    @staticmethod
+    def from_dict(
+        collection: "Dict[K, Number] | SafeDict[K, Number]",
+        index: "KeyIndex[K] | None" = None,
+        dtype: Any = None,
+    ) -> "KeyedVector[K]":
+        """
+        Creates a vector from a dictionary.
+        :param collection: The source dictionary (or ``SafeDict``).
+        :param index: The key index that is used. Pass the index of another
+        vector to make operations between the two cheap.
+        :param dtype: The numpy dtype of the values. Inferred if not specified.
+        """
+        if index is None:
+            index = KeyIndex(collection.keys())
+        elif len(index) != len(collection) or not all(
+            key in collection for key in index.keys
+        ):
+            raise ValueError("Elements don't have the same keys.")
+        values = numpy.array([collection[key] for key in index.keys], dtype=dtype)
+        return KeyedVector(index, values)
+
+    @property
+    def index(self) -> KeyIndex[K]:
+        return self.__index
+
+    @property
+    def values(self) -> numpy.ndarray:
+        return self.__values
+
+    def to_dict(self) -> Dict[K, Number]:
+        """Returns the vector as a plain dictionary."""
+        return dict(zip(self.__index.keys, self.__values.tolist()))
+
+    def to_safe_dict(
+        self, default_value: Any = 0, *args, **kwargs
+    ) -> SafeDict[K, Number]:
+        """
+        Returns the vector as a ``SafeDict``.
+        :param default_value: The default value of the new ``SafeDict``.
+        :param *args, **kwargs: Any other parameter of the ``SafeDict``.
+        """
+        return SafeDict(default_value, *args, initial_mapping=self.to_dict(), **kwargs)
+
+    def copy(self) -> "KeyedVector[K]":
+        return KeyedVector(self.__index, self.__values.copy())
+
+    def aligned_values(self, other: "KeyedVector[K]") -> numpy.ndarray:
+        """
+        Returns the values of ``other`` ordered by the index of this vector.
+        Raises a ``ValueError`` if the vectors don't have the same keys.
+        """
+        if other.index is self.__index:
+            return other.values
+        if not self.__index.has_same_keys(other.index):
+            raise ValueError("Elements don't have the same keys.")
+        return other.values[other.index.positions(self.__index.keys)]
+
+    def scale(self, factor: Number) -> "KeyedVector[K]":
+        """Returns a new vector with all values multiplied by ``factor``."""
+        return KeyedVector(self.__index, self.__values * factor)
+
+    def __getitem__(self, key: K) -> Number:
+        return self.__values[self.__index.position(key)].item()
+
+    def __setitem__(self, key: K, value: Number) -> None:
+        self.__values[self.__index.position(key)] = value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__index
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self.__index)
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+    def __add__(self, other: "KeyedVector[K]") -> "KeyedVector[K]":
+        return KeyedVector(self.__index, self.__values + self.aligned_values(other))
+
+    def __sub__(self, other: "KeyedVector[K]") -> "KeyedVector[K]":
+        return KeyedVector(self.__index, self.__values - self.aligned_values(other))
+
+    def __iadd__(self, other: "KeyedVector[K]") -> "KeyedVector[K]":
+        other_values = self.aligned_values(other)
+        self.__promote(other_values)
+        self.__values += other_values
+        return self
+
+    def __isub__(self, other: "KeyedVector[K]") -> "KeyedVector[K]":
+        other_values = self.aligned_values(other)
+        self.__promote(other_values)
+        self.__values -= other_values
+        return self
+
+    def __promote(self, other_values: numpy.ndarray) -> None:
+        """
+        Converts the values to a dtype that can hold the result of combining them
+        with ``other_values``, e.g., to floats when adding floats to integers.
+        """
+        dtype = numpy.result_type(self.__values, other_values)
+        if dtype != self.__values.dtype:
+            self.__values = self.__values.astype(dtype)
+
+    def __mul__(self, factor: Number) -> "KeyedVector[K]":
+        return self.scale(factor)
+
+    def __rmul__(self, factor: Number) -> "KeyedVector[K]":
+        return self.scale(factor)
+
+    def __neg__(self) -> "KeyedVector[K]":
+        return KeyedVector(self.__index, -self.__values)
+
+    def __repr__(self) -> str:
+        return f"KeyedVector({self.to_dict()})"
+
+
+def reduce_vectors(
+    vectors: Iterator[KeyedVector[K]],
+    operator: Callable = numpy.add,
+) -> KeyedVector[K]:
+    """
+    Combines all vectors into one, e.g., summing thousands of count vectors.
+    The result is accumulated in place, so only one extra vector is allocated.
+    :param vectors: The vectors that are combined. They must have the same keys.
+    :param operator: A numpy ufunc that combines two arrays, e.g., ``numpy.add``,
+    ``numpy.subtract``, ``numpy.maximum``.
+    """
+    vectors = iter(vectors)
+    try:
+        result = next(vectors)
+    except StopIteration:
+        raise ValueError("Can't reduce an empty collection of vectors.")
+    values = result.values.copy()
+    for vector in vectors:
+        other_values = result.aligned_values(vector)
+        dtype = numpy.result_type(values, other_values)
+        if dtype != values.dtype:
+            # Promotes the accumulator, e.g., when float vectors follow int vectors.
+            values = values.astype(dtype)
+        operator(values, other_values, out=values)
+    return KeyedVector(result.index, values)
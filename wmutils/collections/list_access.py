@@ -1,32 +1,195 @@
-from typing import Iterator, Any, Callable, List, Sequence
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from itertools import chain
+from typing import Iterator, Any, Callable, List, Sequence, Deque, Dict, Tuple
+
+import numpy
+
+from wmutils.collections.indexed_list import IndexedList
 
 
 def resolve_callables_in_list(
-    coll: "Iterator[Any | Callable]", *args, **kwargs
+    coll: "Iterator[Any | Callable]",
+    *args,
+    thread_count: int = 1,
+    memoize: bool = False,
+    **kwargs,
 ) -> Iterator[Any]:
-    for entry in coll:
-        if isinstance(entry, Callable):
-            entry = entry(*args, **kwargs)
-        yield entry
+    """
+    Yields the entries of the collection, replacing callables with their result.
+
+    :param coll: The resolved collection.
+    :param thread_count: The number of threads used to evaluate callables concurrently
+    (e.g., for I/O-bound fetches). The output order is preserved, and at most
+    ``2 * thread_count`` callables are evaluated ahead of the consumer.
+    :param memoize: Whether identical callables are evaluated only once.
+    :param *args, **kwargs: Parameters that are passed to the callables.
+    """
+    if thread_count < 1:
+        raise ValueError("You can't have less than one thread.")
+
+    memo = {} if memoize else None
+    if thread_count == 1:
+        for entry in coll:
+            if isinstance(entry, Callable):
+                entry = _resolve_callable(entry, memo, entry, args, kwargs)
+            yield entry
+        return
+
+    executor = ThreadPoolExecutor(thread_count)
+    pending: Deque[Future] = deque()
+    try:
+        for entry in coll:
+            if isinstance(entry, Callable):
+                pending.append(
+                    _resolve_callable(
+                        entry, memo, partial(executor.submit, entry), args, kwargs
+                    )
+                )
+            else:
+                future = Future()
+                future.set_result(entry)
+                pending.append(future)
+            while len(pending) > 2 * thread_count:
+                yield pending.popleft().result()
+        while len(pending) > 0:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
 
 
-def safe_index(list: List, entry: object) -> int:
+def _resolve_callable(
+    entry: Callable,
+    memo: "Dict[Callable, Any] | None",
+    call: Callable,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+) -> Any:
+    """Calls ``call`` with the parameters, reusing memoized results of ``entry``."""
+    if memo is None:
+        return call(*args, **kwargs)
+    try:
+        if entry in memo:
+            return memo[entry]
+    except TypeError:
+        # Unhashable callables can't be memoized.
+        return call(*args, **kwargs)
+    result = call(*args, **kwargs)
+    memo[entry] = result
+    return result
+
+
+def safe_index(list: "List | IndexedList", entry: object) -> int:
+    """
+    Returns the position of the entry, or -1 if it isn't present.
+    This is O(1) for an ``IndexedList``, and O(n) otherwise.
+    """
+    if isinstance(list, IndexedList):
+        return list.safe_index(entry)
     try:
         return list.index(entry)
     except ValueError:
         return -1
 
 
-def flatten(iterator: "Iterator[Iterator | Any]") -> Iterator[Any]:
+def flatten(
+    iterator: "Iterator[Iterator | Any]", max_depth: "int | None" = None
+) -> Iterator[Any]:
     """
     Flattens Iterator with nested Iterators.
+    Uses an explicit stack, so arbitrarily deep inputs don't hit the recursion limit.
+    Lists or tuples of flat lists or tuples are flattened by ``itertools.chain``.
+    Numpy arrays count one nesting level per dimension, and their flattened
+    dimensions are merged using ``reshape``, or ``ravel`` if all of them are.
+
+    :param iterator: The flattened iterator.
+    :param max_depth: The maximum number of nested levels that are flattened.
+    Unlimited if ``None``.
     """
+    if _is_list_of_flat_lists(iterator, max_depth):
+        return chain.from_iterable(iterator)
+    return _flatten_nested(iterator, max_depth)
 
-    for element in iterator:
-        if (
-            isinstance(element, Iterator) or isinstance(element, Sequence)
-        ) and not isinstance(element, str):
-            for inner_element in flatten(element):
-                yield inner_element
+
+def _flatten_nested(
+    iterator: "Iterator[Iterator | Any]", max_depth: "int | None"
+) -> Iterator[Any]:
+    stack = [iter(iterator)]
+    while len(stack) > 0:
+        for element in stack[-1]:
+            if not _is_nested(element):
+                yield element
+            elif max_depth is not None and len(stack) > max_depth:
+                yield element
+            elif isinstance(element, numpy.ndarray):
+                levels = None if max_depth is None else max_depth - len(stack) + 1
+                yield from _flatten_array(element, levels)
+            elif max_depth is not None and len(stack) == max_depth:
+                # The elements of the deepest level are never flattened.
+                yield from element
+            else:
+                stack.append(iter(element))
+                break
         else:
-            yield element
+            stack.pop()
+
+
+def _is_list_of_flat_lists(iterator: Any, max_depth: "int | None") -> bool:
+    """Returns true if ``flatten`` can chain the elements of the iterator."""
+    if not (type(iterator) is list or type(iterator) is tuple) or max_depth == 0:
+        return False
+    for element in iterator:
+        if not (type(element) is list or type(element) is tuple):
+            return False
+    if max_depth == 1:
+        return True
+    for element in iterator:
+        for value in element:
+            if not type(value) in _SCALAR_TYPES:
+                return False
+    return True
+
+
+def _flatten_array(array: numpy.ndarray, levels: "int | None") -> numpy.ndarray:
+    """Merges the first ``levels`` dimensions of the array, or all if ``None``."""
+    if levels is None or levels >= array.ndim:
+        return array.ravel()
+    return array.reshape(-1, *array.shape[levels:])
+
+
+def flatten_to_array(
+    iterator: "Iterator[Iterator | Any]",
+    max_depth: "int | None" = None,
+    dtype: Any = None,
+) -> numpy.ndarray:
+    """
+    Same as ``flatten``, but returns a flat numpy array.
+    If all elements are numpy arrays, they're concatenated without iterating.
+    """
+    if not isinstance(iterator, Iterator):
+        elements = list(iterator)
+        if len(elements) > 0 and all(
+            isinstance(element, numpy.ndarray) for element in elements
+        ):
+            flat = numpy.concatenate([element.ravel() for element in elements])
+            return flat if dtype is None else flat.astype(dtype, copy=False)
+        iterator = elements
+    if dtype is None:
+        return numpy.array(list(flatten(iterator, max_depth)))
+    return numpy.fromiter(flatten(iterator, max_depth), dtype=dtype)
+
+
+_SCALAR_TYPES = {int, float, bool, complex, str, type(None), dict}
+
+
+def _is_nested(element: Any) -> bool:
+    """Returns true if the element is flattened."""
+    element_type = type(element)
+    if element_type is list or element_type is tuple:
+        return True
+    if element_type in _SCALAR_TYPES:
+        return False
+    return isinstance(element, (Iterator, Sequence, numpy.ndarray)) and not isinstance(
+        element, str
+    )
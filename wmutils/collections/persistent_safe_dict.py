@@ -0,0 +1,302 @@
+"""
+Implements a ``SafeDict`` that is stored in a local SQLite file,
+s.t. it can hold more entries than fit in memory.
+"""
+
+from collections.abc import ItemsView, MutableMapping, ValuesView
+import pickle
+import sqlite3
+from typing import Any, Callable, Dict, Generic, Iterator, List, Set, Tuple, TypeVar
+
+from wmutils.collections.safe_dict import _build_default_value_factory
+
+
+_KT = TypeVar("_KT")
+_VT = TypeVar("_VT")
+
+# Keys are looked up by their pickled representation, so its protocol is fixed.
+_KEY_PROTOCOL = 4
+_IMMUTABLE_TYPES = (int, float, complex, bool, str, bytes, tuple, frozenset, type(None))
+
+_MISSING = object()
+
+
+class PersistentSafeDict(MutableMapping, Generic[_KT, _VT]):
+    """
+    Disk-backed ``SafeDict``. Entries are pickled into a SQLite database,
+    and recently used entries are kept in an in-memory write-back cache.
+    Changes are written in batches of ``batch_size`` entries and whenever
+    ``flush`` or ``close`` is called. Reopening an existing file continues
+    where it left off.
+
+    Keys must be picklable, and equal keys must pickle identically
+    (e.g., don't mix ``1`` and ``1.0``). Values that are not immutable
+    primitives are written back whenever they're accessed, s.t. in-place
+    changes like ``sd[key].append(value)`` are persisted.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        default_value,
+        default_value_constructor_args: "List[Any] | None" = None,
+        default_value_constructor_kwargs: "Dict[str, Any] | None" = None,
+        delete_when_default: bool = False,
+        cache_size: int = 100_000,
+        batch_size: int = 10_000,
+    ):
+        """
+        :param file_path: The path of the SQLite file. It's created if it doesn't exist.
+        :param default_value: The default value for entries; see ``SafeDict``.
+        :param default_value_constructor_args: The constructor arguments for the default value.
+        :param default_value_constructor_kwargs: Named constructor arguments for the default value.
+        :param delete_when_default: Deletes entries whenever they are equal to the default value.
+        :param cache_size: The maximum number of entries that are kept in memory.
+        :param batch_size: The number of changed entries after which they are written to disk.
+        """
+        if cache_size < 1 or batch_size < 1:
+            raise ValueError("Cache and batch sizes must be at least 1.")
+
+        self.__file_path: str = file_path
+        self.__default_value: Any = default_value
+        self.__delete_when_default: bool = delete_when_default and not isinstance(
+            default_value, type
+        )
+        self.__default_value_factory: Callable[[], Any] = _build_default_value_factory(
+            default_value,
+            default_value_constructor_args or [],
+            default_value_constructor_kwargs or {},
+        )
+        try:
+            self.__default_value_factory()
+        except Exception as ex:
+            raise ValueError("Default is invalid.", ex)
+
+        self.__cache_size: int = cache_size
+        self.__batch_size: int = batch_size
+        self.__cache: Dict[_KT, _VT] = {}
+        self.__dirty: Set[_KT] = set()
+        self.__evicted: Dict[_KT, _VT] = {}
+        self.__deleted: Set[_KT] = set()
+
+        self.__connection = sqlite3.connect(file_path)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(key BLOB PRIMARY KEY, value BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self.__connection.commit()
+
+    @property
+    def file_path(self) -> str:
+        return self.__file_path
+
+    @property
+    def default_value(self) -> Any:
+        return self.__default_value
+
+    @property
+    def delete_when_default(self) -> bool:
+        return self.__delete_when_default
+
+    def __load(self, key: _KT) -> Any:
+        """Returns the stored value of the key, or ``_MISSING``."""
+        if key in self.__deleted:
+            return _MISSING
+        if key in self.__evicted:
+            return self.__evicted[key]
+        row = self.__connection.execute(
+            "SELECT value FROM entries WHERE key = ?",
+            (pickle.dumps(key, protocol=_KEY_PROTOCOL),),
+        ).fetchone()
+        if row is None:
+            return _MISSING
+        return pickle.loads(row[0])
+
+    def __cache_value(self, key: _KT, value: _VT, is_dirty: bool) -> None:
+        """Stores the value as the most recently used entry of the cache."""
+        cache = self.__cache
+        cache.pop(key, None)
+        cache[key] = value
+        if self.__evicted.pop(key, _MISSING) is not _MISSING:
+            is_dirty = True
+        while len(cache) > self.__cache_size:
+            oldest = next(iter(cache))
+            oldest_value = cache.pop(oldest)
+            if oldest in self.__dirty or not isinstance(oldest_value, _IMMUTABLE_TYPES):
+                self.__dirty.discard(oldest)
+                self.__evicted[oldest] = oldest_value
+                if len(self.__evicted) >= self.__batch_size:
+                    self.flush()
+        if is_dirty:
+            # Flushes before marking the key (and after evicting), as its value
+            # may be changed in place by the caller after this method returns.
+            if len(self.__dirty) >= self.__batch_size:
+                self.flush()
+            self.__dirty.add(key)
+            self.__deleted.discard(key)
+
+    def __getitem__(self, __key: _KT) -> _VT:
+        value = self.__cache.get(__key, _MISSING)
+        is_dirty = False
+        if value is _MISSING:
+            value = self.__load(__key)
+            if value is _MISSING:
+                value = self.__default_value_factory()
+                is_dirty = True
+        self.__cache_value(
+            __key, value, is_dirty or not isinstance(value, _IMMUTABLE_TYPES)
+        )
+        return value
+
+    def __setitem__(self, __key: _KT, __value: _VT) -> None:
+        if self.__delete_when_default and __value == self.__default_value:
+            if __key in self:
+                del self[__key]
+        else:
+            self.__cache_value(__key, __value, True)
+
+    def __delitem__(self, __key: _KT) -> None:
+        if not __key in self:
+            raise KeyError(__key)
+        self.__cache.pop(__key, None)
+        self.__evicted.pop(__key, None)
+        self.__dirty.discard(__key)
+        self.__deleted.add(__key)
+        if len(self.__deleted) >= self.__batch_size:
+            self.flush()
+
+    def __contains__(self, __key: object) -> bool:
+        if __key in self.__cache:
+            return True
+        return self.__load(__key) is not _MISSING
+
+    def __len__(self) -> int:
+        self.flush()
+        return self.__connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __iter__(self) -> Iterator[_KT]:
+        self.flush()
+        # Iterating the cursor reads the keys lazily, s.t. they don't all have to fit
+        # in memory. Like for a ``dict``, entries must not be added or deleted meanwhile.
+        for (key,) in self.__connection.execute("SELECT key FROM entries"):
+            yield pickle.loads(key)
+
+    def __iterate_items(self) -> Iterator[Tuple[_KT, _VT]]:
+        """
+        Yields all entries without caching them, s.t. reading them doesn't
+        cause write-backs. Cached values are yielded as they are.
+        """
+        self.flush()
+        cache = self.__cache
+        for key, value in self.__connection.execute("SELECT key, value FROM entries"):
+            key = pickle.loads(key)
+            cached_value = cache.get(key, _MISSING)
+            yield key, pickle.loads(value) if cached_value is _MISSING else cached_value
+
+    def items(self) -> ItemsView:
+        """
+        Returns a view of the entries that is read lazily. Unlike ``sd[key]``,
+        iterating it doesn't mark values for write-back, so in-place changes
+        of values that weren't cached aren't persisted.
+        """
+        return _ReadOnlyItemsView(self, self.__iterate_items)
+
+    def values(self) -> ValuesView:
+        """Returns a view of the values that is read lazily; see ``items``."""
+        return _ReadOnlyValuesView(self, self.__iterate_items)
+
+    def get(self, __key: _KT, __default: Any = None) -> Any:
+        value = self.__cache.get(__key, _MISSING)
+        if value is _MISSING:
+            value = self.__load(__key)
+        return __default if value is _MISSING else value
+
+    def flush(self) -> None:
+        """Writes all changes to disk in a single transaction."""
+        if (
+            len(self.__dirty) == 0
+            and len(self.__evicted) == 0
+            and len(self.__deleted) == 0
+        ):
+            return
+        changes = [(key, self.__cache[key]) for key in self.__dirty]
+        changes.extend(self.__evicted.items())
+        with self.__connection:
+            self.__connection.executemany(
+                "DELETE FROM entries WHERE key = ?",
+                (
+                    (pickle.dumps(key, protocol=_KEY_PROTOCOL),)
+                    for key in self.__deleted
+                ),
+            )
+            self.__connection.executemany(
+                "INSERT OR REPLACE INTO entries (key, value) VALUES (?, ?)",
+                (
+                    (
+                        pickle.dumps(key, protocol=_KEY_PROTOCOL),
+                        pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                    )
+                    for key, value in changes
+                ),
+            )
+        self.__dirty.clear()
+        self.__evicted.clear()
+        self.__deleted.clear()
+
+    def clear(self) -> None:
+        with self.__connection:
+            self.__connection.execute("DELETE FROM entries")
+        self.__cache.clear()
+        self.__dirty.clear()
+        self.__evicted.clear()
+        self.__deleted.clear()
+
+    def close(self) -> None:
+        """Writes all changes to disk and closes the file."""
+        self.flush()
+        self.__connection.close()
+
+    def __enter__(self) -> "PersistentSafeDict[_KT, _VT]":
+        return self
+
+    def __exit__(self, type, value, traceback) -> None:
+        self.close()
+
+
+class _ReadOnlyItemsView(ItemsView):
+    """Items view that is iterated with the given function."""
+
+    def __init__(
+        self, mapping: PersistentSafeDict, iterate_items: Callable[[], Iterator]
+    ) -> None:
+        super().__init__(mapping)
+        self.__iterate_items = iterate_items
+
+    def __contains__(self, item: object) -> bool:
+        key, value = item
+        stored_value = self._mapping.get(key, _MISSING)
+        return stored_value is value or stored_value == value
+
+    def __iter__(self) -> Iterator[Tuple[Any, Any]]:
+        return self.__iterate_items()
+
+
+class _ReadOnlyValuesView(ValuesView):
+    """Values view that is iterated with the given items function."""
+
+    def __init__(
+        self, mapping: PersistentSafeDict, iterate_items: Callable[[], Iterator]
+    ) -> None:
+        super().__init__(mapping)
+        self.__iterate_items = iterate_items
+
+    def __contains__(self, value: object) -> bool:
+        return any(
+            stored_value is value or stored_value == value for stored_value in self
+        )
+
+    def __iter__(self) -> Iterator[Any]:
+        for _, value in self.__iterate_items():
+            yield value
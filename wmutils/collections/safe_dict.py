@@ -1,9 +1,14 @@
-from typing import TypeVar, Generic, List, Any, Dict, Callable
+from functools import partial
+from itertools import repeat
+from operator import add
+from typing import TypeVar, Generic, List, Any, Dict, Callable, Iterator
 
 
 _KT = TypeVar("_KT")
 _VT = TypeVar("_VT")
 
+_MISSING = object()
+
 
 class SafeDict(dict, Generic[_KT, _VT]):
     """
@@ -11,6 +16,9 @@ class SafeDict(dict, Generic[_KT, _VT]):
     a default value to a key if it doesn't exist yet.
     This is greatly helpful when preventing boilerplate
     code that adds defaults.
+
+    Missing keys are resolved through ``dict.__missing__``,
+    so accessing existing keys runs at native ``dict`` speed.
     """
 
     def __init__(
@@ -42,7 +50,9 @@ class SafeDict(dict, Generic[_KT, _VT]):
             super().__init__(initial_mapping)
 
         self.__default_value: Any = default_value
-        self.__delete_when_default: bool = delete_when_default
+        self.__delete_when_default: bool = delete_when_default and not isinstance(
+            default_value, type
+        )
 
         # Sets default constructor arguments.
         self.__default_value_constructor_args: List[Any] = (
@@ -52,63 +62,190 @@ class SafeDict(dict, Generic[_KT, _VT]):
             default_value_constructor_kwargs or {}
         )
 
-        # Builds default value method.
-        self.__default_value_method: Callable = self.__build_default_value_method(
-            self.__default_value
+        # Builds default value factory.
+        self.__default_value_factory: Callable[[], Any] = _build_default_value_factory(
+            self.__default_value,
+            self.__default_value_constructor_args,
+            self.__default_value_constructor_kwargs,
         )
 
         super().__init__(*args, **kwargs)
 
-        # Tests the default value method to ensure this is yielded.
+        # Tests the default value factory to ensure this is yielded.
         try:
-            self.__get_default_value()
+            self.__default_value_factory()
         except Exception as ex:
             raise ValueError("Default is invalid.", ex)
 
-    def __build_default_value_method(
-        self, default_value: "type | Callable | Any"
-    ) -> Callable:
-        """Simple factory method for supported default value types."""
-        if isinstance(default_value, type):
-            self.__delete_when_default = False
-            return _get_default_from_type
-        elif isinstance(default_value, Callable):
-            return _get_default_from_callable
-        else:
-            return _get_default_from_primitive
-
-    def __get_default_value(self) -> Any:
-        """Returns the default value."""
-        return self.__default_value_method(
-            self.__default_value,
-            *self.__default_value_constructor_args,
-            **self.__default_value_constructor_kwargs,
+    def __new__(
+        cls,
+        default_value=None,
+        default_value_constructor_args=None,
+        default_value_constructor_kwargs=None,
+        initial_mapping=None,
+        delete_when_default: bool = False,
+        *args,
+        **kwargs,
+    ):
+        # Only dictionaries that delete default entries need a Python-level
+        # ``__setitem__``; all others use the native ``dict`` implementation.
+        if (
+            cls is SafeDict
+            and delete_when_default
+            and not isinstance(default_value, type)
+        ):
+            cls = _DeleteWhenDefaultSafeDict
+        return super().__new__(cls)
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        # ``__new__`` can't swap subclasses for ``_DeleteWhenDefaultSafeDict``,
+        # so those that don't override ``__setitem__`` check the flag on every write.
+        if cls.__setitem__ is dict.__setitem__:
+            cls.__setitem__ = _set_unless_default
+
+    @property
+    def default_value(self) -> Any:
+        return self.__default_value
+
+    @property
+    def delete_when_default(self) -> bool:
+        return self.__delete_when_default
+
+    def __missing__(self, __key: _KT) -> _VT:
+        value = self.__default_value_factory()
+        dict.__setitem__(self, __key, value)
+        return value
+
+    def __reduce__(self):
+        """
+        Serializes the dictionary as ``_restore_safe_dict(cls, default_value,
+        default_value_constructor_args, default_value_constructor_kwargs,
+        delete_when_default, entries, extra_state)``, where ``entries`` is a
+        plain ``dict`` (pickled natively) and ``extra_state`` contains the
+        attributes of subclasses. The default value factory is rebuilt when loading.
+        The default value must be picklable, so use a type, a module-level
+        function, or a ``functools.partial`` instead of a lambda.
+        """
+        extra_state = {
+            name: value
+            for name, value in self.__dict__.items()
+            if not name.startswith("_SafeDict__")
+        }
+        return (
+            _restore_safe_dict,
+            (
+                type(self),
+                self.__default_value,
+                self.__default_value_constructor_args or None,
+                self.__default_value_constructor_kwargs or None,
+                self.__delete_when_default,
+                dict(self),
+                extra_state,
+            ),
         )
 
-    def __getitem__(self, __key: _KT) -> None:
-        if not __key in self:
-            value = self.__get_default_value()
-            super().__setitem__(__key, value)
-        return super().__getitem__(__key)
+    def merge(
+        self, other: Dict[_KT, Any], operator: Callable[[_VT, Any], _VT] = add
+    ) -> "SafeDict[_KT, _VT]":
+        """
+        Merges the entries of another dictionary into this one in bulk,
+        s.t. ``self[key] = operator(self[key], value)`` for all entries in ``other``.
+        Missing keys start at the default value.
+        :param other: The merged dictionary (e.g., a partial result of a worker).
+        :param operator: Combines the current and the merged value. Defaults to ``+``.
+        :return: This dictionary.
+        """
+        factory = self.__default_value_factory
+        get = dict.get
+        merged = {}
+        for key, value in other.items():
+            current = get(self, key, _MISSING)
+            if current is _MISSING:
+                current = factory()
+            merged[key] = operator(current, value)
+        self.__set_many(merged)
+        return self
+
+    def merge_many(
+        self,
+        others: Iterator[Dict[_KT, Any]],
+        operator: Callable[[_VT, Any], _VT] = add,
+    ) -> "SafeDict[_KT, _VT]":
+        """Merges all of the dictionaries into this one; see ``merge``."""
+        for other in others:
+            self.merge(other, operator)
+        return self
+
+    def __set_many(self, entries: Dict[_KT, _VT]) -> None:
+        """Sets all entries, respecting ``delete_when_default``."""
+        if type(self).update is not dict.update:
+            # Subclasses that track updates handle each entry themselves.
+            self.update(entries)
+            return
+        if self.__delete_when_default:
+            defaults = [
+                key for key, value in entries.items() if value == self.__default_value
+            ]
+            for key in defaults:
+                del entries[key]
+                dict.pop(self, key, None)
+        dict.update(self, entries)
+
+
+class _DeleteWhenDefaultSafeDict(SafeDict[_KT, _VT]):
+    """``SafeDict`` that deletes entries that are set to the default value."""
 
     def __setitem__(self, __key: _KT, __value: _VT) -> None:
-        if self.__delete_when_default and __value == self.__default_value:
-            if __key in self:
-                super().__delitem__(__key)
+        if __value == self.default_value:
+            dict.pop(self, __key, None)
         else:
-            super().__setitem__(__key, __value)
-
-
-def _get_default_from_primitive(default: Any, *args, **kwargs) -> Any:
-    """Returns the value."""
-    return default
-
-
-def _get_default_from_callable(default: Callable, *args, **kwargs) -> Any:
-    """Calls the value."""
-    return default(*args, **kwargs)
-
-
-def _get_default_from_type(default: type, *args, **kwargs) -> Any:
-    """Creates new instance of the value."""
-    return default(*args, **kwargs)
+            dict.__setitem__(self, __key, __value)
+
+
+def _set_unless_default(self: SafeDict, __key: Any, __value: Any) -> None:
+    """``__setitem__`` of ``SafeDict`` subclasses, which respects ``delete_when_default``."""
+    if self.delete_when_default and __value == self.default_value:
+        dict.pop(self, __key, None)
+    else:
+        dict.__setitem__(self, __key, __value)
+
+
+def _restore_safe_dict(
+    cls: type,
+    default_value: Any,
+    default_value_constructor_args: "List[Any] | None",
+    default_value_constructor_kwargs: "Dict[str, Any] | None",
+    delete_when_default: bool,
+    entries: Dict[_KT, _VT],
+    extra_state: Dict[str, Any],
+) -> SafeDict[_KT, _VT]:
+    """Restores a ``SafeDict`` (or subclass) that was serialized with ``__reduce__``."""
+    safe_dict = cls.__new__(cls, default_value, delete_when_default=delete_when_default)
+    SafeDict.__init__(
+        safe_dict,
+        default_value,
+        default_value_constructor_args,
+        default_value_constructor_kwargs,
+        delete_when_default=delete_when_default,
+    )
+    safe_dict.__dict__.update(extra_state)
+    dict.update(safe_dict, entries)
+    return safe_dict
+
+
+def _build_default_value_factory(
+    default_value: "type | Callable | Any", args: List[Any], kwargs: Dict[str, Any]
+) -> Callable[[], Any]:
+    """
+    Simple factory method for supported default value types.
+    All returned factories are implemented in C, s.t. they're as fast as a
+    ``collections.defaultdict``'s ``default_factory``.
+    """
+    if isinstance(default_value, Callable):
+        # Covers both types and callables.
+        if args or kwargs:
+            return partial(default_value, *args, **kwargs)
+        return default_value
+    else:
+        return repeat(default_value).__next__
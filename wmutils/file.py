@@ -1,24 +1,280 @@
+import bz2
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import fnmatch
+import gzip
 import io
+import lzma
+import mmap
 import os
+import queue
+import re
+import threading
 
-from typing import List, Iterator
+from typing import Callable, Dict, Generic, List, Iterator, Set, Tuple, TypeVar
+
+from wmutils.multithreading import ExecutorService
+
+
+K = TypeVar("K")
+R = TypeVar("R")
+
+_COMPRESSION_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".lzma": "xz"}
+_COMPRESSION_MAGIC_BYTES = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+}
+_COMPRESSION_MODULES = {"gzip": gzip, "bz2": bz2, "xz": lzma}
 
 
 class OpenMany:
-    def __init__(self, file_paths: List[str], *args, **kwargs) -> None:
+    def __init__(
+        self,
+        file_paths: List[str],
+        *args,
+        transparent_compression: bool = False,
+        **kwargs,
+    ) -> None:
+        """
+        :param file_paths: The opened files.
+        :param transparent_compression: Whether files are opened with ``open_compressed``,
+        s.t. compressed files are decompressed while reading. Each compressed file is
+        then decompressed on its own background thread.
+        :param *args, **kwargs: Any other parameter that is passed to ``open``
+        (or ``open_compressed``).
+        """
         self.file_paths: List[str] = file_paths
         self.files: List[io.IOBase] = [None] * len(file_paths)
         self.__args = args
         self.__kwargs = kwargs
+        self.__open = open
+        if transparent_compression:
+            self.__open = open_compressed
+            self.__kwargs = {"background": True, **kwargs}
 
     def __enter__(self) -> List[io.IOBase]:
-        for index, file_path in enumerate(self.file_paths):
-            self.files[index] = open(file_path, *self.__args, **self.__kwargs)
+        try:
+            for index, file_path in enumerate(self.file_paths):
+                self.files[index] = self.__open(
+                    file_path, *self.__args, **self.__kwargs
+                )
+        except BaseException:
+            # Closes the files that were opened before the failure.
+            self.__exit__(None, None, None)
+            raise
         return self.files
 
     def __exit__(self, type, value, traceback) -> None:
-        for file in self.files:
-            file.close()
+        for index, file in enumerate(self.files):
+            if not file is None:
+                file.close()
+                self.files[index] = None
+
+
+class PartitionedWriter(Generic[K]):
+    """
+    Writes records to files that are selected by a key, e.g., one file per partition.
+    Files are opened lazily, and at most ``max_open_files`` are open at once;
+    the least recently used file is closed when another is needed, and reopened
+    in append mode when it's written to again. Large write buffers batch small
+    records into few system calls.
+    """
+
+    def __init__(
+        self,
+        get_path: Callable[[K], str],
+        max_open_files: int = 128,
+        mode: str = "w",
+        buffer_size: int = 1 << 20,
+        encoding: "str | None" = "utf-8",
+        **kwargs,
+    ) -> None:
+        """
+        :param get_path: Returns the path of the file a key's records are written to.
+        :param max_open_files: The maximum number of open files (min. 1).
+        :param mode: The mode files are first opened with; ``"w"`` truncates existing
+        files, ``"a"`` appends to them. Add ``"b"`` to write bytes.
+        :param buffer_size: The write buffer size per file in bytes.
+        :param encoding: The encoding of text files.
+        :param **kwargs: Any other parameter that is passed to ``open``.
+        """
+        if max_open_files < 1:
+            raise ValueError("You can't have less than one open file.")
+        if not mode.replace("b", "") in ("w", "a"):
+            raise ValueError(f"Unsupported mode {mode}.")
+
+        self.__get_path = get_path
+        self.__max_open_files: int = max_open_files
+        self.__mode: str = mode
+        self.__append_mode: str = mode.replace("w", "a")
+        self.__kwargs = {"buffering": buffer_size, **kwargs}
+        if not "b" in mode:
+            self.__kwargs["encoding"] = encoding
+
+        self.__paths: Dict[K, str] = {}
+        # Open files in order of their last use.
+        self.__files: Dict[str, io.IOBase] = {}
+        self.__opened_paths: Set[str] = set()
+
+    def __get_file(self, key: K) -> io.IOBase:
+        """Returns the open file of the key, opening it if needed."""
+        path = self.__paths.get(key)
+        if path is None:
+            path = self.__get_path(key)
+            self.__paths[key] = path
+        files = self.__files
+        file = files.pop(path, None)
+        if file is None:
+            if len(files) >= self.__max_open_files:
+                files.pop(next(iter(files))).close()
+            mode = self.__append_mode if path in self.__opened_paths else self.__mode
+            file = open(path, mode, **self.__kwargs)
+            self.__opened_paths.add(path)
+        files[path] = file
+        return file
+
+    def write(self, key: K, data: "str | bytes") -> None:
+        """Writes the data to the file of the key."""
+        self.__get_file(key).write(data)
+
+    def write_many(self, records: Iterator[Tuple[K, "str | bytes"]]) -> None:
+        """Writes all (key, data) records."""
+        for key, data in records:
+            self.__get_file(key).write(data)
+
+    def close(self) -> None:
+        """Flushes and closes all open files."""
+        files = self.__files
+        while len(files) > 0:
+            files.pop(next(iter(files))).close()
+
+    def __enter__(self) -> "PartitionedWriter[K]":
+        return self
+
+    def __exit__(self, type, value, traceback) -> None:
+        self.close()
+
+
+def detect_compression(file_path: str, mode: str = "r") -> "str | None":
+    """
+    Returns the compression format of a file (``"gzip"``, ``"bz2"``, or ``"xz"``),
+    or ``None`` if it's uncompressed. The format is derived from the extension,
+    and, when reading, from the file's magic bytes otherwise.
+    """
+    compression = _COMPRESSION_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+    if compression is None and "r" in mode:
+        with open(file_path, "rb") as file:
+            header = file.read(6)
+        for magic_bytes, magic_compression in _COMPRESSION_MAGIC_BYTES.items():
+            if header.startswith(magic_bytes):
+                return magic_compression
+    return compression
+
+
+def open_compressed(
+    file_path: str,
+    mode: str = "r",
+    buffer_size: int = 1 << 20,
+    background: bool = False,
+    prefetch_chunks: int = 4,
+    **kwargs,
+) -> io.IOBase:
+    """
+    Opens a file like ``open``, transparently (de)compressing gzip, bz2, and xz files.
+    Compressed files are read in chunks of ``buffer_size`` bytes.
+    :param file_path: The opened file.
+    :param mode: The mode the file is opened with.
+    :param buffer_size: The buffer size in bytes.
+    :param background: Whether compressed files that are read are decompressed on a
+    background thread, which stays up to ``prefetch_chunks`` chunks ahead of the reader.
+    The compression libraries release the GIL, so decompression overlaps with
+    the work of the reader.
+    :param prefetch_chunks: The maximum number of decompressed chunks that are buffered.
+    :param **kwargs: Any other parameter that is passed to ``open`` (e.g., ``encoding``).
+    """
+    compression = detect_compression(file_path, mode)
+    if compression is None:
+        return open(file_path, mode, buffer_size, **kwargs)
+    module = _COMPRESSION_MODULES[compression]
+    if not "r" in mode:
+        if not "b" in mode and not "t" in mode:
+            mode += "t"
+        return module.open(file_path, mode, **kwargs)
+
+    source = module.open(file_path, "rb")
+    if background:
+        source = io.BufferedReader(
+            _BackgroundReader(source, buffer_size, prefetch_chunks), buffer_size
+        )
+    else:
+        source = io.BufferedReader(source, buffer_size)
+    if "b" in mode:
+        return source
+    return io.TextIOWrapper(source, **kwargs)
+
+
+class _BackgroundReader(io.RawIOBase):
+    """Reads a stream in chunks on a background thread."""
+
+    def __init__(self, source: io.IOBase, chunk_size: int, prefetch_chunks: int):
+        super().__init__()
+        self.__source = source
+        self.__chunks: queue.Queue = queue.Queue(max(prefetch_chunks, 1))
+        self.__chunk: memoryview = memoryview(b"")
+        self.__is_exhausted: bool = False
+        self.__is_stopped = threading.Event()
+        self.__thread = threading.Thread(
+            target=self.__read_chunks, args=(chunk_size,), daemon=True
+        )
+        self.__thread.start()
+
+    def __read_chunks(self, chunk_size: int) -> None:
+        """Reads the source until it's exhausted; an empty chunk marks the end."""
+        try:
+            while not self.__is_stopped.is_set():
+                chunk = self.__source.read(chunk_size)
+                self.__put(chunk)
+                if len(chunk) == 0:
+                    break
+        except Exception as ex:
+            # Passes the error on to the reader.
+            self.__put(ex)
+        finally:
+            self.__source.close()
+
+    def __put(self, item: "bytes | Exception") -> None:
+        while not self.__is_stopped.is_set():
+            try:
+                self.__chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if len(self.__chunk) == 0:
+            if self.__is_exhausted:
+                return 0
+            chunk = self.__chunks.get()
+            if isinstance(chunk, Exception):
+                self.__is_exhausted = True
+                raise chunk
+            if len(chunk) == 0:
+                self.__is_exhausted = True
+                return 0
+            self.__chunk = memoryview(chunk)
+        size = min(len(buffer), len(self.__chunk))
+        buffer[:size] = self.__chunk[:size]
+        self.__chunk = self.__chunk[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self.__is_stopped.set()
+            self.__thread.join()
+        super().close()
 
 
 def safe_makedirs(dirname: str):
@@ -28,31 +284,268 @@ def safe_makedirs(dirname: str):
 
 def get_subfolders(parent_dir) -> Iterator[str]:
     """Returns the folders in a directory."""
-    return [
-        f"{parent_dir}/{name}"
-        for name in os.listdir(parent_dir)
-        if os.path.isdir(f"{parent_dir}/{name}")
-    ]
+    with os.scandir(parent_dir) as entries:
+        return [f"{parent_dir}/{entry.name}" for entry in entries if entry.is_dir()]
+
+
+def scan_nested_folders(
+    base_folder: str,
+    max_depth: "int | None" = None,
+    select: str = "files",
+    pattern: "str | None" = None,
+    thread_count: int = 1,
+    follow_symlinks: bool = False,
+) -> Iterator[str]:
+    """
+    Iterates through the entries of all nested folders using ``os.scandir``,
+    which provides the entry types without extra system calls.
+    Results are streamed while scanning. The entries of a folder are yielded
+    together, before those of its subfolders. With more than one thread,
+    folders are scanned in parallel and results are yielded in completion order.
 
+    :param base_folder: The folder that is scanned.
+    :param max_depth: The maximum depth of the yielded entries, where the entries
+    of the base folder have depth 0. Unlimited if ``None``.
+    :param select: Which entries are yielded: ``"files"``, ``"dirs"``, or ``"all"``.
+    :param pattern: Optional glob pattern that the entry names must match (e.g., ``*.json``).
+    :param thread_count: The number of threads that scan folders (min. 1).
+    :param follow_symlinks: Whether symbolic links to folders are treated as folders.
+    """
+    if select not in ("files", "dirs", "all"):
+        raise ValueError(f"Unsupported selection {select}.")
+    if thread_count < 1:
+        raise ValueError("You can't have less than one thread.")
 
-def iterate_through_nested_folders(base_folder: str, max_depth: int) -> Iterator[str]:
+    is_match = None if pattern is None else re.compile(fnmatch.translate(pattern)).match
+
+    def __scan(folder: str, depth: int) -> Tuple[List[str], List[Tuple[str, int]]]:
+        """Returns the selected entries and the subfolders that are scanned next."""
+        selected = []
+        subfolders = []
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+                    except OSError:
+                        is_dir = False
+                    path = f"{folder}/{entry.name}"
+                    if is_dir and (max_depth is None or depth < max_depth):
+                        subfolders.append((path, depth + 1))
+                    if (select == "all" or is_dir == (select == "dirs")) and (
+                        is_match is None or is_match(entry.name)
+                    ):
+                        selected.append(path)
+        except OSError:
+            # Like ``os.walk``, subfolders that can't be read are skipped,
+            # but a base folder that can't be read is an error.
+            if depth == 0:
+                raise
+        return selected, subfolders
+
+    if thread_count == 1:
+        stack = [(base_folder, 0)]
+        while len(stack) > 0:
+            selected, subfolders = __scan(*stack.pop())
+            yield from selected
+            stack.extend(reversed(subfolders))
+        return
+
+    with ThreadPoolExecutor(thread_count) as executor:
+        running = {executor.submit(__scan, base_folder, 0)}
+        while len(running) > 0:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                selected, subfolders = future.result()
+                running.update(
+                    executor.submit(__scan, *subfolder) for subfolder in subfolders
+                )
+                yield from selected
+
+
+def iterate_through_nested_folders(
+    base_folder: str, max_depth: int, thread_count: int = 1
+) -> Iterator[str]:
     """Iterates through all folders with a certain depth from the specified base folder."""
     yield base_folder
-    sub_folders = get_subfolders(base_folder)
-    if max_depth > 0:
-        for subfolder in sub_folders:
-            for folder in iterate_through_nested_folders(subfolder, max_depth - 1):
-                yield folder
-    else:
-        for folder in get_subfolders(base_folder):
-            yield folder
+    yield from scan_nested_folders(
+        base_folder,
+        max_depth,
+        select="dirs",
+        thread_count=thread_count,
+        follow_symlinks=True,
+    )
 
 
 def iterate_through_files_in_nested_folders(
-    base_folder: str, max_depth: int
+    base_folder: str, max_depth: int, thread_count: int = 1
 ) -> Iterator[str]:
     """Iterates through all of the files that are in the folders with a
     certain depth from the specified base folder."""
-    for folder in iterate_through_nested_folders(base_folder, max_depth):
-        for file in os.listdir(folder):
-            yield f"{folder}/{file}"
+    yield from scan_nested_folders(
+        base_folder,
+        max_depth + 1,
+        select="all",
+        thread_count=thread_count,
+        follow_symlinks=True,
+    )
+
+
+def split_into_line_ranges(
+    file_path: str, chunk_size: int = 64 << 20
+) -> List[Tuple[str, int, int]]:
+    """
+    Splits a file into byte ranges of roughly ``chunk_size`` bytes that start and end
+    at line boundaries, s.t. workers can process their own range of a huge
+    line-oriented file without the lines being sent to them.
+    :return: (file path, start, end) tuples, where ``end`` is exclusive.
+    """
+    if chunk_size < 1:
+        raise ValueError("The chunk size must be at least 1.")
+    file_size = os.path.getsize(file_path)
+    ranges = []
+    start = 0
+    with open(file_path, "rb") as file:
+        while start < file_size:
+            # Ends the range after the line that contains its last byte.
+            file.seek(min(start + chunk_size, file_size) - 1)
+            file.readline()
+            end = min(file.tell(), file_size)
+            ranges.append((file_path, start, end))
+            start = end
+    return ranges
+
+
+def iterate_lines_in_range(
+    file_path: str, start: int, end: int, encoding: "str | None" = None
+) -> Iterator["bytes | str"]:
+    """
+    Iterates through the lines in the byte range of a file using ``mmap``.
+    Lines are yielded without their trailing newline, as ``bytes``,
+    or as ``str`` if an encoding is specified.
+    """
+    if end <= start:
+        return
+    with open(file_path, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as memory_map:
+        position = start
+        while position < end:
+            line_end = memory_map.find(b"\n", position, end)
+            if line_end == -1:
+                line_end = end
+            line = memory_map[position:line_end]
+            yield line if encoding is None else line.decode(encoding)
+            position = line_end + 1
+
+
+def parallelize_line_ranges(
+    file_path: str,
+    on_range_received: Callable[..., R],
+    thread_count: int = 1,
+    chunk_size: int = 64 << 20,
+    *args,
+    use_threads: bool = False,
+    **kwargs,
+) -> List[R]:
+    """
+    Processes a line-oriented file in parallel; see ``iterate_line_range_results``.
+    :return: The results of all ranges in file order.
+    """
+    return list(
+        iterate_line_range_results(
+            file_path,
+            on_range_received,
+            thread_count,
+            chunk_size,
+            *args,
+            use_threads=use_threads,
+            **kwargs,
+        )
+    )
+
+
+def iterate_line_range_results(
+    file_path: str,
+    on_range_received: Callable[..., R],
+    thread_count: int = 1,
+    chunk_size: int = 64 << 20,
+    *args,
+    ordered: bool = True,
+    use_threads: bool = False,
+    **kwargs,
+) -> Iterator[R]:
+    """
+    Processes a line-oriented file in parallel using an ``ExecutorService``,
+    yielding the result of each range as soon as it's available.
+    Each worker receives only the (file path, start, end) of its range,
+    and typically reads it using ``iterate_lines_in_range``. When the iterator
+    is closed early or a range fails, ranges that haven't started are skipped.
+    :param file_path: The processed file.
+    :param on_range_received: Callable that processes a range. It receives
+    the named parameters ``file_path``, ``start``, ``end``, and any other parameter
+    that is passed in ``*args`` or ``**kwargs``.
+    :param thread_count: The number of workers.
+    :param chunk_size: The approximate size of each range in bytes.
+    :param ordered: Whether results are yielded in file order,
+    or in the order in which they complete.
+    :param use_threads: Whether the workers are threads instead of processes.
+    """
+    ranges = split_into_line_ranges(file_path, chunk_size)
+    executor = ExecutorService(
+        thread_count,
+        True,
+        False,
+        *args,
+        use_threads=use_threads,
+        on_range_received=on_range_received,
+        **kwargs,
+    )
+    executor.start()
+    for task_id, task in enumerate(ranges):
+        executor.submit(task_callable=_process_line_range, task=task, task_id=task_id)
+
+    try:
+        pending = {}
+        next_task_id = 0
+        for task_id, result, exception in executor.get_results_iter():
+            if not exception is None:
+                raise exception
+            if not ordered:
+                yield result
+                continue
+            pending[task_id] = result
+            while next_task_id in pending:
+                yield pending.pop(next_task_id)
+                next_task_id += 1
+    finally:
+        # When the caller stops early, ranges that haven't started are skipped.
+        # The results of running ones must still be received, as workers
+        # can't terminate before that.
+        executor.cancel_pending()
+        for _ in executor.get_results_iter():
+            pass
+        executor.stop()
+
+
+def _process_line_range(
+    *args,
+    task: Tuple[str, int, int],
+    task_id: int,
+    worker_id: int,
+    on_range_received: Callable[..., R],
+    **kwargs,
+) -> Tuple[int, "R | None", "Exception | None"]:
+    """
+    Processes one range and tags the result with its task id for ordering.
+    Exceptions are returned instead of raised, s.t. the caller doesn't wait
+    for a result that never arrives.
+    """
+    file_path, start, end = task
+    try:
+        result = on_range_received(
+            *args, file_path=file_path, start=start, end=end, **kwargs
+        )
+    except Exception as ex:
+        return task_id, None, ex
+    return task_id, result, None
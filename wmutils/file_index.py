@@ -0,0 +1,169 @@
+"""
+Implements a persisted index of the files in a folder tree that
+is refreshed incrementally, s.t. rescanning a huge tree only
+lists the folders that changed.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple
+
+
+class FileIndexDiff(NamedTuple):
+    """The changes found by ``FileIndex.refresh``."""
+
+    added: List[str]
+    removed: List[str]
+    modified: List[str]
+
+
+class FileIndex:
+    """
+    Index of the paths, sizes, and modification times of all files in a folder tree,
+    stored as a JSON file. A refresh only lists folders whose modification time
+    changed; unchanged folders reuse their stored listing, so only one ``stat``
+    per folder is needed. A refresh still ``stat``s every folder in the tree,
+    as a change deep in the tree doesn't update the modification times of
+    the folders above it.
+
+    Note that changing a file's contents doesn't change the modification time of
+    its folder. Such changes are only found when refreshing with ``verify_files``.
+    """
+
+    def __init__(self, base_folder: str, index_path: str) -> None:
+        """
+        :param base_folder: The root of the indexed tree.
+        :param index_path: The path of the JSON file the index is stored in.
+        It's loaded if it exists and belongs to the same base folder.
+        """
+        self.__base_folder: str = base_folder
+        self.__index_path: str = index_path
+        # Maps folder paths to their modification time, files, and subfolders.
+        self.__folders: Dict[str, Dict[str, Any]] = {}
+
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as index_file:
+                stored = json.load(index_file)
+            if stored.get("base_folder") == base_folder:
+                self.__folders = stored["folders"]
+
+    @property
+    def base_folder(self) -> str:
+        return self.__base_folder
+
+    def iterate_files(self) -> Iterator[Tuple[str, int, int]]:
+        """Yields the path, size, and modification time (in ns) of all indexed files."""
+        for folder, entry in self.__folders.items():
+            for name, (size, mtime_ns) in entry["files"].items():
+                yield f"{folder}/{name}", size, mtime_ns
+
+    def get_files(self) -> Dict[str, Tuple[int, int]]:
+        """Returns the size and modification time (in ns) of all indexed files."""
+        return {path: (size, mtime_ns) for path, size, mtime_ns in self.iterate_files()}
+
+    def refresh(self, verify_files: bool = False, save: bool = True) -> FileIndexDiff:
+        """
+        Updates the index with the current state of the tree.
+        :param verify_files: Whether files in unchanged folders are checked for
+        modifications too. This costs one ``stat`` per file.
+        :param save: Whether the updated index is written to disk.
+        :return: The files that were added, removed, or modified since the last refresh.
+        """
+        old_folders = self.__folders
+        new_folders = {}
+        diff = FileIndexDiff([], [], [])
+
+        stack = [self.__base_folder]
+        while len(stack) > 0:
+            folder = stack.pop()
+            try:
+                mtime_ns = os.stat(folder).st_mtime_ns
+            except OSError:
+                continue
+            old_entry = old_folders.get(folder)
+            if old_entry is not None and old_entry["mtime_ns"] == mtime_ns:
+                entry = old_entry
+                if verify_files:
+                    entry = self.__verify_files(folder, entry, diff)
+            else:
+                entry = _scan_folder(folder, mtime_ns)
+                old_files = {} if old_entry is None else old_entry["files"]
+                _diff_files(folder, old_files, entry["files"], diff)
+            new_folders[folder] = entry
+            stack.extend(f"{folder}/{name}" for name in entry["folders"])
+
+        for folder in old_folders.keys() - new_folders.keys():
+            diff.removed.extend(
+                f"{folder}/{name}" for name in old_folders[folder]["files"]
+            )
+
+        self.__folders = new_folders
+        if save:
+            self.save()
+        return diff
+
+    def __verify_files(
+        self, folder: str, entry: Dict[str, Any], diff: FileIndexDiff
+    ) -> Dict[str, Any]:
+        """Checks each file in an unchanged folder for modifications."""
+        files = {}
+        for name, stored in entry["files"].items():
+            try:
+                stat = os.stat(f"{folder}/{name}")
+            except OSError:
+                diff.removed.append(f"{folder}/{name}")
+                continue
+            current = [stat.st_size, stat.st_mtime_ns]
+            if current != list(stored):
+                diff.modified.append(f"{folder}/{name}")
+            files[name] = current
+        return {**entry, "files": files}
+
+    def save(self) -> None:
+        """Writes the index to disk, replacing the old index atomically."""
+        temp_path = f"{self.__index_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as index_file:
+            json.dump(
+                {"base_folder": self.__base_folder, "folders": self.__folders},
+                index_file,
+                separators=(",", ":"),
+            )
+        os.replace(temp_path, self.__index_path)
+
+
+def _scan_folder(folder: str, mtime_ns: int) -> Dict[str, Any]:
+    """Lists the files and subfolders of a folder."""
+    files = {}
+    folders = []
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append(entry.name)
+                    else:
+                        stat = entry.stat(follow_symlinks=False)
+                        files[entry.name] = [stat.st_size, stat.st_mtime_ns]
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return {"mtime_ns": mtime_ns, "files": files, "folders": folders}
+
+
+def _diff_files(
+    folder: str,
+    old_files: Dict[str, List[int]],
+    new_files: Dict[str, List[int]],
+    diff: FileIndexDiff,
+) -> None:
+    """Adds the differences between two listings of the same folder to the diff."""
+    for name, stat in new_files.items():
+        old_stat = old_files.get(name)
+        if old_stat is None:
+            diff.added.append(f"{folder}/{name}")
+        elif list(old_stat) != stat:
+            diff.modified.append(f"{folder}/{name}")
+    diff.removed.extend(
+        f"{folder}/{name}" for name in old_files.keys() - new_files.keys()
+    )
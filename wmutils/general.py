@@ -1,5 +1,17 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import compress
+import multiprocessing
+from operator import itemgetter
+import os
 import random
+import re
+import threading
+from typing import Callable, Iterator, List, Tuple
+
+import numpy
+
+from wmutils.iterators import batched
 
 
 class Counter:
@@ -14,16 +26,413 @@ class Counter:
         return self.__current_value
 
 
+class _CounterBlock(threading.local):
+    """The block of numbers that the current thread hands out."""
+
+    def __init__(self) -> None:
+        self.next_value: int = 0
+        self.remaining: int = 0
+        self.pid: "int | None" = None
+
+
+class SharedCounter(Counter):
+    """
+    Counter that hands out unique numbers across processes, e.g., to the workers
+    of an ``ExecutorService``. Its state lives in a ``multiprocessing.Value``,
+    which child processes inherit when the counter is passed to them.
+
+    Process workers must receive the counter when they're created, i.e., as
+    a keyword argument of ``ExecutorService`` or ``parallelize_tasks``. It can't
+    be pickled otherwise, so it can't be passed to ``ExecutorService.submit``
+    with process workers. Thread workers can receive it either way.
+
+    Each thread reserves a block of ``block_size`` numbers at a time, s.t. the
+    shared lock is only taken once per block. Consequently, numbers are unique,
+    but not handed out in order across threads and processes, and unused numbers
+    of a block are skipped. A process that inherits a partially used block
+    (e.g., after forking) detects this and reserves a new block.
+    """
+
+    def __init__(
+        self,
+        start_value: int = 42,
+        increment: int = 1,
+        block_size: int = 1024,
+        file_path: "str | None" = None,
+    ) -> None:
+        """
+        :param start_value: The value before the first number; see ``Counter``.
+        :param increment: The difference between consecutive numbers.
+        :param block_size: The number of numbers a thread reserves at a time.
+        :param file_path: Optional file the last reserved number is stored in,
+        s.t. a counter that's created with the same file continues after it.
+        """
+        if block_size < 1:
+            raise ValueError("The block size must be at least 1.")
+        super().__init__(start_value, increment)
+        self.__increment: int = increment
+        self.__block_size: int = block_size
+        self.__file_path: "str | None" = file_path
+        if not file_path is None and os.path.exists(file_path):
+            with open(file_path, "r", encoding="utf-8") as counter_file:
+                start_value = int(counter_file.read())
+        # The last number that was reserved by any process.
+        self.__reserved = multiprocessing.Value("q", start_value)
+        self.__block = _CounterBlock()
+
+    def __getstate__(self):
+        # Raises a ``RuntimeError`` unless a new process is being created.
+        multiprocessing.context.assert_spawning(self)
+        state = dict(self.__dict__)
+        # The new process starts without blocks.
+        del state["_SharedCounter__block"]
+        return state
+
+    def __setstate__(self, state) -> None:
+        self.__dict__.update(state)
+        self.__block = _CounterBlock()
+
+    def get_next(self) -> int:
+        block = self.__block
+        if block.remaining == 0 or block.pid != os.getpid():
+            self.__reserve_block(block)
+        value = block.next_value
+        block.next_value += self.__increment
+        block.remaining -= 1
+        return value
+
+    def __reserve_block(self, block: _CounterBlock) -> None:
+        reserved = self.__reserved
+        with reserved.get_lock():
+            block.next_value = reserved.value + self.__increment
+            reserved.value += self.__block_size * self.__increment
+            if not self.__file_path is None:
+                self.__store(reserved.value)
+        block.remaining = self.__block_size
+        block.pid = os.getpid()
+
+    def __store(self, value: int) -> None:
+        """Writes the value to the counter file, replacing it atomically."""
+        temp_path = f"{self.__file_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as counter_file:
+            counter_file.write(str(value))
+        os.replace(temp_path, self.__file_path)
+
+
 def lies_between(x, start, end) -> bool:
     return x >= start and x <= end
 
 
+# Formats whose timestamps are parsed as ISO-8601, which is much faster than ``strptime``.
+_ISO_FORMATS = {
+    "%Y-%m-%d",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%d %H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%d %H:%M:%S.%f%z",
+}
+
+# The naive ISO-8601 formats, which numpy parses in bulk.
+_NAIVE_ISO_FORMATS = tuple(
+    time_format for time_format in sorted(_ISO_FORMATS) if not "%z" in time_format
+)
+
+# The patterns of the directives of ISO-8601 timestamps, which all have a fixed width.
+_ISO_DIRECTIVES = {
+    "Y": "[0-9]{4}",
+    "m": "[0-9]{2}",
+    "d": "[0-9]{2}",
+    "H": "[0-9]{2}",
+    "M": "[0-9]{2}",
+    "S": "[0-9]{2}",
+    "f": "[0-9]{6}",
+    "z": "[+-][0-9]{2}:[0-9]{2}",
+}
+
+# Directives that ``parse_timestamps`` can parse in bulk, and their ``strptime`` patterns.
+_NUMERIC_DIRECTIVES = {
+    "Y": r"(\d{4})",
+    "m": r"(\d{1,2})",
+    "d": r"(\d{1,2})",
+    "H": r"(\d{1,2})",
+    "M": r"(\d{1,2})",
+    "S": r"(\d{1,2})",
+    "f": r"(\d{1,6})",
+}
+
+# The earliest timestamp that ``datetime`` supports.
+_MIN_TIMESTAMP = numpy.datetime64(datetime.min, "us")
+
+
 def lies_outside_timewindow(
     timestamp: str, start: datetime, end: datetime, time_format: str
 ) -> bool:
     """Returns true if the provided timestamp lies outside the provided window."""
-    timestamp = datetime.strptime(timestamp, time_format)
-    return timestamp < start and timestamp > end
+    timestamp = get_timestamp_parser(time_format)(timestamp)
+    return timestamp < start or timestamp > end
+
+
+@lru_cache(maxsize=None)
+def get_timestamp_parser(time_format: "str | None" = None) -> Callable[[str], datetime]:
+    """
+    Returns a function that parses timestamps with the format. ``None`` uses
+    ``datetime.fromisoformat``, which accepts any ISO-8601 variant. Other formats
+    use ``datetime.strptime``, but ISO-8601 formats use ``datetime.fromisoformat``
+    for timestamps that have exactly the format's shape, which is much faster.
+    """
+    if time_format is None:
+        return datetime.fromisoformat
+    strptime = datetime.strptime
+
+    def __parse(timestamp: str) -> datetime:
+        return strptime(timestamp, time_format)
+
+    if not time_format in _ISO_FORMATS:
+        return __parse
+    match_iso = _get_iso_pattern(time_format).fullmatch
+    fromisoformat = datetime.fromisoformat
+
+    def __parse_iso(timestamp: str) -> datetime:
+        if match_iso(timestamp) is None:
+            return strptime(timestamp, time_format)
+        return fromisoformat(timestamp)
+
+    return __parse_iso
+
+
+def parse_timestamps(
+    timestamps: List[str], time_format: "str | None" = None
+) -> numpy.ndarray:
+    """
+    Parses a batch of timestamps into a ``datetime64[us]`` array. Naive ISO-8601
+    timestamps are converted by numpy in bulk, and so are the fields of formats
+    that only contain numeric directives (e.g., ``%d/%m/%Y %H:%M``); others are
+    parsed one by one (see ``get_timestamp_parser``). Timezone-aware timestamps
+    are converted to UTC.
+    """
+    if time_format is None or (time_format in _ISO_FORMATS and not "%z" in time_format):
+        parsed = _parse_iso_timestamps(timestamps, time_format)
+        if not parsed is None:
+            return parsed
+    numeric_format = _get_numeric_format(time_format)
+    if not numeric_format is None:
+        parsed = _parse_numeric_timestamps(timestamps, *numeric_format)
+        if not parsed is None:
+            return parsed
+    # Parses timestamps one by one, which also raises the appropriate errors.
+    parse = get_timestamp_parser(time_format)
+    return numpy.array(
+        [_to_naive_utc(parse(timestamp)) for timestamp in timestamps],
+        dtype="datetime64[us]",
+    )
+
+
+def timewindow_mask(
+    timestamps: List[str],
+    start: datetime,
+    end: datetime,
+    time_format: "str | None" = None,
+    outside: bool = False,
+) -> numpy.ndarray:
+    """
+    Returns a boolean mask of the timestamps that lie inside the window
+    (inclusive), or outside of it. Aware datetimes are compared in UTC.
+    """
+    parsed = parse_timestamps(timestamps, time_format)
+    start = numpy.datetime64(_to_naive_utc(start), "us")
+    end = numpy.datetime64(_to_naive_utc(end), "us")
+    if outside:
+        return (parsed < start) | (parsed > end)
+    return (parsed >= start) & (parsed <= end)
+
+
+def filter_timewindow(
+    timestamps: Iterator[str],
+    start: datetime,
+    end: datetime,
+    time_format: "str | None" = None,
+    outside: bool = False,
+    batch_size: int = 65536,
+) -> Iterator[str]:
+    """
+    Yields the timestamps that lie inside the window (inclusive), or outside of it,
+    parsing them in batches of ``batch_size``; see ``timewindow_mask``.
+    """
+    for batch in batched(timestamps, batch_size):
+        mask = timewindow_mask(batch, start, end, time_format, outside)
+        yield from compress(batch, mask.tolist())
+
+
+@lru_cache(maxsize=None)
+def _get_iso_pattern(time_format: str) -> re.Pattern:
+    """Returns the pattern of timestamps with exactly the shape of the ISO-8601 format."""
+    parts = re.split("%(.)", time_format)
+    parts[0::2] = map(re.escape, parts[0::2])
+    parts[1::2] = map(_ISO_DIRECTIVES.__getitem__, parts[1::2])
+    return re.compile("".join(parts))
+
+
+@lru_cache(maxsize=None)
+def _get_iso_template(time_format: str) -> numpy.ndarray:
+    """
+    Returns the code points of timestamps with the naive ISO-8601 format,
+    with 0 for digits.
+    """
+    parts = re.split("%(.)", time_format)
+    template = []
+    for index, part in enumerate(parts):
+        if index % 2 == 0:
+            template.extend(map(ord, part))
+        else:
+            template.extend([0] * (4 if part == "Y" else 6 if part == "f" else 2))
+    return numpy.array(template, dtype=numpy.uint32)
+
+
+def _parse_iso_timestamps(
+    timestamps: List[str], time_format: "str | None"
+) -> "numpy.ndarray | None":
+    """
+    Parses naive ISO-8601 timestamps with numpy. Returns ``None`` unless all
+    timestamps have exactly the shape of the format (or of one of the naive
+    ISO-8601 formats if it's ``None``) and are supported by ``datetime``, as numpy
+    also accepts partial timestamps (e.g., ``"2020-06"``), ``""``, ``"NaT"``,
+    and the year 0.
+    """
+    strings = numpy.array(timestamps, dtype=str)
+    if strings.size == 0:
+        return numpy.array([], dtype="datetime64[us]")
+    # Shorter strings are padded with zeros, which match no template.
+    width = strings.dtype.itemsize // 4
+    codes = strings.view(numpy.uint32).reshape(len(strings), width)
+    is_digit = (codes >= ord("0")) & (codes <= ord("9"))
+    for iso_format in _NAIVE_ISO_FORMATS if time_format is None else (time_format,):
+        template = _get_iso_template(iso_format)
+        if len(template) == width and numpy.all(
+            numpy.where(template == 0, is_digit, codes == template)
+        ):
+            try:
+                # Converting the list is faster than converting the string array.
+                parsed = numpy.array(timestamps, dtype="datetime64[us]")
+            except ValueError:
+                return None
+            if numpy.any(parsed < _MIN_TIMESTAMP):
+                return None
+            return parsed
+    return None
+
+
+@lru_cache(maxsize=None)
+def _get_numeric_format(
+    time_format: "str | None",
+) -> "Tuple[re.Pattern, Tuple[str, ...]] | None":
+    """
+    Returns a pattern that extracts the fields of timestamps with the format,
+    and the directives of these fields, or ``None`` if the format has other directives.
+    """
+    if time_format is None:
+        return None
+    parts = []
+    fields = []
+    follows_variable_width = False
+    index = 0
+    while index < len(time_format):
+        character = time_format[index]
+        if character != "%":
+            # Like ``strptime``, whitespace matches any amount of whitespace (but newlines).
+            parts.append(r"[^\S\n]+" if character.isspace() else re.escape(character))
+            follows_variable_width = False
+            index += 1
+            continue
+        directive = time_format[index + 1 : index + 2]
+        if directive == "%":
+            parts.append("%")
+            follows_variable_width = False
+        elif (
+            directive in _NUMERIC_DIRECTIVES
+            and not directive in fields
+            # Adjacent variable-width fields could be split differently than ``strptime`` does.
+            and not (follows_variable_width and directive != "Y")
+        ):
+            parts.append(_NUMERIC_DIRECTIVES[directive])
+            fields.append(directive)
+            follows_variable_width = directive != "Y"
+        else:
+            return None
+        index += 2
+    return re.compile(f"^{''.join(parts)}$", re.MULTILINE), tuple(fields)
+
+
+def _parse_numeric_timestamps(
+    timestamps: List[str], pattern: re.Pattern, fields: Tuple[str, ...]
+) -> "numpy.ndarray | None":
+    """
+    Parses timestamps by extracting their fields with the pattern and combining
+    them with numpy. Returns ``None`` if any timestamp doesn't match or is invalid.
+    """
+    # Matching all timestamps as the lines of one string avoids a call per timestamp.
+    # The pattern doesn't match newlines, so each line has at most one match.
+    count = len(timestamps)
+    lines = "\n".join(timestamps)
+    if lines.count("\n") != count - 1 and count > 0:
+        return None
+    matches = pattern.findall(lines)
+    if len(matches) != count:
+        return None
+    if count == 0:
+        return numpy.array([], dtype="datetime64[us]")
+    if len(fields) == 0:
+        values = numpy.empty((count, 0), dtype=numpy.int64)
+    else:
+        values = numpy.array(matches, dtype=numpy.int64).reshape(count, len(fields))
+
+    def __get_field(directive: str, default: int) -> numpy.ndarray:
+        if not directive in fields:
+            return numpy.full(count, default, dtype=numpy.int64)
+        return values[:, fields.index(directive)]
+
+    # Defaults are the same as those of ``strptime``.
+    years = __get_field("Y", 1900)
+    months = __get_field("m", 1)
+    days = __get_field("d", 1)
+    hours = __get_field("H", 0)
+    minutes = __get_field("M", 0)
+    seconds = __get_field("S", 0)
+    microseconds = __get_field("f", 0)
+    if "f" in fields:
+        # Fractions are right-padded, i.e., ".5" is 500000 microseconds.
+        if len(fields) > 1:
+            fractions = map(itemgetter(fields.index("f")), matches)
+        else:
+            fractions = matches
+        digits = numpy.fromiter(map(len, fractions), dtype=numpy.int64, count=count)
+        microseconds = microseconds * 10 ** (6 - digits)
+
+    month_starts = ((years - 1970) * 12 + months - 1).astype("datetime64[M]")
+    dates = month_starts.astype("datetime64[D]") + (days - 1)
+    is_valid = (
+        (years >= 1)
+        & (months >= 1)
+        & (months <= 12)
+        & (days >= 1)
+        & (dates < (month_starts + 1).astype("datetime64[D]"))
+        & (hours < 24)
+        & (minutes < 60)
+        & (seconds < 60)
+    )
+    if not numpy.all(is_valid):
+        return None
+    time_of_day = ((hours * 60 + minutes) * 60 + seconds) * 1_000_000 + microseconds
+    return dates.astype("datetime64[us]") + time_of_day.astype("timedelta64[us]")
+
+
+def _to_naive_utc(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
 
 
 def shuffled_range(start=0, end=100, step=1):
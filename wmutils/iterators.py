@@ -1,3 +1,4 @@
+from itertools import islice
 import math
 from typing import Iterator, List, Callable, TypeVar, Tuple, Dict
 from numbers import Number
@@ -117,6 +118,17 @@ def limit(iterator: Iterator[T], max_iterations: int) -> Iterator[T]:
         max_iterations -= 1
 
 
+def batched(iterator: Iterator[T], batch_size: int) -> Iterator[List[T]]:
+    """Yields lists of ``batch_size`` consecutive entries; the last one may be shorter."""
+    if batch_size < 1:
+        raise ValueError("The batch size must be at least 1.")
+    iterator = iter(iterator)
+    batch = list(islice(iterator, batch_size))
+    while len(batch) > 0:
+        yield batch
+        batch = list(islice(iterator, batch_size))
+
+
 class RepeatingIterator:
     """Iterator that provides the option to repeat an entry."""
     def __init__(self, iterable):
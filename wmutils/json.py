@@ -1,7 +1,548 @@
+"""
+Implements JSON utilities, which can opt into the fastest available JSON library.
+``orjson``, ``ujson``, and ``simdjson`` are used when installed (in that order),
+falling back to the standard library otherwise. As these libraries aren't exact
+for every document (see ``JsonBackend``), the standard library is used by default.
+"""
+
+from contextlib import contextmanager
+import gc
+import hashlib
+import importlib
 import json
+import marshal
+import os
+import sys
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+from wmutils.collections.dict_access import get_nested
+from wmutils.file import (
+    iterate_line_range_results,
+    iterate_lines_in_range,
+    open_compressed,
+)
+from wmutils.iterators import batched
+
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonBackend(NamedTuple):
+    """
+    The functions of a JSON library. ``loads`` accepts ``str`` and ``bytes``
+    and raises ``json.JSONDecodeError`` on invalid input; ``dumps`` returns ``str``.
+    Documents that a library rejects, but the standard library accepts
+    (e.g., ``NaN``), are parsed by the standard library instead; likewise,
+    objects that a library can't serialize (e.g., non-string keys) are
+    serialized by the standard library. Note that ``orjson`` parses integers
+    beyond 64 bits as floats and serializes ``NaN`` and infinities as ``null``.
+    """
+
+    name: str
+    loads: Callable[["str | bytes"], Any]
+    dumps: Callable[[Any], str]
+
+
+def _stdlib_loads(data: "str | bytes") -> Any:
+    # Decoding explicitly is faster than ``json.loads``'s encoding detection.
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+
+def _build_stdlib_backend() -> JsonBackend:
+    return JsonBackend("json", _stdlib_loads, json.dumps)
+
+
+def _build_orjson_backend() -> JsonBackend:
+    orjson = importlib.import_module("orjson")
+    orjson_dumps = orjson.dumps
+
+    def dumps(obj: Any) -> str:
+        try:
+            return orjson_dumps(obj).decode("utf-8")
+        except TypeError:
+            # E.g., non-string keys, which the standard library converts.
+            return json.dumps(obj)
+
+    # ``orjson.JSONDecodeError`` already subclasses ``json.JSONDecodeError``.
+    return JsonBackend("orjson", _fall_back_to_stdlib(orjson.loads), dumps)
+
+
+def _build_ujson_backend() -> JsonBackend:
+    ujson = importlib.import_module("ujson")
+    return JsonBackend(
+        "ujson",
+        _fall_back_to_stdlib(_normalize_decode_errors(ujson.loads)),
+        ujson.dumps,
+    )
+
+
+def _build_simdjson_backend() -> JsonBackend:
+    simdjson = importlib.import_module("simdjson")
+    return JsonBackend(
+        "simdjson",
+        _fall_back_to_stdlib(_normalize_decode_errors(simdjson.loads)),
+        json.dumps,
+    )
+
+
+def _normalize_decode_errors(
+    loads: Callable[["str | bytes"], Any],
+) -> Callable[["str | bytes"], Any]:
+    """Wraps ``loads`` s.t. it raises ``json.JSONDecodeError`` on invalid input."""
+
+    def __loads(data: "str | bytes") -> Any:
+        try:
+            return loads(data)
+        except json.JSONDecodeError:
+            raise
+        except ValueError as ex:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                data = bytes(data).decode("utf-8", errors="replace")
+            raise json.JSONDecodeError(str(ex), data, 0) from ex
+
+    return __loads
+
+
+def _fall_back_to_stdlib(
+    loads: Callable[["str | bytes"], Any],
+) -> Callable[["str | bytes"], Any]:
+    """
+    Wraps ``loads`` s.t. documents it rejects are parsed by the standard library,
+    which raises ``json.JSONDecodeError`` if they're invalid after all.
+    """
+
+    def __loads(data: "str | bytes") -> Any:
+        try:
+            return loads(data)
+        except json.JSONDecodeError:
+            return _stdlib_loads(data)
+
+    return __loads
+
+
+_BACKEND_BUILDERS: Dict[str, Callable[[], JsonBackend]] = {
+    "orjson": _build_orjson_backend,
+    "ujson": _build_ujson_backend,
+    "simdjson": _build_simdjson_backend,
+    "json": _build_stdlib_backend,
+}
+
+
+def get_available_json_backends() -> List[str]:
+    """Returns the names of the JSON backends that are installed, fastest first."""
+    available = []
+    for name, build in _BACKEND_BUILDERS.items():
+        try:
+            build()
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def set_json_backend(name: "str | None" = None) -> JsonBackend:
+    """
+    Selects the JSON backend that is used by this module.
+    :param name: The backend's name (``"orjson"``, ``"ujson"``, ``"simdjson"``,
+    or ``"json"``). If ``None``, the fastest installed backend is used.
+    :return: The selected backend.
+    """
+    global _backend
+    if name is None:
+        name = get_available_json_backends()[0]
+    if not name in _BACKEND_BUILDERS:
+        raise ValueError(f"Unsupported JSON backend {name}.")
+    _backend = _BACKEND_BUILDERS[name]()
+    return _backend
+
+
+def get_json_backend() -> JsonBackend:
+    """Returns the JSON backend that is used by this module."""
+    return _backend
+
+
+def loads(data: "str | bytes", fast: bool = False) -> Any:
+    """
+    Parses a JSON document.
+    :param fast: Whether the selected backend is used instead of the standard library.
+    """
+    return _backend.loads(data) if fast else _stdlib_loads(data)
+
+
+def dumps(obj: Any, fast: bool = False) -> str:
+    """
+    Serializes an object to a JSON document.
+    :param fast: Whether the selected backend is used instead of the standard library.
+    """
+    return _backend.dumps(obj) if fast else json.dumps(obj)
+
+
+_backend: JsonBackend = set_json_backend()
+
+
+def load_json(
+    file_path: str,
+    cache: "JsonCache | bool" = False,
+    read_only: bool = False,
+    fast: bool = False,
+) -> dict:
+    """
+    Loads a JSON file.
+    :param file_path: The read file.
+    :param cache: Whether the parsed file is cached, s.t. loading it again is
+    cheap as long as it's unchanged. If ``True``, a module-wide ``JsonCache`` is used,
+    which can be cleared with ``invalidate_json_cache``; otherwise, the given cache is used.
+    :param read_only: When caching, whether the cached object is returned as a
+    read-only view (see ``JsonCache.load``) instead of as a private copy.
+    :param fast: Whether an uncached file is parsed with the selected backend
+    instead of the standard library. This is faster, but not exact for every
+    backend (see ``JsonBackend``). Cached files are always parsed by the
+    standard library, as they're only parsed once.
+    """
+    if cache is False:
+        loads = _backend.loads if fast else _stdlib_loads
+        with open(file_path, "rb") as json_doc:
+            j_data = loads(json_doc.read())
+        return j_data
+    if cache is True:
+        cache = _default_json_cache
+    return cache.load(file_path, read_only)
+
+
+class JsonCache:
+    """
+    Cache of parsed JSON files, keyed by their path and validated against
+    their modification time and size on every load.
+
+    Parsed files are kept in memory as ``marshal`` data, which is decoded
+    faster than JSON, s.t. each load can return a private copy; read-only views
+    are shared instead. Optionally, the ``marshal`` data is also stored in a
+    sidecar file, s.t. new processes skip parsing the JSON too.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 64,
+        use_sidecar: bool = False,
+        sidecar_folder: "str | None" = None,
+    ) -> None:
+        """
+        :param max_entries: The maximum number of files that are kept in memory;
+        the least recently loaded file is dropped first.
+        :param use_sidecar: Whether sidecar files are read and written.
+        :param sidecar_folder: The folder sidecar files are stored in, named after
+        the JSON file and a hash of its absolute path. If ``None``, they're stored
+        next to the JSON file as ``<file>.marshal``.
+        """
+        if max_entries < 1:
+            raise ValueError("The cache must have room for at least one entry.")
+        self.__max_entries: int = max_entries
+        self.__use_sidecar: bool = use_sidecar
+        self.__sidecar_folder: "str | None" = sidecar_folder
+        # Maps paths to their mtime, size, marshal data, and read-only view.
+        self.__entries: Dict[str, List[Any]] = {}
+        self.__lock = threading.Lock()
+
+    def load(self, file_path: str, read_only: bool = False) -> Any:
+        """
+        Loads a JSON file, using the cache if the file is unchanged.
+        :param file_path: The read file.
+        :param read_only: Whether a shared, read-only view is returned, in which
+        objects are ``MappingProxyType`` instances and arrays are tuples.
+        Otherwise, a private copy is returned, which can be changed freely.
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self.__lock:
+            entry = self.__entries.pop(path, None)
+            if not entry is None and entry[0] == version:
+                self.__entries[path] = entry
+            else:
+                entry = None
+
+        if entry is None:
+            entry = [version, self.__load_data(path, version), None]
+            with self.__lock:
+                self.__entries.pop(path, None)
+                self.__entries[path] = entry
+                while len(self.__entries) > self.__max_entries:
+                    self.__entries.pop(next(iter(self.__entries)))
+
+        if not read_only:
+            with _paused_gc():
+                return marshal.loads(entry[1])
+        if entry[2] is None:
+            with _paused_gc():
+                entry[2] = _freeze(marshal.loads(entry[1]))
+        return entry[2]
+
+    def __load_data(self, path: str, version: Tuple[int, int]) -> bytes:
+        """Returns the marshal data of the file, using its sidecar if it's valid."""
+        sidecar_path = self.__get_sidecar_path(path)
+        # The path guards against sidecars of other files, e.g., after a file moved.
+        header = (_SIDECAR_FORMAT, path, *version)
+        if self.__use_sidecar:
+            try:
+                with open(sidecar_path, "rb") as sidecar:
+                    stored_header = marshal.load(sidecar)
+                    if stored_header == header:
+                        return sidecar.read()
+            except (OSError, EOFError, ValueError, TypeError):
+                pass
+
+        with open(path, "rb") as json_doc:
+            with _paused_gc():
+                data = marshal.dumps(_stdlib_loads(json_doc.read()))
+
+        if self.__use_sidecar:
+            temp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+            try:
+                with open(temp_path, "wb") as sidecar:
+                    marshal.dump(header, sidecar)
+                    sidecar.write(data)
+                os.replace(temp_path, sidecar_path)
+            except OSError:
+                # The cache still works without its sidecar, e.g., in read-only folders.
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        return data
+
+    def __get_sidecar_path(self, path: str) -> str:
+        if self.__sidecar_folder is None:
+            return f"{path}.marshal"
+        path_hash = hashlib.sha256(path.encode("utf-8", "surrogateescape")).hexdigest()
+        name = f"{os.path.basename(path)}.{path_hash[:16]}.marshal"
+        return os.path.join(self.__sidecar_folder, name)
+
+    def invalidate(self, file_path: "str | None" = None, remove_sidecar: bool = False):
+        """
+        Drops a file from the cache, or all files if no path is specified.
+        :param remove_sidecar: Whether the sidecar files of the dropped files are deleted.
+        """
+        with self.__lock:
+            if file_path is None:
+                paths = list(self.__entries.keys())
+                self.__entries.clear()
+            else:
+                paths = [os.path.abspath(file_path)]
+                self.__entries.pop(paths[0], None)
+        if remove_sidecar:
+            for path in paths:
+                try:
+                    os.remove(self.__get_sidecar_path(path))
+                except FileNotFoundError:
+                    pass
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+# The sidecar format depends on the Python version, as ``marshal``'s does.
+_SIDECAR_FORMAT = (marshal.version, *sys.version_info[:2])
+
+_default_json_cache = JsonCache()
+
+
+def invalidate_json_cache(file_path: "str | None" = None) -> None:
+    """Drops a file, or all files, from the cache used by ``load_json``."""
+    _default_json_cache.invalidate(file_path)
+
+
+@contextmanager
+def _paused_gc():
+    """
+    Disables the garbage collector while building large object trees,
+    during which its collections only cost time, as nothing is garbage yet.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def _freeze(element: Any) -> Any:
+    """Returns a read-only version of a parsed JSON element."""
+    if isinstance(element, dict):
+        return MappingProxyType({key: _freeze(value) for key, value in element.items()})
+    if isinstance(element, list):
+        return tuple(_freeze(value) for value in element)
+    return element
+
+
+def iter_jsonl(
+    file_path: str, buffer_size: int = 1 << 20, fast: bool = False
+) -> Iterator[Any]:
+    """
+    Iterates through the records of a JSON Lines file without loading the whole
+    file into memory. Empty lines are skipped, and compressed files are
+    decompressed transparently (see ``open_compressed``).
+    :param file_path: The read file.
+    :param buffer_size: The read buffer size in bytes.
+    :param fast: Whether records are parsed with the selected backend
+    instead of the standard library (see ``load_json``).
+    """
+    loads = _backend.loads if fast else _stdlib_loads
+    with open_compressed(file_path, "rb", buffer_size) as jsonl_doc:
+        for line in jsonl_doc:
+            if not line.isspace():
+                yield loads(line)
+
+
+def iter_jsonl_batches(
+    file_path: str,
+    batch_size: int = 1000,
+    buffer_size: int = 1 << 20,
+    fast: bool = False,
+) -> Iterator[List[Any]]:
+    """Iterates through the records of a JSON Lines file in lists of ``batch_size``."""
+    return batched(iter_jsonl(file_path, buffer_size, fast), batch_size)
+
+
+def load_jsonl_parallel(
+    file_path: str,
+    workers: int = 4,
+    nested_keys: "List[List[Any]] | None" = None,
+    ordered: bool = True,
+    chunk_size: int = 16 << 20,
+    use_threads: bool = False,
+    fast: bool = False,
+) -> Iterator[List[Any]]:
+    """
+    Parses an uncompressed JSON Lines file using multiple worker processes.
+    The file is split into newline-aligned byte ranges of roughly ``chunk_size``
+    bytes, each of which is read and parsed by a worker, and returned as one batch.
+    :param file_path: The read file.
+    :param workers: The number of workers.
+    :param nested_keys: Optional nested keys (see ``get_nested``) that are extracted
+    from each record. If set, records are returned as tuples of these values,
+    which are smaller to send back than the full records.
+    :param ordered: Whether batches are yielded in file order,
+    or in the order in which they complete.
+    :param chunk_size: The approximate size of each range in bytes.
+    :param use_threads: Whether the workers are threads instead of processes.
+    :param fast: Whether records are parsed with the selected backend
+    instead of the standard library (see ``load_json``).
+    :return: The batches of (projected) records.
+    """
+    return iterate_line_range_results(
+        file_path,
+        _parse_jsonl_range,
+        workers,
+        chunk_size,
+        ordered=ordered,
+        use_threads=use_threads,
+        nested_keys=nested_keys,
+        fast=fast,
+    )
+
+
+def _parse_jsonl_range(
+    file_path: str,
+    start: int,
+    end: int,
+    nested_keys: "List[List[Any]] | None",
+    fast: bool,
+) -> List[Any]:
+    """Parses the records in a byte range of a JSON Lines file."""
+    loads = _backend.loads if fast else _stdlib_loads
+    records = [
+        loads(line)
+        for line in iterate_lines_in_range(file_path, start, end)
+        if len(line) > 0 and not line.isspace()
+    ]
+    if nested_keys is None:
+        return records
+    return [
+        tuple(get_nested(record, nested_key) for nested_key in nested_keys)
+        for record in records
+    ]
+
+
+def iter_json_array(file_path: str, buffer_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    Iterates through the elements of a file containing one top-level JSON array,
+    decoding them incrementally, s.t. only the current element is kept in memory.
+    This always uses the standard library, as it's the only backend
+    that supports incremental decoding.
+    :param file_path: The read file.
+    :param buffer_size: The number of characters that are read at once.
+    """
+    decoder = json.JSONDecoder()
+    with open_compressed(file_path, "r", buffer_size, encoding="utf-8") as json_doc:
+        buffer = ""
+        position = 0
+        is_exhausted = False
+
+        def __read(size: int) -> bool:
+            """Appends the next characters to the buffer; false if there are none."""
+            nonlocal buffer, position, is_exhausted
+            chunk = json_doc.read(size)
+            if len(chunk) == 0:
+                is_exhausted = True
+                return False
+            buffer = buffer[position:] + chunk
+            position = 0
+            return True
+
+        def __next_token() -> str:
+            """Skips whitespace and returns the next character, or "" at the end."""
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in _WHITESPACE:
+                    position += 1
+                if position < len(buffer):
+                    return buffer[position]
+                if not __read(buffer_size):
+                    return ""
+
+        if __next_token() != "[":
+            raise json.JSONDecodeError("Expecting '['", buffer, position)
+        position += 1
+        expects_element = None
+        while True:
+            token = __next_token()
+            if token == "]" and expects_element is not True:
+                return
+            if expects_element is False:
+                if token != ",":
+                    raise json.JSONDecodeError(
+                        "Expecting ',' delimiter", buffer, position
+                    )
+                position += 1
+                expects_element = True
+                continue
+            if token == "":
+                raise json.JSONDecodeError("Unterminated array", buffer, position)
+
+            # Decodes the element, reading more when it may be incomplete, e.g.,
+            # a number at the end of the buffer. Read sizes double, s.t. huge
+            # elements aren't decoded over and over again.
+            while True:
+                try:
+                    element, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if is_exhausted or not __read(max(buffer_size, len(buffer))):
+                        raise
+                    continue
+                if end < len(buffer) or is_exhausted:
+                    break
+                __read(max(buffer_size, len(buffer)))
+            yield element
+            position = end
+            expects_element = False
 
 
-def load_json(file_path: str) -> dict:
-    with open(file_path, "r", encoding="utf-8") as json_doc:
-        j_data = json.loads(json_doc.read())
-    return j_data
+def iter_json_array_batches(
+    file_path: str, batch_size: int = 1000, buffer_size: int = 1 << 20
+) -> Iterator[List[Any]]:
+    """Iterates through the elements of a top-level JSON array in lists of ``batch_size``."""
+    return batched(iter_json_array(file_path, buffer_size), batch_size)
@@ -4,6 +4,8 @@ Contains utility scripts for multithreading related tasks.
 
 import logging
 import multiprocessing
+import queue
+import threading
 from typing import Callable, Iterator, TypeVar, Any, List
 
 
@@ -11,18 +13,21 @@ T = TypeVar("T")
 R = TypeVar("R")
 
 
-class SimpleConsumer(multiprocessing.Process):
-    """Simple consumer thread."""
+class _ConsumerBase:
+    """Implements the execution lifecycle shared by process and thread consumers."""
 
     class TerminateTask:
         """When received by the simple consumer, it terminates."""
 
+    class FailedTask:
+        """Returned in place of the result of a task that raised an exception."""
+
     def __init__(
         self,
         on_message_received: Callable,
-        task_list: multiprocessing.JoinableQueue,
+        task_list: "multiprocessing.JoinableQueue | queue.Queue",
         worker_index: int,
-        result_queue: multiprocessing.Queue,
+        result_queue: "multiprocessing.Queue | queue.Queue",
         consumer_name: str = "SimpleConsumer",
         *args,
         **kwargs,
@@ -40,16 +45,20 @@ class SimpleConsumer(multiprocessing.Process):
     def run(self) -> None:
         """Implements simple execution lifecycle."""
         for task in self._my_tasks():
-            self._execute_task(task)
+            try:
+                self._execute_task(task)
+            finally:
+                self._task_list.task_done()
 
     def _my_tasks(self) -> Iterator[R]:
         """Yields new tasks as long as no `TerminateTask` is found."""
         has_terminated = False
         while not has_terminated:
             task = self._task_list.get()
-            if not isinstance(task, SimpleConsumer.TerminateTask):
+            if not isinstance(task, _ConsumerBase.TerminateTask):
                 yield task
             else:
+                self._task_list.task_done()
                 has_terminated = True
 
     def _execute_task(self, task: R):
@@ -65,9 +74,19 @@ class SimpleConsumer(multiprocessing.Process):
                 self._result_queue.put(result)
         except Exception as ex:
             logging.warning(f"{self._consumer_name}: Failed with entry {task}: {ex}.")
+            if not self._result_queue is None:
+                self._result_queue.put(_ConsumerBase.FailedTask())
             raise
 
 
+class SimpleConsumer(_ConsumerBase, multiprocessing.Process):
+    """Simple consumer process."""
+
+
+class SimpleThreadConsumer(_ConsumerBase, threading.Thread):
+    """Simple consumer thread, which shares memory with the main thread."""
+
+
 class ExecutorService:
     def __init__(
         self,
@@ -75,6 +94,7 @@ class ExecutorService:
         return_results: bool = False,
         use_early_return_results: bool = True,
         *args,
+        use_threads: bool = False,
         **kwargs,
     ):
         """
@@ -84,6 +104,9 @@ class ExecutorService:
         submitted tasks should be stored.
         :param use_early_return_results: If there are return values,
         whether these should be collected before threads are joined.
+        :param use_threads: Whether the workers are threads instead of processes.
+        Threads share memory with the caller, so they can update shared objects,
+        but they only run in parallel when the tasks release the GIL (e.g., I/O).
         :param *args, **kwargs: Any other parameters that are passed
         to the worker threads.
         """
@@ -97,22 +120,33 @@ class ExecutorService:
         self._args = args
         self._kwargs = kwargs
 
-        self._worklist = multiprocessing.JoinableQueue()
-        self._workers: list[SimpleConsumer] = [None] * thread_count
-        self._result_queue = multiprocessing.Queue() if return_results else None
+        if use_threads:
+            self._consumer_type = SimpleThreadConsumer
+            self._worklist = queue.Queue()
+            self._result_queue = queue.Queue() if return_results else None
+        else:
+            self._consumer_type = SimpleConsumer
+            self._worklist = multiprocessing.JoinableQueue()
+            self._result_queue = multiprocessing.Queue() if return_results else None
+        self._workers: "list[SimpleConsumer | SimpleThreadConsumer]" = [
+            None
+        ] * thread_count
         self._early_return_results: List[R] | None = None
+        self._submitted_count: int = 0
+        self._received_count: int = 0
 
-    def do_task(self, task_callable, targs, tkwargs, *args, **kwargs):
+    def do_task(self, *args, task_callable, targs, tkwargs, **kwargs):
         return task_callable(*targs, *args, **tkwargs, **kwargs)
 
     def start(self):
         """Initializes worker threads."""
         for index in range(self._thread_count):
-            worker = SimpleConsumer(
+            worker = self._consumer_type(
                 self.do_task,
                 self._worklist,
                 index,
-                result_queue=self._result_queue,
+                self._result_queue,
+                self._consumer_type.__name__,
                 *self._args,
                 **self._kwargs,
             )
@@ -131,6 +165,24 @@ class ExecutorService:
             "tkwargs": tkwargs,
         }
         self._worklist.put(task_wrapper)
+        self._submitted_count += 1
+
+    def cancel_pending(self) -> int:
+        """
+        Removes the submitted tasks that no worker has started yet, s.t. they're
+        never executed, and returns how many were removed. Running tasks finish.
+        """
+        cancelled = 0
+        while True:
+            try:
+                self._worklist.get_nowait()
+            except queue.Empty:
+                break
+            # Cancelled tasks are done, s.t. joining the work list doesn't wait for them.
+            self._worklist.task_done()
+            cancelled += 1
+        self._submitted_count -= cancelled
+        return cancelled
 
     def stop(self):
         """
@@ -150,9 +202,12 @@ class ExecutorService:
         for worker in self._workers:
             worker.join()
 
-    def get_results_iter(self) -> Iterator[R] | None:
+    def get_results_iter(self, result_count: "int | None" = None) -> Iterator[R] | None:
         """
         Yields a result iterator, if there is one.
+        :param result_count: The number of results that are received. By default,
+        it waits for the results of all submitted tasks, unless all workers have
+        terminated. Tasks that failed count towards it, but yield no result.
         """
         if self._early_return_results:
             raise ValueError(
@@ -160,8 +215,23 @@ class ExecutorService:
             )
         if not self._return_results:
             return
-        while not self._result_queue.empty() or not self._worklist.empty():
-            yield self._result_queue.get()
+        if result_count is None:
+            result_count = self._submitted_count - self._received_count
+        while result_count > 0:
+            try:
+                result = self._result_queue.get(timeout=0.1)
+            except queue.Empty:
+                if any(worker.is_alive() for worker in self._workers if worker):
+                    continue
+                # Workers that died can't deliver results anymore.
+                try:
+                    result = self._result_queue.get(timeout=0.1)
+                except queue.Empty:
+                    return
+            result_count -= 1
+            self._received_count += 1
+            if not isinstance(result, _ConsumerBase.FailedTask):
+                yield result
 
     def get_results(self) -> List[R] | None:
         """
@@ -181,6 +251,7 @@ def parallelize_tasks(
     return_results: bool = False,
     use_early_return_results: bool = True,
     *args,
+    use_threads: bool = False,
     **kwargs,
 ) -> Iterator[R] | List[R] | None:
     """
@@ -195,12 +266,18 @@ def parallelize_tasks(
     should be kept.
     :param use_early_return_results: If there are return values,
     whether these should be collected before threads are joined.
+    :param use_threads: Whether the workers are threads instead of processes.
     :return: If `return_results` is set to True, it returns the results,
     otherwise, it returns `None`.
     """
 
     executor = ExecutorService(
-        thread_count, return_results, use_early_return_results, *args, **kwargs
+        thread_count,
+        return_results,
+        use_early_return_results,
+        *args,
+        use_threads=use_threads,
+        **kwargs,
     )
     executor.start()
     total_tasks = len(tasks) if isinstance(tasks, list) else "unknown"
@@ -1,21 +1,201 @@
-from typing import Iterator
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import filterfalse, islice
+from typing import Deque, Dict, Hashable, Iterator, List, Set, Tuple
 
 import regex as re
 
 
-def get_matching(collection: Iterator[str], pattern: str) -> Iterator[str]:
-    """Returns all entries that match the expression."""
+def compile(pattern: "str | re.Pattern", flags: int = 0) -> re.Pattern:
+    """Returns the compiled pattern; patterns that are compiled already are reused."""
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    return re.compile(pattern, flags)
 
-    def __is_pattern_match(element: str) -> bool:
-        return re.match(pattern, element)
 
-    return filter(__is_pattern_match, collection)
+def get_matching(
+    collection: Iterator[str],
+    pattern: "str | re.Pattern",
+    thread_count: int = 1,
+    batch_size: int = 4096,
+    preserve_order: bool = True,
+) -> Iterator[str]:
+    """
+    Returns all entries that match the expression.
+    :param collection: The filtered entries, e.g., the lines of a file.
+    :param pattern: The expression.
+    :param thread_count: The number of threads that match batches of entries;
+    see ``filter_concurrently``.
+    :param batch_size: The number of entries per batch when using threads.
+    :param preserve_order: Whether entries keep their order when using threads.
+    """
+    if thread_count > 1:
+        return filter_concurrently(
+            collection, pattern, True, thread_count, batch_size, preserve_order
+        )
+    return filter(compile(pattern).match, collection)
 
 
-def get_non_matching(collection: Iterator[str], pattern: str) -> Iterator[str]:
-    """Returns all entries that do NOT match the expression."""
+def get_non_matching(
+    collection: Iterator[str],
+    pattern: "str | re.Pattern",
+    thread_count: int = 1,
+    batch_size: int = 4096,
+    preserve_order: bool = True,
+) -> Iterator[str]:
+    """
+    Returns all entries that do NOT match the expression.
+    See ``get_matching`` for the parameters.
+    """
+    if thread_count > 1:
+        return filter_concurrently(
+            collection, pattern, False, thread_count, batch_size, preserve_order
+        )
+    return filterfalse(compile(pattern).match, collection)
 
-    def __is_not_pattern_match(element: str) -> bool:
-        return not re.match(pattern, element)
 
-    return filter(__is_not_pattern_match, collection)
+def filter_concurrently(
+    collection: Iterator[str],
+    pattern: "str | re.Pattern",
+    keep_matching: bool = True,
+    thread_count: int = 4,
+    batch_size: int = 4096,
+    preserve_order: bool = True,
+) -> Iterator[str]:
+    """
+    Filters entries on a thread pool. The entries are split into batches,
+    which are matched with ``concurrent=True``, s.t. the GIL is released during
+    matching and batches are matched in parallel. This pays off for expensive
+    patterns or long entries; for cheap matches, the per-entry overhead
+    (which holds the GIL) dominates. At most ``2 * thread_count`` batches
+    are read ahead of the consumer.
+    :param collection: The filtered entries, e.g., the lines of a file.
+    :param pattern: The expression.
+    :param keep_matching: Whether the matching or the non-matching entries are kept.
+    :param thread_count: The number of threads.
+    :param batch_size: The number of entries per batch.
+    :param preserve_order: Whether the entries are yielded in their original order,
+    or batch by batch as they complete.
+    """
+    if thread_count < 1:
+        raise ValueError("You can't have less than one thread.")
+    if batch_size < 1:
+        raise ValueError("The batch size must be at least 1.")
+
+    match = compile(pattern).match
+
+    def __filter_batch(batch: List[str]) -> List[str]:
+        return [
+            element
+            for element in batch
+            if (match(element, concurrent=True) is None) != keep_matching
+        ]
+
+    iterator = iter(collection)
+    batches = iter(lambda: list(islice(iterator, batch_size)), [])
+    max_pending = 2 * thread_count
+    with ThreadPoolExecutor(thread_count) as executor:
+        if preserve_order:
+            pending: Deque[Future] = deque()
+            for batch in batches:
+                pending.append(executor.submit(__filter_batch, batch))
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+            while len(pending) > 0:
+                yield from pending.popleft().result()
+            return
+
+        running: Set[Future] = set()
+        for batch in batches:
+            running.add(executor.submit(__filter_batch, batch))
+            if len(running) >= max_pending:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in running:
+            yield from future.result()
+
+
+def partition(
+    collection: Iterator[str], pattern: "str | re.Pattern"
+) -> Tuple[List[str], List[str]]:
+    """Returns the entries that match the expression, and those that don't, in one pass."""
+    match = compile(pattern).match
+    matching = []
+    non_matching = []
+    add_matching = matching.append
+    add_non_matching = non_matching.append
+    for element in collection:
+        if match(element):
+            add_matching(element)
+        else:
+            add_non_matching(element)
+    return matching, non_matching
+
+
+class MultiPatternMatcher:
+    """
+    Matches entries against multiple patterns at once. The patterns are combined
+    into one alternation with a named group per pattern, s.t. each entry is
+    scanned once, and the matched pattern is found through ``lastgroup``.
+    If multiple patterns match, the first one is reported.
+
+    The patterns may contain named groups, but no numbered backreferences,
+    as the combined pattern shifts group numbers.
+    """
+
+    def __init__(
+        self, patterns: "List[str] | Dict[Hashable, str]", flags: int = 0
+    ) -> None:
+        """
+        :param patterns: The patterns, as a list, or as a dictionary of named patterns.
+        :param flags: The flags the combined pattern is compiled with.
+        """
+        if not isinstance(patterns, dict):
+            patterns = dict(enumerate(patterns))
+        if len(patterns) == 0:
+            raise ValueError("At least one pattern is required.")
+        self.__keys: Dict[str, Hashable] = {}
+        alternatives = []
+        for index, (key, pattern) in enumerate(patterns.items()):
+            group = f"_wmutils_pattern_{index}"
+            self.__keys[group] = key
+            alternatives.append(f"(?P<{group}>{pattern})")
+        self.__pattern: re.Pattern = re.compile("|".join(alternatives), flags)
+
+    @property
+    def pattern(self) -> re.Pattern:
+        """The combined pattern."""
+        return self.__pattern
+
+    def match(self, element: str) -> "Hashable | None":
+        """
+        Returns the key (index or name) of the first pattern
+        that matches the start of the entry, or ``None``.
+        """
+        match = self.__pattern.match(element)
+        return None if match is None else self.__keys[match.lastgroup]
+
+    def search(self, element: str) -> "Hashable | None":
+        """
+        Returns the key (index or name) of the pattern that matches
+        first anywhere in the entry, or ``None``.
+        """
+        match = self.__pattern.search(element)
+        return None if match is None else self.__keys[match.lastgroup]
+
+    def get_matching(self, collection: Iterator[str]) -> Iterator[Tuple[str, Hashable]]:
+        """Yields all entries that match any pattern, with the key of the matched pattern."""
+        match = self.__pattern.match
+        keys = self.__keys
+        for element in collection:
+            result = match(element)
+            if not result is None:
+                yield element, keys[result.lastgroup]
+
+    def group_by_pattern(self, collection: Iterator[str]) -> Dict[Hashable, List[str]]:
+        """Returns the matching entries per pattern key. Entries that match no pattern are dropped."""
+        groups = {key: [] for key in self.__keys.values()}
+        for element, key in self.get_matching(collection):
+            groups[key].append(element)
+        return groups